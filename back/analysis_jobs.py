@@ -0,0 +1,110 @@
+"""
+옷 분석 작업 큐
+- 업로드 요청은 작업을 등록하고 job_id를 즉시 반환
+- 워커 스레드가 순서대로 분석을 수행하고 결과를 작업 테이블에 기록
+- /api/analysis-status/<job_id> 로 queued / running / done / failed 상태 조회
+"""
+import queue
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class AnalysisJobQueue:
+    """인-프로세스 워커 풀 + 작업 테이블"""
+
+    def __init__(self, max_workers=1, max_queue=8, job_ttl=600):
+        """
+        Args:
+            max_workers: 동시에 분석을 수행할 워커 수
+            max_queue: 대기(queued) 가능한 최대 작업 수 (초과 시 queue.Full)
+            job_ttl: 완료된 작업을 테이블에 보관하는 시간 (초)
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **info):
+        """
+        분석 작업 등록
+        - fn(*args)의 반환값이 작업 결과가 됨
+        - info는 상태 조회 시 함께 반환되는 부가 정보 (filename, 조회 권한 확인용 user_id 등)
+        """
+        with self._lock:
+            self._purge_expired()
+            queued = sum(1 for job in self._jobs.values() if job["status"] == QUEUED)
+            if queued >= self.max_queue:
+                raise queue.Full(f"분석 대기열이 가득 찼습니다 ({queued}/{self.max_queue})")
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "job_id": job_id,
+                "status": QUEUED,
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                **info
+            }
+            self._jobs[job_id] = job
+
+        self._executor.submit(self._run, job_id, fn, args)
+        return self.get(job_id)
+
+    def _run(self, job_id, fn, args):
+        self._update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = fn(*args)
+            self._update(job_id, status=DONE, result=result, finished_at=time.time())
+        except Exception as e:
+            print(f"[analysis_jobs] [ERROR] 작업 {job_id} 실패: {e}")
+            traceback.print_exc()
+            self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _purge_expired(self):
+        """오래된 완료/실패 작업 제거 (lock 안에서 호출)"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and now - job["finished_at"] > self.job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """작업 상태 사본 반환 (없으면 None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            if snapshot["status"] == QUEUED:
+                # 대기 순번 (1부터)
+                snapshot["position"] = 1 + sum(
+                    1 for other in self._jobs.values()
+                    if other["status"] == QUEUED and other["created_at"] < job["created_at"]
+                )
+            return snapshot
+
+    def stats(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return {"max_workers": self.max_workers, "max_queue": self.max_queue, **counts}
@@ -0,0 +1,106 @@
+"""
+YOLO cascade 벤치마크
+- 모든 옷에 Router 실행 (기존) vs YOLO가 확실한 옷은 Router 생략 (cascade)
+- Router 생략 비율, 카테고리/속성 일치율(정확도 차이), 사진당 분류 시간 비교
+- --low-res 를 주면 확실한 옷의 전문가 입력을 저해상도로 줄였을 때도 함께 측정
+
+실행 방법:
+python benchmark_cascade.py --images ./holdout_images --confidence 0.85 0.9 --low-res 0 160
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+clothes_dir = os.path.join(current_dir, 'clothes')
+if clothes_dir not in sys.path:
+    sys.path.insert(0, clothes_dir)
+
+import final_pipeline
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def prepare(models, image_dir):
+    """사진별 (옷 조각, YOLO 힌트) - YOLO는 한 번만 실행"""
+    samples = []
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = Image.open(os.path.join(image_dir, name)).convert("RGB")
+        result = models['yolo'](image, verbose=False)[0]
+        if result.masks is None:
+            continue
+        crops = final_pipeline.extract_garment_crops(np.asarray(image), result)
+        samples.append((crops, final_pipeline.get_yolo_hints(models, result)))
+    return samples
+
+
+def run(models, samples, use_hints):
+    results = []
+    start = time.perf_counter()
+    for crops, hints in samples:
+        results.extend(final_pipeline.classify_crops(models, crops, hints if use_hints else None))
+    return results, time.perf_counter() - start
+
+
+def agreement(reference, candidate):
+    """(카테고리 일치율, 스타일 제외 속성 일치율)"""
+    category = sum(a['main_category'] == b['main_category'] for a, b in zip(reference, candidate))
+    attr_total = attr_same = 0
+    for a, b in zip(reference, candidate):
+        if a['main_category'] != b['main_category']:
+            continue
+        for key, value in a['details'].items():
+            if key == '스타일':
+                continue
+            attr_total += 1
+            attr_same += int(b['details'].get(key) == value)
+    return category / max(len(reference), 1), attr_same / max(attr_total, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO cascade 벤치마크")
+    parser.add_argument("--images", required=True, help="평가용 사진 폴더")
+    parser.add_argument("--confidence", type=float, nargs='+', default=[0.7, 0.85, 0.95])
+    parser.add_argument("--low-res", type=int, nargs='+', default=[0], help="저해상도 입력 크기 (0이면 원해상도)")
+    args = parser.parse_args()
+
+    models = final_pipeline.load_all_models()
+    if models.get('cascade') is None:
+        print("cascade를 사용할 수 없습니다 (멀티헤드 모델이거나 YOLO 클래스 매핑 없음).")
+        return
+
+    # 측정이 흔들리지 않도록 감사(audit) 샘플링은 끔
+    final_pipeline.CASCADE_AUDIT_RATE = 0.0
+    samples = prepare(models, args.images)
+    if not samples:
+        print("옷이 감지된 사진이 없습니다.")
+        return
+    print(f"사진 {len(samples)}장, 옷 {sum(len(crops) for crops, _ in samples)}개")
+
+    run(models, samples[:1], use_hints=False)  # 워밍업
+    reference, reference_time = run(models, samples, use_hints=False)
+
+    print("\n" + "=" * 80)
+    print(f"{'신뢰도':>8}{'저해상도':>10}{'Router 생략':>14}{'카테고리 일치':>14}{'속성 일치':>12}{'ms/사진':>10}{'속도 향상':>10}")
+    print("=" * 80)
+    print(f"{'-':>8}{'-':>10}{0:>14.1%}{1:>14.1%}{1:>12.1%}{reference_time * 1000 / len(samples):>10.2f}{1:>9.2f}x")
+
+    for low_res in args.low_res:
+        for confidence in args.confidence:
+            final_pipeline.CASCADE_YOLO_CONFIDENCE = confidence
+            final_pipeline.CASCADE_LOW_RES_SIZE = low_res
+            stats = models['cascade']['stats'] = final_pipeline.CascadeStats(log_every=10 ** 9)
+            results, elapsed = run(models, samples, use_hints=True)
+            category_match, attr_match = agreement(reference, results)
+            print(f"{confidence:>8.2f}{low_res or '-':>10}{stats.stats()['yolo_rate']:>14.1%}{category_match:>14.1%}"
+                  f"{attr_match:>12.1%}{elapsed * 1000 / len(samples):>10.2f}{reference_time / elapsed:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+옷 분석 배치 처리 벤치마크
+- 아이템별 순차 분류 (기존 방식) vs 배치 분류 (classify_crops)
+- 사진 한 장에 옷 1~8개가 있는 경우를 측정
+
+실행 방법:
+python benchmark_clothes_batching.py --image fit/input/cloth.jpg
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+clothes_dir = os.path.join(current_dir, 'clothes')
+if clothes_dir not in sys.path:
+    sys.path.insert(0, clothes_dir)
+
+import final_pipeline
+
+
+def build_crops(models, image_path, count):
+    """YOLO로 찾은 옷 조각을 count개가 되도록 반복 (옷이 없으면 원본 이미지 사용)"""
+    image = Image.open(image_path).convert("RGB")
+    yolo_results = models['yolo'](image, verbose=False)
+    crops = []
+    if yolo_results and yolo_results[0].masks is not None:
+        crops = final_pipeline.extract_garment_crops(np.asarray(image), yolo_results[0])
+    if not crops:
+        crops = [image]
+    return [crops[i % len(crops)] for i in range(count)]
+
+
+def measure(fn, repeat):
+    fn()  # 워밍업
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="옷 분석 배치 처리 벤치마크")
+    parser.add_argument("--image", default=os.path.join(current_dir, 'fit', 'input', 'cloth.jpg'))
+    parser.add_argument("--max-items", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    models = final_pipeline.load_all_models()
+
+    print("\n" + "=" * 70)
+    print(f"{'옷 개수':>8}{'순차(ms)':>14}{'배치(ms)':>14}{'속도 향상':>12}{'결과 일치':>10}")
+    print("=" * 70)
+
+    for count in range(1, args.max_items + 1):
+        crops = build_crops(models, args.image, count)
+
+        sequential_time, sequential = measure(
+            lambda: [final_pipeline.classify_crops(models, [crop])[0] for crop in crops], args.repeat)
+        batched_time, batched = measure(
+            lambda: final_pipeline.classify_crops(models, crops), args.repeat)
+
+        same = all(
+            a['main_category'] == b['main_category']
+            and {k: v for k, v in a['details'].items() if k != '스타일'} == {k: v for k, v in b['details'].items() if k != '스타일'}
+            for a, b in zip(sequential, batched)
+        )
+        print(f"{count:>8}{sequential_time * 1000:>14.2f}{batched_time * 1000:>14.2f}"
+              f"{sequential_time / batched_time:>11.2f}x{'O' if same else 'X':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+옷장 조회 벤치마크
+- 기존 방식 (옷 목록 1번 + 옷마다 속성 쿼리 1번 = N+1) vs fetch_wardrobe (쿼리 1번)
+- 임시 DB에 옷장 크기별 데이터를 만들어 조회 시간/쿼리 수 비교, 결과가 같은지도 확인
+- 실제 smart_closet.db는 건드리지 않음
+
+실행 방법:
+python benchmark_wardrobe_query.py --sizes 10 100 300 1000 --image-bytes 20000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from db_files import init_db
+from db_files.clothes_db import fetch_wardrobe
+
+ATTRIBUTES = [
+    '추천 스타일 1순위', '추천 스타일 2순위', '추천 스타일 3순위', '기장', '색상', '서브색상',
+    '옷깃', '소매기장', '소재', '프린트', '넥라인', '핏', '디테일'
+]
+VALUES = ['모던 (확률: 70.17%)', '베이지', '코튼', '노멀', '긴팔', '무지', '라운드넥', '없음']
+REPEAT = 5
+
+
+def populate(db_path, sizes, image_bytes):
+    """사용자 1명당 옷장 크기 하나 (User_id = 옷 개수 순서대로 1, 2, ...)"""
+    init_db.DB_PATH = db_path
+    init_db.init_database()
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany('INSERT OR IGNORE INTO attributes (A_name) VALUES (?)', [(name,) for name in ATTRIBUTES])
+    attribute_ids = dict(cursor.execute('SELECT A_name, A_id FROM attributes').fetchall())
+
+    rng = random.Random(0)
+    image_url = "data:image/png;base64," + "A" * image_bytes
+    user_ids = {}
+    for size in sizes:
+        cursor.execute('''
+            INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+            VALUES (?, 'x', ?, DATE('now'), DATE('now'), 'F')
+        ''', (f"bench{size}@example.com", f"bench{size}"))
+        user_id = cursor.lastrowid
+        user_ids[size] = user_id
+        for i in range(size):
+            cursor.execute('''
+                INSERT INTO clothing_information
+                (User_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
+                VALUES (?, ?, '상의', '티셔츠', DATE('now', ?), 1)
+            ''', (user_id, image_url, f"-{i % 365} days"))
+            ci_id = cursor.lastrowid
+            cursor.executemany('''
+                INSERT INTO clothing_attributes (CI_id, A_id, CA_value, CA_updateDate)
+                VALUES (?, ?, ?, DATE('now'))
+            ''', [(ci_id, attribute_ids[name], rng.choice(VALUES)) for name in ATTRIBUTES])
+    conn.commit()
+    conn.close()
+    return user_ids
+
+
+def fetch_wardrobe_n_plus_one(cursor, user_id):
+    """기존 get_current_user_clothing 조회 방식 (비교용)"""
+    cursor.execute('''
+        SELECT CI_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate
+        FROM clothing_information
+        WHERE User_id = ?
+        ORDER BY CI_createDate DESC
+    ''', (user_id,))
+    result = []
+    for ci_id, image_url, main_category, sub_category, create_date in cursor.fetchall():
+        cursor.execute('''
+            SELECT a.A_name, ca.CA_value
+            FROM clothing_attributes ca
+            JOIN attributes a ON ca.A_id = a.A_id
+            WHERE ca.CI_id = ?
+        ''', (ci_id,))
+        result.append({
+            'id': ci_id,
+            'main_category': main_category,
+            'sub_category': sub_category,
+            'details': dict(cursor.fetchall()),
+            'created_at': create_date,
+            'image_url': image_url
+        })
+    return result
+
+
+def measure(db_path, fn, user_id):
+    """(최소 소요 시간 ms, 실행된 쿼리 수, 결과)"""
+    best, queries, result = float('inf'), 0, None
+    for _ in range(REPEAT):
+        conn = sqlite3.connect(db_path)
+        counter = [0]
+        conn.set_trace_callback(lambda _: counter.__setitem__(0, counter[0] + 1))
+        start = time.perf_counter()
+        result = fn(conn.cursor(), user_id)
+        best = min(best, time.perf_counter() - start)
+        queries = counter[0]
+        conn.close()
+    return best * 1000, queries, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="옷장 조회 N+1 vs 단일 쿼리 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10, 100, 300, 1000])
+    parser.add_argument("--image-bytes", type=int, default=20000, help="옷 하나의 이미지 URL 길이 (data URL)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'benchmark.db')
+        user_ids = populate(db_path, args.sizes, args.image_bytes)
+
+        print("\n" + "=" * 72)
+        print(f"{'옷 개수':>8}{'N+1 ms':>12}{'N+1 쿼리':>10}{'단일 ms':>12}{'단일 쿼리':>10}{'속도 향상':>10}{'결과 일치':>10}")
+        print("=" * 72)
+        for size in args.sizes:
+            old_ms, old_queries, old_result = measure(db_path, fetch_wardrobe_n_plus_one, user_ids[size])
+            new_ms, new_queries, new_result = measure(db_path, fetch_wardrobe, user_ids[size])
+            # 같은 날짜끼리의 순서는 기존 쿼리에서 정해져 있지 않으므로 id 기준으로 비교
+            same = sorted(old_result, key=lambda item: item['id']) == sorted(new_result, key=lambda item: item['id'])
+            print(f"{size:>8}{old_ms:>12.2f}{old_queries:>10}{new_ms:>12.2f}{new_queries:>10}"
+                  f"{old_ms / max(new_ms, 1e-9):>9.1f}x{'O' if same else 'X':>10}")
+
+
+if __name__ == '__main__':
+    main()
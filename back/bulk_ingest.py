@@ -0,0 +1,309 @@
+"""
+옷장 대량 등록 파이프라인
+- 폴더 또는 zip 안의 옷 사진들을 한 번에 분석해서 clothing_information / clothing_attributes 에 바로 저장
+- 단계: 디코딩(스레드 풀, 다음 배치를 미리 디코딩) → YOLO 배치 분할 → 옷 조각 배치 분류 → 배치 단위 DB 저장
+- 처리량(장/초, 옷/초)과 단계별 소요 시간 보고
+
+실행 방법:
+python bulk_ingest.py --source ./onboarding_photos --user-email user@example.com
+python bulk_ingest.py --source ./photos.zip --user-id 3 --batch-size 8 --dry-run
+"""
+
+import argparse
+import base64
+import io
+import itertools
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+clothes_dir = os.path.join(current_dir, 'clothes')
+for path in (current_dir, clothes_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from db_files.clothes_db import insert_clothing_items, get_user_id_by_email
+from db_files.embedding_index import embedding_index, decode_embedding
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+BULK_INGEST_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "8"))          # YOLO 배치 이미지 수
+BULK_INGEST_DECODE_WORKERS = int(os.getenv("BULK_INGEST_DECODE_WORKERS", "4"))  # 디코딩 스레드 수
+BULK_INGEST_MAX_IMAGES = int(os.getenv("BULK_INGEST_MAX_IMAGES", "500"))        # 한 번에 등록 가능한 최대 사진 수
+BULK_INGEST_MAX_IMAGE_MB = float(os.getenv("BULK_INGEST_MAX_IMAGE_MB", "20"))   # zip 안 사진 1장 최대 크기 (넘으면 건너뜀)
+BULK_INGEST_MAX_TOTAL_MB = float(os.getenv("BULK_INGEST_MAX_TOTAL_MB", "1024"))  # zip 압축 해제 후 전체 최대 크기
+STAGES = ("decode", "yolo", "crop", "classify", "db")
+
+
+def is_image_name(name):
+    base = os.path.basename(name)
+    return not base.startswith('.') and base.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def iter_directory(directory):
+    """폴더(하위 폴더 포함)의 이미지 → (이름, 바이트)"""
+    for root, _, names in sorted(os.walk(directory)):
+        for name in sorted(names):
+            if is_image_name(name):
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    yield os.path.relpath(path, directory), f.read()
+
+
+def iter_zip(source, max_file_bytes=None, max_total_bytes=None):
+    """
+    zip 파일 경로 또는 바이트 안의 이미지 → (이름, 바이트)
+    - 압축 해제 크기(info.file_size) 기준으로 사진 1장이 max_file_bytes를 넘으면 건너뛰고,
+      전체가 max_total_bytes를 넘으면 읽기 전에 거부 (압축 폭탄으로 메모리가 바닥나지 않도록)
+    - zipfile은 선언된 크기보다 많이 풀지 않으므로 (다르면 BadZipFile) file_size로 판단해도 됨
+    """
+    max_file_bytes = max_file_bytes or int(BULK_INGEST_MAX_IMAGE_MB * 1024 ** 2)
+    max_total_bytes = max_total_bytes or int(BULK_INGEST_MAX_TOTAL_MB * 1024 ** 2)
+    archive = zipfile.ZipFile(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    with archive:
+        members = []
+        for info in archive.infolist():
+            if info.is_dir() or info.filename.startswith('__MACOSX/') or not is_image_name(info.filename):
+                continue
+            if info.file_size > max_file_bytes:
+                print(f"[bulk_ingest] [WARNING] 너무 큰 사진 건너뜀: {info.filename} ({info.file_size / 1024 ** 2:.1f} MB)")
+                continue
+            members.append(info)
+        total = sum(info.file_size for info in members)
+        if total > max_total_bytes:
+            raise ValueError(f"zip 압축 해제 크기가 너무 큽니다 ({total / 1024 ** 2:.0f} MB, "
+                             f"최대 {max_total_bytes / 1024 ** 2:.0f} MB)")
+        for info in members:
+            yield info.filename, archive.read(info)
+
+
+def iter_source(source):
+    """폴더 / zip 경로 / zip 바이트 / [(이름, 바이트), ...] 모두 허용"""
+    if isinstance(source, (bytes, bytearray)) or (isinstance(source, str) and zipfile.is_zipfile(source)):
+        return iter_zip(source)
+    if isinstance(source, str) and os.path.isdir(source):
+        return iter_directory(source)
+    if isinstance(source, (list, tuple)):
+        return iter(source)
+    raise ValueError(f"폴더 또는 zip 파일이 아닙니다: {source}")
+
+
+def decode_entry(entry):
+    """(이름, 바이트) → 디코딩 결과 (디코딩 스레드에서 실행)"""
+    name, data = entry
+    start = time.perf_counter()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            mime = Image.MIME.get(image.format, 'image/jpeg')
+            rgb = image.convert("RGB")
+        return {"name": name, "data": data, "mime": mime, "image": rgb, "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return {"name": name, "error": str(e), "seconds": time.perf_counter() - start}
+
+
+def to_db_attributes(details):
+    """
+    분석 결과 details → DB 속성 형식 (프론트 Result.js의 convertToDbFormat과 동일)
+    - 스타일 Top 3 → '추천 스타일 N순위': '이름 (확률: xx.xx%)'
+    """
+    attributes = {}
+    for key, value in details.items():
+        if isinstance(value, list):
+            if key == '스타일' and value:
+                for rank, style in enumerate(value[:3], 1):
+                    attributes[f'추천 스타일 {rank}순위'] = f"{style['name']} (확률: {style['confidence'] * 100:.2f}%)"
+            elif value:
+                attributes[key] = value[0]['name'] if isinstance(value[0], dict) else ', '.join(map(str, value))
+        else:
+            attributes[key] = value
+    return attributes
+
+
+def to_data_url(data, mime):
+    """원본 사진 → data URL (옷장 화면 저장 방식과 동일)"""
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def batched(iterable, size):
+    batch = []
+    for entry in iterable:
+        batch.append(entry)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def process_batch(pipeline, models, decoded, timings):
+    """디코딩된 사진 배치 → 저장할 옷 목록 + 사진별 결과 (pipeline: final_pipeline 모듈)"""
+    images = [entry for entry in decoded if "image" in entry]
+    per_image = [{"name": entry["name"], "items": 0, "error": entry["error"]} for entry in decoded if "error" in entry]
+    if not images:
+        return [], per_image
+
+    # 1. YOLO 배치 분할
+    start = time.perf_counter()
+    with models['yolo_lock']:
+        yolo_results = models['yolo']([entry["image"] for entry in images], verbose=False)
+    timings["yolo"] += time.perf_counter() - start
+
+    # 2. 사진별 옷 조각 (배치 전체를 한 번에 분류하기 위해 모아둠)
+    start = time.perf_counter()
+    crops, hints, owners = [], [], []
+    for index, (entry, result) in enumerate(zip(images, yolo_results)):
+        if result.masks is None:
+            per_image.append({"name": entry["name"], "items": 0, "error": "옷을 찾을 수 없습니다"})
+            continue
+        image_crops = pipeline.extract_garment_crops(np.asarray(entry["image"]), result)
+        crops.extend(image_crops)
+        hints.extend(pipeline.get_yolo_hints(models, result) or [None] * len(image_crops))
+        owners.extend([index] * len(image_crops))
+    timings["crop"] += time.perf_counter() - start
+
+    if not crops:
+        return [], per_image
+
+    # 3. 배치 분류 (마이크로 배칭이 켜져 있으면 같은 스케줄러 사용, YOLO가 확실한 옷은 Router 생략)
+    start = time.perf_counter()
+    if models.get('batcher') is not None:
+        classified = models['batcher'].run(list(zip(crops, hints)))
+    else:
+        classified = pipeline.classify_crops(models, crops, hints if models.get('cascade') is not None else None)
+    timings["classify"] += time.perf_counter() - start
+
+    items = []
+    counts = {}
+    for owner, classification in zip(owners, classified):
+        entry = images[owner]
+        counts[owner] = counts.get(owner, 0) + 1
+        items.append({
+            "image_url": to_data_url(entry["data"], entry["mime"]),
+            "main_category": classification["main_category"],
+            "sub_category": classification["details"].get('카테고리', '기타'),
+            "attributes": to_db_attributes(classification["details"]),
+            "embedding": classification.get("embedding"),
+            "name": entry["name"],
+        })
+    per_image.extend({"name": images[owner]["name"], "items": count, "error": None} for owner, count in counts.items())
+    return items, per_image
+
+
+def split_duplicates(user_id, items):
+    """옷장에 이미 있는(임베딩이 거의 같은) 옷 분리 → (저장할 옷, 중복 목록)"""
+    unique, duplicates = [], []
+    for item in items:
+        vector = decode_embedding(item.get("embedding"))
+        duplicate = embedding_index.find_duplicate(user_id, vector, item["main_category"]) if vector is not None else None
+        if duplicate:
+            duplicates.append({"name": item["name"], "main_category": item["main_category"],
+                               "duplicate_of": duplicate[0], "similarity": round(duplicate[1], 4)})
+        else:
+            unique.append(item)
+    return unique, duplicates
+
+
+def ingest(pipeline, models, source, user_id, batch_size=BULK_INGEST_BATCH_SIZE,
+           decode_workers=BULK_INGEST_DECODE_WORKERS, max_images=BULK_INGEST_MAX_IMAGES, dry_run=False,
+           skip_duplicates=True):
+    """
+    대량 등록 실행
+    - pipeline/models: final_pipeline 모듈과 load_all_models() 결과
+    - source: 폴더 경로, zip 경로/바이트, 또는 [(이름, 바이트), ...]
+    - dry_run: 분석만 하고 DB에 저장하지 않음
+    - skip_duplicates: 옷장에 이미 있는 옷(임베딩 유사도 기준)은 저장하지 않음
+    반환: 요약 (사진/옷 개수, 처리량, 단계별 시간, 사진별 결과)
+    """
+    timings = {stage: 0.0 for stage in STAGES}
+    images_done = 0
+    ci_ids = []
+    per_image = []
+    duplicates = []
+    start = time.perf_counter()
+
+    entries = itertools.islice(iter_source(source), max_images)
+    with ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="ingest-decode") as executor:
+        batches = batched(entries, batch_size)
+        # 현재 배치를 분석하는 동안 다음 배치를 디코딩
+        pending = [executor.submit(decode_entry, entry) for entry in next(batches, [])]
+        while pending:
+            decoded = [future.result() for future in pending]
+            pending = [executor.submit(decode_entry, entry) for entry in next(batches, [])]
+            timings["decode"] += sum(entry["seconds"] for entry in decoded)
+
+            items, batch_results = process_batch(pipeline, models, decoded, timings)
+            per_image.extend(batch_results)
+            images_done += len(decoded)
+
+            if items and not dry_run:
+                db_start = time.perf_counter()
+                if skip_duplicates:
+                    items, batch_duplicates = split_duplicates(user_id, items)
+                    duplicates.extend(batch_duplicates)
+                if items:
+                    ci_ids.extend(insert_clothing_items(user_id, items))
+                timings["db"] += time.perf_counter() - db_start
+            print(f"[bulk_ingest] 사진 {images_done}장 처리, 옷 {sum(r['items'] for r in per_image)}개 감지")
+
+    total = time.perf_counter() - start
+    total_items = sum(result["items"] for result in per_image)
+    return {
+        "status": "success",
+        "total_images": images_done,
+        "failed_images": sum(1 for result in per_image if result["error"]),
+        "total_items": total_items,
+        "saved_items": len(ci_ids),
+        "duplicates": duplicates,
+        "ci_ids": ci_ids,
+        "seconds": round(total, 3),
+        "images_per_sec": round(images_done / total, 2) if total > 0 else 0.0,
+        "items_per_sec": round(total_items / total, 2) if total > 0 else 0.0,
+        "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()},
+        "images": per_image,
+    }
+
+
+def print_summary(summary):
+    print("\n" + "=" * 70)
+    print("대량 등록 결과")
+    print("=" * 70)
+    print(f"사진: {summary['total_images']}장 (실패/미감지 {summary['failed_images']}장)")
+    print(f"옷: {summary['total_items']}개 감지, {summary['saved_items']}개 저장, 중복 {len(summary['duplicates'])}개 건너뜀")
+    print(f"전체: {summary['seconds']:.2f}s, {summary['images_per_sec']:.2f}장/초, {summary['items_per_sec']:.2f}옷/초")
+    print("--- 단계별 시간 (decode는 스레드 합계, 다음 배치와 겹쳐서 실행) ---")
+    for stage, seconds in summary["timings"].items():
+        print(f"  {stage:<10} {seconds:8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="옷장 대량 등록 (폴더 또는 zip)")
+    parser.add_argument("--source", required=True, help="사진 폴더 또는 zip 파일 경로")
+    user = parser.add_mutually_exclusive_group(required=True)
+    user.add_argument("--user-id", type=int, help="저장할 사용자 User_id")
+    user.add_argument("--user-email", type=str, help="저장할 사용자 이메일")
+    parser.add_argument("--batch-size", type=int, default=BULK_INGEST_BATCH_SIZE)
+    parser.add_argument("--decode-workers", type=int, default=BULK_INGEST_DECODE_WORKERS)
+    parser.add_argument("--max-images", type=int, default=BULK_INGEST_MAX_IMAGES)
+    parser.add_argument("--dry-run", action="store_true", help="분석만 하고 DB에 저장하지 않음")
+    parser.add_argument("--keep-duplicates", action="store_true", help="옷장에 이미 있는 옷도 저장")
+    args = parser.parse_args()
+
+    user_id = args.user_id if args.user_id is not None else get_user_id_by_email(args.user_email)
+    if user_id is None:
+        print(f"사용자를 찾을 수 없습니다: {args.user_email}")
+        sys.exit(1)
+
+    import final_pipeline
+    models = final_pipeline.load_all_models()
+    summary = ingest(final_pipeline, models, args.source, user_id, args.batch_size, args.decode_workers, args.max_images, args.dry_run,
+                     skip_duplicates=not args.keep_duplicates)
+    print_summary(summary)
+
+
+if __name__ == '__main__':
+    main()
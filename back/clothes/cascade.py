@@ -0,0 +1,95 @@
+"""
+YOLO 클래스 기반 조기 종료(cascade)
+- YOLO 분할 클래스가 카테고리를 확실히 알려주면 (신뢰도 ≥ 임계값) 1차 분류(Router) ViT를 건너뜀
+- 애매한 옷(신뢰도 낮음, 매핑 안 되는 클래스)만 Router 실행 → 어려운 경우의 결과는 그대로
+- 결정 비율과, 일부 샘플을 Router/원해상도로 다시 돌려본 일치율(정확도 차이)을 기록
+"""
+import json
+import os
+import threading
+
+# YOLO 클래스 이름 → Router 카테고리 (DeepFashion2 계열 이름 + 카테고리 이름 그대로)
+# 학습한 YOLO 클래스가 다르면 yolo_category_map.json 으로 덮어쓰기
+DEFAULT_YOLO_CATEGORY_MAP = {
+    'short_sleeved_shirt': '상의',
+    'long_sleeved_shirt': '상의',
+    'vest': '상의',
+    'sling': '상의',
+    'short_sleeved_outwear': '아우터',
+    'long_sleeved_outwear': '아우터',
+    'shorts': '하의',
+    'trousers': '하의',
+    'skirt': '하의',
+    'short_sleeved_dress': '원피스',
+    'long_sleeved_dress': '원피스',
+    'vest_dress': '원피스',
+    'sling_dress': '원피스',
+}
+
+
+def load_category_map(path, router_labels):
+    """YOLO 클래스 이름 → Router 카테고리 (Router에 없는 카테고리로 가는 항목은 제외)"""
+    mapping = dict(DEFAULT_YOLO_CATEGORY_MAP)
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            mapping.update(json.load(f))
+    # YOLO 클래스 이름이 Router 카테고리 이름과 같으면 그대로 사용
+    for label in router_labels:
+        mapping.setdefault(label, label)
+    return {name: category for name, category in mapping.items() if category in router_labels}
+
+
+def yolo_hints(yolo_result, names, category_map):
+    """YOLO 결과 → 박스 순서대로 [(카테고리 또는 None, 신뢰도), ...] (extract_garment_crops와 같은 순서)"""
+    classes = yolo_result.boxes.cls.int().tolist()
+    confidences = yolo_result.boxes.conf.tolist()
+    return [(category_map.get(names[class_id]), confidence) for class_id, confidence in zip(classes, confidences)]
+
+
+class CascadeStats:
+    """cascade 결정 비율 + 감사(audit) 샘플 일치율"""
+
+    def __init__(self, log_every=200):
+        self.log_every = log_every
+        self.lock = threading.Lock()
+        self.decisions = {"yolo": 0, "router": 0, "low_res": 0}
+        self.audits = {"router": [0, 0], "low_res": [0, 0]}  # 종류 → [일치, 전체]
+        self._since_log = 0
+
+    def record(self, yolo=0, router=0, low_res=0):
+        with self.lock:
+            self.decisions["yolo"] += yolo
+            self.decisions["router"] += router
+            self.decisions["low_res"] += low_res
+            self._since_log += yolo + router
+            should_log = self._since_log >= self.log_every
+            if should_log:
+                self._since_log = 0
+        if should_log:
+            self.log()
+
+    def record_audit(self, kind, agreed, total=1):
+        """kind: router (YOLO 결정 vs Router) / low_res (저해상도 vs 원해상도 속성)"""
+        with self.lock:
+            self.audits[kind][0] += agreed
+            self.audits[kind][1] += total
+
+    def stats(self):
+        with self.lock:
+            total = self.decisions["yolo"] + self.decisions["router"]
+            return {
+                "items": total,
+                "yolo_rate": round(self.decisions["yolo"] / total, 4) if total else 0.0,
+                "router_rate": round(self.decisions["router"] / total, 4) if total else 0.0,
+                "low_res_rate": round(self.decisions["low_res"] / total, 4) if total else 0.0,
+                "router_agreement": round(self.audits["router"][0] / self.audits["router"][1], 4) if self.audits["router"][1] else None,
+                "router_audits": self.audits["router"][1],
+                "low_res_agreement": round(self.audits["low_res"][0] / self.audits["low_res"][1], 4) if self.audits["low_res"][1] else None,
+                "low_res_audits": self.audits["low_res"][1],
+            }
+
+    def log(self):
+        s = self.stats()
+        print(f"[cascade] 옷 {s['items']}개: YOLO 결정 {s['yolo_rate']:.1%}, Router {s['router_rate']:.1%}, "
+              f"저해상도 {s['low_res_rate']:.1%} | 감사 일치율 Router {s['router_agreement']} ({s['router_audits']}개), "
+              f"저해상도 {s['low_res_agreement']} ({s['low_res_audits']}개)")
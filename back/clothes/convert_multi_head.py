@@ -0,0 +1,247 @@
+"""
+기존 Router + Specialist 체크포인트 → 공유 백본 멀티헤드 모델 변환 도구
+
+사용법:
+    # 1. 변환 (Router 백본을 공유 백본으로 사용, 전문가 헤드는 공유 특징 위에서 재학습)
+    python convert_multi_head.py --refit-epochs 5
+
+    # 2. 기존 모델과 정확도/메모리/지연시간 비교 (결과를 validation.json에 기록)
+    python convert_multi_head.py --compare --max-samples 200
+
+final_pipeline.load_all_models는 2번 비교를 통과한 모델만 사용 (MULTI_HEAD_MODEL=on이면 강제 사용)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import torch
+import torch.nn as nn
+from torch.optim import AdamW
+from torch.utils.data import DataLoader, Subset
+from tqdm import tqdm
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CURRENT_DIR)
+
+from transformers import AutoImageProcessor, AutoModelForImageClassification
+from train_ViT_clothes_detail import SpecialistDataset, SpecialistClassifier, MODEL_NAME
+from multi_head_classifier import MultiHeadClassifier, load_multi_head_model
+from final_pipeline import (
+    ROUTER_MODEL_PATH, SPECIALIST_MODEL_PATHS, MULTI_HEAD_MODEL_PATH, MULTI_HEAD_VALIDATION_NAME
+)
+
+BASE_DATA_DIR = os.path.join(CURRENT_DIR, 'specialist_data')
+HEAD_LEARNING_RATE = 1e-3
+BATCH_SIZE = 32
+DEFAULT_REFIT_EPOCHS = 5
+# 기존 모델 대비 허용하는 정확도 하락 (이보다 떨어지면 validation.json에 passed=false)
+MAX_ACCURACY_DROP = float(os.getenv("MULTI_HEAD_MAX_ACCURACY_DROP", "0.01"))
+
+
+def convert(device):
+    """Router 백본 + Router 헤드 + 전문가 헤드를 하나의 모델로 합침"""
+    print("Router 모델 로딩...")
+    router = AutoModelForImageClassification.from_pretrained(ROUTER_MODEL_PATH)
+
+    specialist_states = {}
+    specialist_label_maps = {}
+    for category, path in SPECIALIST_MODEL_PATHS.items():
+        if not os.path.isdir(path):
+            print(f"-> '{category}' 전문가 모델 없음, 건너뜀")
+            continue
+        specialist_label_maps[category] = torch.load(os.path.join(path, 'label_maps.pth'), map_location='cpu')
+        specialist_states[category] = torch.load(os.path.join(path, 'pytorch_model.bin'), map_location='cpu')
+
+    model = MultiHeadClassifier(router.config, router.config.id2label, specialist_label_maps)
+
+    # ViTForImageClassification.vit 는 pooler 없는 ViTModel → 키가 그대로 일치
+    model.body.load_state_dict(router.vit.state_dict())
+    model.router_head.load_state_dict(router.classifier.state_dict())
+
+    # 전문가 헤드는 초기값으로 기존 선형층을 복사 (백본이 달라졌으므로 refit_specialist_heads로 재학습 필수)
+    for category, state in specialist_states.items():
+        head_state = {
+            key[len('heads.'):]: value
+            for key, value in state.items() if key.startswith('heads.')
+        }
+        model.specialist_heads[category].load_state_dict(head_state)
+
+    return model.to(device)
+
+
+@torch.no_grad()
+def extract_features(model, dataloader, device):
+    """고정된 공유 백본으로 데이터셋 전체의 CLS 특징을 한 번만 계산"""
+    model.eval()
+    features, labels = [], []
+    for batch in tqdm(dataloader, desc="특징 추출 중"):
+        features.append(model.extract_features(batch['pixel_values'].to(device)).cpu())
+        labels.append({k: v for k, v in batch.items() if k.startswith('label_')})
+    merged_labels = {k: torch.cat([b[k] for b in labels]) for k in labels[0]}
+    return torch.cat(features), merged_labels
+
+
+def refit_specialist_heads(model, processor, device, epochs):
+    """공유 백본 특징 위에서 카테고리별 속성 헤드만 재학습"""
+    loss_fn = nn.CrossEntropyLoss()
+    for category in model.specialist_heads.keys():
+        csv_path = os.path.join(BASE_DATA_DIR, f"{category}_metadata.csv")
+        image_dir = os.path.join(BASE_DATA_DIR, category)
+        if not os.path.exists(csv_path):
+            print(f"-> '{category}' 학습 데이터 없음, 헤드 재학습 건너뜀")
+            continue
+
+        print(f"\n--- '{category}' 헤드 재학습 ---")
+        dataset = SpecialistDataset(csv_path, image_dir, processor, split='train')
+        dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=False)
+        features, labels = extract_features(model, dataloader, device)
+
+        heads = model.specialist_heads[category]
+        heads.train()
+        optimizer = AdamW(heads.parameters(), lr=HEAD_LEARNING_RATE)
+        for epoch in range(epochs):
+            order = torch.randperm(len(features))
+            total = 0.0
+            for start in range(0, len(order), BATCH_SIZE):
+                idx = order[start:start + BATCH_SIZE]
+                batch_features = features[idx].to(device)
+                loss = 0
+                for col, head in heads.items():
+                    loss += loss_fn(head(batch_features), labels[f'label_{col}'][idx].to(device))
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+                total += loss.item()
+            print(f"  에포크 {epoch + 1}/{epochs} - loss: {total:.4f}")
+        heads.eval()
+
+
+def count_parameters_mb(modules):
+    total = sum(p.numel() * p.element_size() for m in modules for p in m.parameters())
+    return total / (1024 ** 2)
+
+
+@torch.no_grad()
+def compare(device, max_samples):
+    """기존 5개 모델 vs 멀티헤드 모델: 정확도, 메모리, 아이템당 지연시간 비교"""
+    processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
+
+    router = AutoModelForImageClassification.from_pretrained(ROUTER_MODEL_PATH).to(device).eval()
+    specialists = {}
+    for category, path in SPECIALIST_MODEL_PATHS.items():
+        if os.path.isdir(path):
+            label_maps = torch.load(os.path.join(path, 'label_maps.pth'), map_location=device)
+            specialist = SpecialistClassifier(label_maps).to(device)
+            specialist.load_state_dict(torch.load(os.path.join(path, 'pytorch_model.bin'), map_location=device))
+            specialists[category] = specialist.eval()
+    multi_head = load_multi_head_model(MULTI_HEAD_MODEL_PATH, device)
+
+    legacy_mb = count_parameters_mb([router] + list(specialists.values()))
+    multi_mb = count_parameters_mb([multi_head])
+
+    stats = {'legacy': {'router': 0, 'attr': 0, 'time': 0.0}, 'multi': {'router': 0, 'attr': 0, 'time': 0.0}}
+    n_items = 0
+    n_attrs = 0
+
+    for category in specialists:
+        csv_path = os.path.join(BASE_DATA_DIR, f"{category}_metadata.csv")
+        if not os.path.exists(csv_path):
+            continue
+        # 평가는 학습(헤드 재학습 포함)에 쓰지 않은 held-out 샘플로
+        dataset = SpecialistDataset(csv_path, os.path.join(BASE_DATA_DIR, category), processor, split='holdout')
+        if max_samples:
+            dataset = Subset(dataset, range(min(max_samples, len(dataset))))
+
+        for item in tqdm(dataset, desc=f"'{category}' 비교 중"):
+            pixel_values = item['pixel_values'].unsqueeze(0).to(device)
+
+            # 기존: Router ViT + Specialist ViT
+            start = time.perf_counter()
+            legacy_category = router.config.id2label[router(pixel_values=pixel_values).logits.argmax(-1).item()]
+            legacy_outputs = specialists[category](pixel_values)
+            stats['legacy']['time'] += time.perf_counter() - start
+
+            # 멀티헤드: ViT 1회
+            start = time.perf_counter()
+            features, router_logits = multi_head(pixel_values)
+            multi_category = multi_head.id2label[router_logits.argmax(-1).item()]
+            multi_outputs = multi_head.classify_attributes(features, category)
+            stats['multi']['time'] += time.perf_counter() - start
+
+            stats['legacy']['router'] += int(legacy_category == category)
+            stats['multi']['router'] += int(multi_category == category)
+            for col in legacy_outputs:
+                label = item[f'label_{col}'].item()
+                stats['legacy']['attr'] += int(legacy_outputs[col].argmax(-1).item() == label)
+                stats['multi']['attr'] += int(multi_outputs[col].argmax(-1).item() == label)
+                n_attrs += 1
+            n_items += 1
+
+    if n_items == 0:
+        print("비교할 데이터가 없습니다.")
+        return None
+
+    print("\n" + "=" * 70)
+    print("기존(Router + Specialist) vs 공유 백본 멀티헤드")
+    print("=" * 70)
+    print(f"샘플 수: {n_items}개")
+    print(f"{'':<12}{'Router 정확도':>14}{'속성 정확도':>14}{'ms/아이템':>12}{'모델 MB':>12}")
+    for name, size_mb in (('legacy', legacy_mb), ('multi', multi_mb)):
+        s = stats[name]
+        print(f"{name:<12}{s['router'] / n_items:>14.2%}{s['attr'] / n_attrs:>14.2%}"
+              f"{s['time'] * 1000 / n_items:>12.2f}{size_mb:>12.1f}")
+    print(f"메모리 절감: {legacy_mb / multi_mb:.1f}x, "
+          f"지연시간: {stats['multi']['time'] / stats['legacy']['time']:.2f}배")
+
+    return save_validation(stats, n_items, n_attrs)
+
+
+def save_validation(stats, n_items, n_attrs):
+    """
+    비교 결과를 멀티헤드 모델 폴더에 기록
+    - Router/속성 정확도가 기존 대비 MAX_ACCURACY_DROP 이상 떨어지지 않아야 passed
+    - load_all_models는 passed인 모델만 자동으로 사용
+    """
+    accuracy = {
+        name: {'router': s['router'] / n_items, 'attributes': s['attr'] / n_attrs}
+        for name, s in stats.items()
+    }
+    passed = all(
+        accuracy['multi'][key] >= accuracy['legacy'][key] - MAX_ACCURACY_DROP
+        for key in ('router', 'attributes')
+    )
+    validation = {'passed': passed, 'samples': n_items, 'max_accuracy_drop': MAX_ACCURACY_DROP, 'accuracy': accuracy}
+    with open(os.path.join(MULTI_HEAD_MODEL_PATH, MULTI_HEAD_VALIDATION_NAME), 'w', encoding='utf-8') as f:
+        json.dump(validation, f, ensure_ascii=False, indent=2)
+    print(f"검증 {'통과' if passed else '실패'} → {MULTI_HEAD_VALIDATION_NAME} 기록"
+          f"{'' if passed else ' (load_all_models는 기존 Router + Specialist 사용)'}")
+    return validation
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="공유 백본 멀티헤드 모델 변환/비교 도구")
+    parser.add_argument("--refit-epochs", type=int, default=DEFAULT_REFIT_EPOCHS,
+                        help="공유 특징 위에서 전문가 헤드 재학습 에포크 (1 이상)")
+    parser.add_argument("--compare", action="store_true", help="변환된 모델과 기존 모델의 정확도 비교")
+    parser.add_argument("--max-samples", type=int, default=0, help="비교 시 카테고리별 최대 샘플 수 (0이면 전체)")
+    args = parser.parse_args()
+    if not args.compare and args.refit_epochs < 1:
+        # 다른 백본에서 학습된 헤드를 그대로 저장하면 정확도가 크게 떨어짐
+        parser.error("--refit-epochs는 1 이상이어야 합니다 (재학습 없이 변환한 모델은 저장하지 않음)")
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    if args.compare:
+        compare(device, args.max_samples)
+    else:
+        model = convert(device)
+        processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
+        refit_specialist_heads(model, processor, device, args.refit_epochs)
+        # 이전 변환의 검증 결과는 새 가중치에 해당하지 않으므로 삭제
+        validation_path = os.path.join(MULTI_HEAD_MODEL_PATH, MULTI_HEAD_VALIDATION_NAME)
+        if os.path.exists(validation_path):
+            os.remove(validation_path)
+        model.save_pretrained(MULTI_HEAD_MODEL_PATH)
+        print(f"\n변환 완료! '{MULTI_HEAD_MODEL_PATH}' 폴더에 저장되었습니다.")
+        print("--compare로 검증을 통과해야 파이프라인에서 사용됩니다.")
@@ -0,0 +1,249 @@
+"""
+전문가 학습용 전처리 데이터셋 캐시
+- 이미지 검증(열기/디코딩)과 리사이즈는 빌드할 때 한 번만 수행
+- 리사이즈된 uint8 픽셀을 샤드별 .npy(메모리 맵)에, 인코딩된 라벨을 labels.npy에 저장
+- 학습 시에는 샤드를 메모리 맵으로 읽기만 함 → 여러 워커 + pinned memory로 GPU에 uint8 전송,
+  rescale/normalize는 device에서 BatchPreprocessor.normalize로 처리 (HF 처리기와 같은 값)
+- 깨진 이미지는 빌드 때 목록(meta.json의 skipped)으로 남기고 제외 (학습 중 다음 인덱스로 넘어가지 않음)
+
+사용법:
+    python dataset_cache.py --category 상의      # 캐시 빌드 (CSV나 이미지 파일이 바뀌었을 때만 다시 만듦)
+    python dataset_cache.py --category 상의 --force
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from PIL import Image
+from tqdm import tqdm
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CURRENT_DIR)
+
+from transformers import AutoImageProcessor
+from preprocessing import BatchPreprocessor
+
+CACHE_DIR = os.path.join(CURRENT_DIR, 'dataset_cache')
+SHARD_SIZE = 1024  # 샤드당 이미지 수 (224x224 기준 약 150MB)
+DECODE_WORKERS = min(8, os.cpu_count() or 1)
+CACHE_VERSION = 1
+
+
+def cache_dir_for(category):
+    return os.path.join(CACHE_DIR, category)
+
+
+def image_dir_digest(image_dir):
+    """
+    이미지 폴더의 파일 목록 + 파일별 크기/수정시각 해시
+    - 폴더 mtime은 파일을 덮어쓰거나 하위 폴더 안에서 바뀐 경우를 알 수 없으므로 파일마다 확인
+    반환: (파일 수, 해시)
+    """
+    if not os.path.isdir(image_dir):
+        return 0, None
+    entries = []
+    for root, _, names in os.walk(image_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            entries.append(f"{os.path.relpath(path, image_dir)}:{stat.st_size}:{stat.st_mtime_ns}")
+    digest = hashlib.sha1()
+    for entry in sorted(entries):
+        digest.update(entry.encode('utf-8'))
+        digest.update(b'\n')
+    return len(entries), digest.hexdigest()
+
+
+def source_signature(csv_path, image_dir):
+    """CSV 내용/이미지 파일이 바뀌면 달라지는 값 (캐시 최신 여부 판단용)"""
+    csv_stat = os.stat(csv_path)
+    image_count, image_digest = image_dir_digest(image_dir)
+    return {
+        'csv_size': csv_stat.st_size,
+        'csv_mtime': csv_stat.st_mtime_ns,
+        'image_count': image_count,
+        'image_digest': image_digest,
+    }
+
+
+def load_meta(cache_dir):
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def split_signature(split):
+    """캐시에 들어간 샘플 범위 (학습용/평가용 분할 비율이 바뀌면 다시 빌드)"""
+    from train_ViT_clothes_detail import HOLDOUT_PERCENT
+
+    return None if split is None else f"{split}:{HOLDOUT_PERCENT}"
+
+
+def is_cache_fresh(cache_dir, csv_path, image_dir, processor, split=None):
+    meta = load_meta(cache_dir)
+    if meta is None or meta.get('version') != CACHE_VERSION or meta.get('split') != split_signature(split):
+        return False
+    preprocess = BatchPreprocessor(processor)
+    return meta['source'] == source_signature(csv_path, image_dir) and tuple(meta['size']) == preprocess.size
+
+
+def build_dataset_cache(csv_path, image_dir, processor, cache_dir, shard_size=SHARD_SIZE, workers=DECODE_WORKERS,
+                        split=None):
+    """
+    CSV + 이미지 폴더 → 샤드 캐시
+    - 라벨 인코딩은 SpecialistDataset과 동일 (저장되는 label_maps가 기존 학습과 같음)
+    - split='train'이면 평가용(held-out) 샘플은 빼고 저장
+    - 이미지 디코딩/리사이즈는 스레드 풀에서 병렬 처리
+    """
+    from train_ViT_clothes_detail import SpecialistDataset
+
+    dataset = SpecialistDataset(csv_path, image_dir, processor, split=split)
+    preprocess = BatchPreprocessor(processor)
+    width, height = preprocess.size
+    image_names = dataset.df['image_name'].tolist()
+    labels = np.stack(
+        [dataset.encoded_labels[col].to_numpy().astype(np.int64) for col in dataset.label_columns], axis=1
+    ) if dataset.label_columns else np.zeros((len(image_names), 0), dtype=np.int64)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for name in os.listdir(cache_dir):
+        if name.startswith('shard_') or name in ('labels.npy', 'meta.json'):
+            os.remove(os.path.join(cache_dir, name))
+
+    def load(name):
+        try:
+            with Image.open(os.path.join(image_dir, name)) as image:
+                return preprocess.to_resized_array(image.convert("RGB"))
+        except (FileNotFoundError, OSError):
+            return None
+
+    start = time.perf_counter()
+    shards, kept_rows, skipped = [], [], []
+    shard, shard_fill = None, 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for row, array in enumerate(tqdm(executor.map(load, image_names), total=len(image_names), desc="캐시 빌드 중")):
+            if array is None:
+                skipped.append(image_names[row])
+                continue
+            if shard is None:
+                remaining = len(image_names) - row
+                shard_path = os.path.join(cache_dir, f"shard_{len(shards):04d}.npy")
+                shard = np.lib.format.open_memmap(
+                    shard_path, mode='w+', dtype=np.uint8, shape=(min(shard_size, remaining), height, width, 3)
+                )
+                shards.append([os.path.basename(shard_path), 0])
+                shard_fill = 0
+            shard[shard_fill] = array
+            shard_fill += 1
+            shards[-1][1] = shard_fill
+            kept_rows.append(row)
+            if shard_fill == len(shard):
+                shard.flush()
+                shard = None
+    if shard is not None:
+        shard.flush()
+        del shard
+
+    np.save(os.path.join(cache_dir, 'labels.npy'), labels[kept_rows])
+    meta = {
+        'version': CACHE_VERSION,
+        'source': source_signature(csv_path, image_dir),
+        'size': [width, height],
+        'split': split_signature(split),
+        'label_columns': dataset.label_columns,
+        'label_maps': {col: [dataset.label_maps[col][i] for i in range(len(dataset.label_maps[col]))]
+                       for col in dataset.label_columns},
+        'shards': shards,
+        'num_samples': len(kept_rows),
+        'skipped': skipped,
+    }
+    with open(os.path.join(cache_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    elapsed = time.perf_counter() - start
+    print(f"-> 캐시 빌드 완료: {len(kept_rows)}장 / 샤드 {len(shards)}개 ({elapsed:.1f}초)")
+    if skipped:
+        print(f"-> 열 수 없는 이미지 {len(skipped)}장 제외: {skipped[:5]}{' ...' if len(skipped) > 5 else ''}")
+    return meta
+
+
+def ensure_dataset_cache(csv_path, image_dir, processor, cache_dir, force=False, split=None):
+    """캐시가 최신이면 재사용, 아니면 새로 빌드"""
+    if not force and is_cache_fresh(cache_dir, csv_path, image_dir, processor, split):
+        print(f"-> 데이터셋 캐시 재사용: {cache_dir}")
+        return load_meta(cache_dir)
+    return build_dataset_cache(csv_path, image_dir, processor, cache_dir, split=split)
+
+
+class CachedSpecialistDataset(Dataset):
+    """
+    SpecialistDataset 대체 (캐시에서 읽기만 함)
+    - pixel_values는 리사이즈된 uint8 (H, W, 3) → 학습 루프에서 BatchPreprocessor.normalize 적용
+    - 샤드 메모리 맵은 워커 프로세스마다 처음 접근할 때 엶 (워커로 배열이 복사되지 않음)
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        meta = load_meta(cache_dir)
+        if meta is None:
+            raise FileNotFoundError(f"데이터셋 캐시가 없습니다: {cache_dir} (dataset_cache.py로 먼저 빌드하세요)")
+        self.label_columns = meta['label_columns']
+        self.label_maps = {col: dict(enumerate(names)) for col, names in meta['label_maps'].items()}
+        self.shard_names = [name for name, _ in meta['shards']]
+        self.offsets = np.cumsum([0] + [count for _, count in meta['shards']]).tolist()
+        self.labels = np.load(os.path.join(cache_dir, 'labels.npy'))
+        self._shards = None
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def _shard(self, index):
+        if self._shards is None:
+            self._shards = [None] * len(self.shard_names)
+        if self._shards[index] is None:
+            self._shards[index] = np.load(os.path.join(self.cache_dir, self.shard_names[index]), mmap_mode='r')
+        return self._shards[index]
+
+    def __getstate__(self):
+        # DataLoader 워커로 넘길 때 열린 메모리 맵은 빼고 보냄
+        state = self.__dict__.copy()
+        state['_shards'] = None
+        return state
+
+    def __getitem__(self, idx):
+        shard_index = bisect.bisect_right(self.offsets, idx) - 1
+        pixels = self._shard(shard_index)[idx - self.offsets[shard_index]]
+        item = {"pixel_values": torch.from_numpy(np.array(pixels))}
+        for i, col in enumerate(self.label_columns):
+            item[f"label_{col}"] = torch.tensor(self.labels[idx, i], dtype=torch.long)
+        return item
+
+
+def main():
+    from train_ViT_clothes_detail import MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="전문가 학습용 데이터셋 캐시 빌드")
+    parser.add_argument("--category", required=True, choices=['상의', '하의', '아우터', '원피스'])
+    parser.add_argument("--data-dir", default=os.path.join(CURRENT_DIR, 'specialist_data'))
+    parser.add_argument("--force", action='store_true', help="최신이어도 다시 빌드")
+    args = parser.parse_args()
+
+    processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
+    ensure_dataset_cache(
+        os.path.join(args.data_dir, f"{args.category}_metadata.csv"),
+        os.path.join(args.data_dir, args.category),
+        processor, cache_dir_for(args.category), force=args.force, split='train',
+    )
+
+
+if __name__ == '__main__':
+    main()
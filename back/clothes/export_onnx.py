@@ -0,0 +1,287 @@
+"""
+YOLO 분할 모델 + ViT 분류기(Router/Specialist/멀티헤드) → ONNX / int8 동적 양자화 변환 및 비교 도구
+- GPU 없는 분석 서버에서 INFERENCE_BACKEND=onnx 또는 onnx-int8 로 onnxruntime CPU 추론
+- 변환 결과는 onnx_models/ 폴더에 {이름}.onnx, {이름}.int8.onnx 로 저장
+
+사용법:
+    # 1. 변환 (fp32 ONNX + int8 동적 양자화)
+    python export_onnx.py
+
+    # 2. 정확도 일치 여부 + 단계별 지연시간 비교 (전문가 학습에서 빠진 held-out 분할 기준, HOLDOUT_PERCENT)
+    python export_onnx.py --report --max-samples 200 --yolo-images ./holdout_images
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+from torch.utils.data import Subset
+from tqdm import tqdm
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CURRENT_DIR)
+
+from ultralytics import YOLO
+from train_ViT_clothes_detail import SpecialistDataset, trained_without_holdout
+from onnx_runtime import ONNX_INPUT_NAME, onnx_model_path, onnx_meta_path
+from final_pipeline import (
+    YOLO_MODEL_PATH, ROUTER_MODEL_PATH, SPECIALIST_MODEL_PATHS, MULTI_HEAD_MODEL_PATH, ONNX_MODEL_DIR,
+    load_processor, load_router, load_specialist, load_multi_head, load_all_models,
+    classify_categories, get_specialist, classify_attributes,
+)
+
+BASE_DATA_DIR = os.path.join(CURRENT_DIR, 'specialist_data')
+OPSET_VERSION = 17
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+class RouterExport(nn.Module):
+    """pixel_values → logits"""
+
+    def __init__(self, router):
+        super().__init__()
+        self.router = router
+
+    def forward(self, pixel_values):
+        return self.router(pixel_values=pixel_values).logits
+
+
+class SpecialistExport(nn.Module):
+    """pixel_values → 속성별 로짓 튜플 + CLS 특징 (속성 순서는 {이름}.json에 저장)"""
+
+    def __init__(self, specialist, attributes):
+        super().__init__()
+        self.specialist = specialist
+        self.attributes = attributes
+
+    def forward(self, pixel_values):
+        logits, features = self.specialist(pixel_values, return_features=True)
+        return tuple(logits[col] for col in self.attributes) + (features,)
+
+
+def export_vit(module, name, output_names):
+    """ViT 계열 모듈을 배치 크기 가변 ONNX로 저장"""
+    path = onnx_model_path(ONNX_MODEL_DIR, name)
+    dummy = torch.randn(1, 3, 224, 224)
+    dynamic_axes = {ONNX_INPUT_NAME: {0: 'batch'}}
+    dynamic_axes.update({output: {0: 'batch'} for output in output_names})
+    with torch.no_grad():
+        torch.onnx.export(
+            module.eval(), (dummy,), path,
+            input_names=[ONNX_INPUT_NAME], output_names=output_names,
+            dynamic_axes=dynamic_axes, opset_version=OPSET_VERSION
+        )
+    print(f"ONNX 저장: {path}")
+    return path
+
+
+def quantize(name, op_types, weight_type):
+    """가중치 int8 동적 양자화 (활성값은 실행 시 양자화, 보정 데이터 불필요)"""
+    import onnx
+    from onnxruntime.quantization import quantize_dynamic
+
+    source = onnx_model_path(ONNX_MODEL_DIR, name)
+    target = onnx_model_path(ONNX_MODEL_DIR, name, int8=True)
+    quantize_dynamic(source, target, op_types_to_quantize=op_types, weight_type=weight_type)
+
+    # ultralytics는 ONNX 메타데이터(클래스 이름, 입력 크기 등)를 읽으므로 원본 값을 그대로 복사
+    metadata = {prop.key: prop.value for prop in onnx.load(source, load_external_data=False).metadata_props}
+    if metadata:
+        model = onnx.load(target)
+        onnx.helper.set_model_props(model, metadata)
+        onnx.save(model, target)
+
+    print(f"int8 저장: {target} ({os.path.getsize(source) / 1024 ** 2:.1f}MB → {os.path.getsize(target) / 1024 ** 2:.1f}MB)")
+    return target
+
+
+def export_all():
+    from onnxruntime.quantization import QuantType
+
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+    cpu = torch.device("cpu")
+    # ViT는 MatMul 가중치만 양자화 (LayerNorm/Softmax는 fp32 유지)
+    vit_ops = ['MatMul', 'Gemm']
+
+    # 1. YOLO 분할 모델 (ultralytics 내장 export, 입력 크기 가변 → 기존과 같은 letterbox 사용)
+    exported = YOLO(YOLO_MODEL_PATH).export(format='onnx', dynamic=True, simplify=True, opset=OPSET_VERSION)
+    shutil.move(exported, onnx_model_path(ONNX_MODEL_DIR, 'yolo'))
+    print(f"ONNX 저장: {onnx_model_path(ONNX_MODEL_DIR, 'yolo')}")
+    # onnxruntime CPU의 ConvInteger는 uint8 가중치만 지원
+    quantize('yolo', ['Conv', 'MatMul'], QuantType.QUInt8)
+
+    # 2. 멀티헤드가 있으면 백본 + Router 헤드만 변환 (전문가 헤드는 실행 시 PyTorch 선형층)
+    if os.path.isdir(MULTI_HEAD_MODEL_PATH):
+        export_vit(load_multi_head(cpu), 'multi_head', ['features', 'logits'])
+        quantize('multi_head', vit_ops, QuantType.QInt8)
+
+    # 3. Router + 카테고리별 전문가
+    if os.path.isdir(ROUTER_MODEL_PATH):
+        export_vit(RouterExport(load_router(cpu)), 'router', ['logits'])
+        quantize('router', vit_ops, QuantType.QInt8)
+
+    for category, path in SPECIALIST_MODEL_PATHS.items():
+        if not os.path.isdir(path):
+            print(f"-> '{category}' 전문가 모델 없음, 건너뜀")
+            continue
+        name = f"{category}_specialist"
+        specialist = load_specialist(category, cpu)
+        attributes = list(specialist['labels'].keys())
+        export_vit(SpecialistExport(specialist['model'], attributes), name,
+                   [f"logits_{i}" for i in range(len(attributes))] + ['features'])
+        with open(onnx_meta_path(ONNX_MODEL_DIR, name), 'w', encoding='utf-8') as f:
+            json.dump({'outputs': attributes}, f, ensure_ascii=False)
+        quantize(name, vit_ops, QuantType.QInt8)
+
+    print(f"\n변환 완료! '{ONNX_MODEL_DIR}' 폴더에 저장되었습니다.")
+
+
+def load_holdout(processor, data_dir, max_samples):
+    """
+    카테고리별 held-out 샘플 (전문가 학습에서 빠지는 split='holdout' 샘플 중 최대 max_samples개)
+    - 분할 정보(split.json) 없이 학습된 전문가 모델은 평가 샘플도 학습했을 수 있으므로 경고
+    """
+    datasets = {}
+    for category, model_path in SPECIALIST_MODEL_PATHS.items():
+        csv_path = os.path.join(data_dir, f"{category}_metadata.csv")
+        if not os.path.exists(csv_path):
+            continue
+        if os.path.isdir(model_path) and not trained_without_holdout(model_path):
+            print(f"[경고] '{category}' 전문가 모델이 held-out 분할 이전에 학습됨 → 정확도가 실제보다 높게 나올 수 있음 (재학습 권장)")
+        dataset = SpecialistDataset(csv_path, os.path.join(data_dir, category), processor, split='holdout')
+        if max_samples:
+            dataset = Subset(dataset, range(min(max_samples, len(dataset))))
+        datasets[category] = dataset
+    return datasets
+
+
+@torch.no_grad()
+def evaluate_classifiers(models, datasets):
+    """실제 파이프라인 함수로 Router/Specialist 예측 + 단계별 시간 측정"""
+    predictions = []
+    timings = {'router': 0.0, 'specialist': 0.0}
+    for category, dataset in datasets.items():
+        for item in tqdm(dataset, desc=f"[{models['backend']}] '{category}'"):
+            pixel_values = item['pixel_values'].unsqueeze(0).to(models['device'])
+
+            start = time.perf_counter()
+            predicted, features = classify_categories(models, pixel_values)
+            timings['router'] += time.perf_counter() - start
+
+            # 속성 정확도는 정답 카테고리의 전문가로 측정 (Router 오답과 분리)
+            specialist = get_specialist(models, category)
+            start = time.perf_counter()
+            outputs, _ = classify_attributes(models, specialist, category, pixel_values, features)
+            timings['specialist'] += time.perf_counter() - start
+
+            predictions.append({
+                'category': category,
+                'router': predicted[0],
+                'attributes': {col: logits.argmax(-1).item() for col, logits in outputs.items()},
+                'labels': {col: item[f'label_{col}'].item() for col in outputs},
+            })
+    return predictions, timings
+
+
+def evaluate_yolo(models, image_paths):
+    """이미지별 감지 박스 + YOLO 단계 시간"""
+    detections = []
+    elapsed = 0.0
+    for path in image_paths:
+        image = Image.open(path).convert("RGB")
+        start = time.perf_counter()
+        result = models['yolo'](image, verbose=False)[0]
+        elapsed += time.perf_counter() - start
+        detections.append(result.boxes.xyxy.cpu().numpy() if result.boxes is not None else np.zeros((0, 4)))
+    return detections, elapsed
+
+
+def box_iou(a, b):
+    x1, y1 = np.maximum(a[0], b[0]), np.maximum(a[1], b[1])
+    x2, y2 = np.minimum(a[2], b[2]), np.minimum(a[3], b[3])
+    inter = max(x2 - x1, 0) * max(y2 - y1, 0)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def yolo_agreement(reference, candidate):
+    """(감지 개수 일치율, 기준 박스별 최대 IoU 평균)"""
+    count_match = 0
+    ious = []
+    for ref_boxes, cand_boxes in zip(reference, candidate):
+        count_match += int(len(ref_boxes) == len(cand_boxes))
+        for box in ref_boxes:
+            ious.append(max((box_iou(box, other) for other in cand_boxes), default=0.0))
+    return count_match / max(len(reference), 1), float(np.mean(ious)) if ious else 1.0
+
+
+def report(data_dir, max_samples, yolo_dir, backends):
+    """torch 기준으로 ONNX 백엔드들의 정확도 일치율과 단계별 지연시간 비교"""
+    torch.set_grad_enabled(False)
+    datasets = load_holdout(load_processor(), data_dir, max_samples)
+    image_paths = []
+    if yolo_dir:
+        image_paths = sorted(
+            os.path.join(yolo_dir, name) for name in os.listdir(yolo_dir) if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    if not datasets and not image_paths:
+        print("비교할 데이터가 없습니다.")
+        return
+
+    results = {}
+    for backend in backends:
+        models = load_all_models(backend)
+        predictions, timings = evaluate_classifiers(models, datasets)
+        detections, yolo_time = evaluate_yolo(models, image_paths)
+        results[backend] = {'predictions': predictions, 'timings': timings,
+                            'detections': detections, 'yolo_time': yolo_time}
+        del models
+
+    reference = results[backends[0]]
+    n_items = len(reference['predictions'])
+    print("\n" + "=" * 90)
+    print(f"백엔드별 정확도 / {backends[0]} 대비 일치율 (held-out 샘플 {n_items}개, 이미지 {len(image_paths)}장)")
+    print("=" * 90)
+    print(f"{'':<12}{'Router 정확도':>14}{'속성 정확도':>12}{'Router 일치':>12}{'속성 일치':>12}"
+          f"{'YOLO 개수 일치':>14}{'YOLO IoU':>10}")
+    for backend in backends:
+        preds = results[backend]['predictions']
+        router_acc = sum(p['router'] == p['category'] for p in preds) / max(n_items, 1)
+        attr_total = sum(len(p['labels']) for p in preds)
+        attr_acc = sum(p['attributes'][c] == p['labels'][c] for p in preds for c in p['labels']) / max(attr_total, 1)
+        router_match = sum(p['router'] == r['router'] for p, r in zip(preds, reference['predictions'])) / max(n_items, 1)
+        attr_match = sum(
+            p['attributes'][c] == r['attributes'][c]
+            for p, r in zip(preds, reference['predictions']) for c in p['attributes']
+        ) / max(attr_total, 1)
+        count_match, mean_iou = yolo_agreement(reference['detections'], results[backend]['detections'])
+        print(f"{backend:<12}{router_acc:>14.2%}{attr_acc:>12.2%}{router_match:>12.2%}{attr_match:>12.2%}"
+              f"{count_match:>14.2%}{mean_iou:>10.3f}")
+
+    print("\n--- 단계별 지연시간 (ms) ---")
+    print(f"{'':<12}{'YOLO/이미지':>14}{'Router/아이템':>14}{'속성/아이템':>14}")
+    for backend in backends:
+        r = results[backend]
+        yolo_ms = r['yolo_time'] * 1000 / len(image_paths) if image_paths else float('nan')
+        print(f"{backend:<12}{yolo_ms:>14.2f}{r['timings']['router'] * 1000 / max(n_items, 1):>14.2f}"
+              f"{r['timings']['specialist'] * 1000 / max(n_items, 1):>14.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="ONNX / int8 변환 및 정확도·지연시간 비교 도구")
+    parser.add_argument("--report", action="store_true", help="변환된 모델과 PyTorch 모델 비교 (변환은 하지 않음)")
+    parser.add_argument("--data-dir", type=str, default=BASE_DATA_DIR, help="held-out 분류 데이터 폴더 ({카테고리}_metadata.csv)")
+    parser.add_argument("--max-samples", type=int, default=200, help="카테고리별 최대 held-out 샘플 수 (HOLDOUT_PERCENT 해시 분할로 학습에서 빠진 샘플, 0이면 전체)")
+    parser.add_argument("--yolo-images", type=str, default=None, help="YOLO 비교용 이미지 폴더")
+    parser.add_argument("--backends", type=str, default="torch,onnx,onnx-int8", help="비교할 백엔드 (첫 번째가 기준)")
+    args = parser.parse_args()
+
+    if args.report:
+        report(args.data_dir, args.max_samples, args.yolo_images, args.backends.split(','))
+    else:
+        export_all()
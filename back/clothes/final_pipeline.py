@@ -1,8 +1,17 @@
 import argparse
-from PIL import Image
+import base64
+import io
+import json
+from PIL import Image, UnidentifiedImageError
 import torch
 import numpy as np
+import cv2
 import os
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from ultralytics import YOLO
 import sys
 
@@ -13,7 +22,14 @@ sys.path.insert(0, CURRENT_DIR)
 # --- 각 전문가 모델의 클래스와 예측 함수 불러오기 ---
 # from train_ViT_classifier import RouterDataset, AutoModelForImageClassification
 from train_ViT_clothes_detail import SpecialistDataset, SpecialistClassifier
-from transformers import AutoImageProcessor, AutoModelForImageClassification
+from multi_head_classifier import load_multi_head_model
+from micro_batcher import MicroBatcher
+from model_loader import load_state_dict, timed, print_timings
+from specialist_cache import SpecialistLRU
+from preprocessing import BatchPreprocessor
+from cascade import CascadeStats, load_category_map, yolo_hints
+from onnx_runtime import OnnxRouter, onnx_model_path, load_onnx_specialist, load_onnx_multi_head
+from transformers import AutoConfig, AutoImageProcessor, AutoModelForImageClassification
 # ---------------------------------------------------
 
 
@@ -26,125 +42,510 @@ SPECIALIST_MODEL_PATHS = {
     '아우터': os.path.join(CURRENT_DIR, '아우터_specialist_model'),
     '원피스': os.path.join(CURRENT_DIR, '원피스_specialist_model'),
 }
+# 공유 백본 멀티헤드 모델 (convert_multi_head.py로 생성)
+MULTI_HEAD_MODEL_PATH = os.path.join(CURRENT_DIR, 'multi_head_model')
+MULTI_HEAD_VALIDATION_NAME = 'validation.json'  # convert_multi_head.py --compare 결과
+# auto: 정확도 검증(validation.json)을 통과한 경우만 사용 / on: 항상 사용 / off: 사용 안 함
+MULTI_HEAD_MODEL = os.getenv("MULTI_HEAD_MODEL", "auto")
 BASE_TRANSFORMER = "google/vit-base-patch16-224-in21k"
+# 모델 로딩 병렬 스레드 수
+MODEL_LOAD_WORKERS = int(os.getenv("MODEL_LOAD_WORKERS", "4"))
+# 전문가 모델 지연 로딩 (처음 쓰는 카테고리에서 로드, 메모리 한도 LRU)
+SPECIALIST_LAZY_LOAD = os.getenv("SPECIALIST_LAZY_LOAD", "1") == "1"
+SPECIALIST_MEMORY_BUDGET_MB = float(os.getenv("SPECIALIST_MEMORY_BUDGET_MB", "0"))  # 0이면 무제한
+SPECIALIST_PRELOAD = os.getenv("SPECIALIST_PRELOAD", "usage")  # usage / all / none
+SPECIALIST_USAGE_PATH = os.path.join(CURRENT_DIR, 'specialist_usage.json')
+# 추론 백엔드: torch(기본) / onnx / onnx-int8 (onnx 계열은 onnxruntime CPU, export_onnx.py로 변환 필요)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_MODEL_DIR = os.path.join(CURRENT_DIR, 'onnx_models')
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0이면 onnxruntime 기본값
+# YOLO 클래스 기반 cascade: 신뢰도가 높으면 Router 생략 (Router + 전문가 모델 구조에서만 적용)
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "1") == "1"
+CASCADE_YOLO_CONFIDENCE = float(os.getenv("CASCADE_YOLO_CONFIDENCE", "0.85"))
+# 확실한 옷의 전문가 입력 해상도 (0이면 원해상도, 예: 160) - 저해상도로 분석한 옷은 중복 검사용 임베딩 없음
+CASCADE_LOW_RES_SIZE = int(os.getenv("CASCADE_LOW_RES_SIZE", "0"))
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))  # Router/원해상도로 다시 돌려서 비교할 비율 (측정만, 결과는 그대로)
+YOLO_CATEGORY_MAP_PATH = os.path.join(CURRENT_DIR, 'yolo_category_map.json')
+# 전처리/후처리 방식이 바뀌면 올려서 분석 결과 캐시를 무효화
+PIPELINE_VERSION = 4
 # -------------------------------------
 
 
-def load_all_models():
-    """모든 AI 모델들을 미리 메모리에 로드하는 함수"""
-    print("모든 AI 모델을 로딩합니다...")
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    
-    # 1. YOLO 모델 로드
-    yolo_model = YOLO(YOLO_MODEL_PATH)
-    
-    # 2. 1차 분류기(Router) 모델 로드
-    router_model = AutoModelForImageClassification.from_pretrained(ROUTER_MODEL_PATH).to(device)
-    
-    # 3. 2차 분류기(Specialist) 모델들 로드
-    specialist_models = {}
-    for category, path in SPECIALIST_MODEL_PATHS.items():
-        if os.path.isdir(path):
-            # label_maps = torch.load(os.path.join(path, 'label_maps.pth'))
-            # model = SpecialistClassifier(label_maps).to(device)
-            # model.load_state_dict(torch.load(os.path.join(path, 'pytorch_model.bin')))
-
-            label_maps = torch.load(os.path.join(path, 'label_maps.pth'), map_location=device)
-            model = SpecialistClassifier(label_maps).to(device)
-            model.load_state_dict(torch.load(os.path.join(path, 'pytorch_model.bin'), map_location=device))
-
-            model.eval()
-            specialist_models[category] = {'model': model, 'labels': label_maps}
-    
-    print("모든 모델 로딩 완료!")
-    return {
-        "device": device,
-        "yolo": yolo_model,
-        "router": router_model,
-        "specialists": specialist_models,
-        "processor": AutoImageProcessor.from_pretrained(BASE_TRANSFORMER)
-    }
+def get_model_version(backend=INFERENCE_BACKEND):
+    """
+    현재 모델 가중치의 버전 문자열
+    - 가중치 파일의 경로/크기/수정시각 + PIPELINE_VERSION + 추론 백엔드로 계산
+    - 가중치나 백엔드(int8 양자화 등)를 바꾸면 값이 바뀌므로 분석 결과 캐시 무효화에 사용
+    """
+    paths = [YOLO_MODEL_PATH, MULTI_HEAD_MODEL_PATH, ROUTER_MODEL_PATH] + list(SPECIALIST_MODEL_PATHS.values())
+    if backend != "torch":
+        paths.append(ONNX_MODEL_DIR)
+    digest = hashlib.sha1(f"pipeline={PIPELINE_VERSION};backend={backend};{cascade_signature()}".encode())
+    for path in paths:
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+        for file_path in files:
+            stat = os.stat(file_path)
+            digest.update(f"{os.path.relpath(file_path, CURRENT_DIR)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def cascade_signature():
+    """결과에 영향을 주는 cascade 설정 (분석 캐시 버전에 포함)"""
+    if not CASCADE_ENABLED:
+        return "cascade=off"
+    map_mtime = os.path.getmtime(YOLO_CATEGORY_MAP_PATH) if os.path.exists(YOLO_CATEGORY_MAP_PATH) else 0
+    return f"cascade={CASCADE_YOLO_CONFIDENCE}:{CASCADE_LOW_RES_SIZE}:{map_mtime}"
+
+
+def load_processor():
+    """ViT 전처리기 로드 (로컬 캐시 우선, 없을 때만 다운로드)"""
+    try:
+        return AutoImageProcessor.from_pretrained(BASE_TRANSFORMER, local_files_only=True)
+    except OSError:
+        return AutoImageProcessor.from_pretrained(BASE_TRANSFORMER)
+
+def is_onnx_backend(backend):
+    return backend in ("onnx", "onnx-int8")
+
+def load_yolo(backend="torch"):
+    """YOLO 분할 모델 (onnx 백엔드면 ultralytics가 onnxruntime으로 실행)"""
+    if is_onnx_backend(backend):
+        return YOLO(onnx_model_path(ONNX_MODEL_DIR, 'yolo', backend == "onnx-int8"), task='segment')
+    return YOLO(YOLO_MODEL_PATH)
+
+def load_router(device, backend="torch"):
+    """1차 분류기(Router)"""
+    if is_onnx_backend(backend):
+        config = AutoConfig.from_pretrained(ROUTER_MODEL_PATH)
+        return OnnxRouter(onnx_model_path(ONNX_MODEL_DIR, 'router', backend == "onnx-int8"), config, ONNX_THREADS)
+    return AutoModelForImageClassification.from_pretrained(ROUTER_MODEL_PATH).to(device).eval()
+
+def load_multi_head(device, backend="torch"):
+    """공유 백본 멀티헤드 모델"""
+    if is_onnx_backend(backend):
+        return load_onnx_multi_head(ONNX_MODEL_DIR, MULTI_HEAD_MODEL_PATH, backend == "onnx-int8", ONNX_THREADS)
+    return load_multi_head_model(MULTI_HEAD_MODEL_PATH, device)
+
+def load_specialist(category, device, backend="torch"):
+    """
+    전문가 모델 1개 로드
+    - 저장된 config.json으로 구조만 만들고 (기본 ViT 사전학습 가중치 다운로드/로드 생략)
+    - safetensors가 있으면 mmap으로 가중치 로드
+    - onnx 백엔드면 변환된 ONNX 세션 사용
+    """
+    path = SPECIALIST_MODEL_PATHS[category]
+    label_maps = torch.load(os.path.join(path, 'label_maps.pth'), map_location='cpu')
+    if is_onnx_backend(backend):
+        model = load_onnx_specialist(ONNX_MODEL_DIR, f"{category}_specialist", backend == "onnx-int8", ONNX_THREADS)
+        return {'model': model, 'labels': label_maps}
+    config = AutoConfig.from_pretrained(path)
+    model = SpecialistClassifier(label_maps, config=config)
+    model.load_state_dict(load_state_dict(path, 'cpu'))
+    model.to(device)
+    model.eval()
+    return {'model': model, 'labels': label_maps}
 
-def run_full_pipeline(models, image_path):
-    """AI 서비스의 전체 파이프라인을 실행합니다."""
+def should_use_multi_head():
+    """멀티헤드 모델 사용 여부 (MULTI_HEAD_MODEL 설정 + 기록된 정확도 검증)"""
+    if MULTI_HEAD_MODEL == "off" or not os.path.isdir(MULTI_HEAD_MODEL_PATH):
+        return False
+    if MULTI_HEAD_MODEL == "on":
+        return True
+    validation_path = os.path.join(MULTI_HEAD_MODEL_PATH, MULTI_HEAD_VALIDATION_NAME)
+    if os.path.exists(validation_path):
+        with open(validation_path, 'r', encoding='utf-8') as f:
+            if json.load(f).get('passed'):
+                return True
+    print("멀티헤드 모델이 정확도 검증을 통과하지 않아 기존 Router + Specialist를 사용합니다. "
+          "(convert_multi_head.py --compare 또는 MULTI_HEAD_MODEL=on)")
+    return False
+
+def load_all_models(backend=None):
+    """
+    모든 AI 모델들을 미리 메모리에 로드하는 함수
+    - 서로 독립적인 모델(YOLO, 전처리기, Router/멀티헤드, 전문가들)을 병렬로 로드
+    - 모델별 로딩 시간을 출력하고 models['load_timings']에 기록
+    - backend: torch / onnx / onnx-int8 (None이면 INFERENCE_BACKEND 환경변수)
+    """
+    backend = backend or INFERENCE_BACKEND
+    print(f"모든 AI 모델을 로딩합니다... (백엔드: {backend})")
+    if is_onnx_backend(backend):
+        device = torch.device("cpu")
+    else:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    timings = {}
+    start = time.perf_counter()
+
+    use_multi_head = should_use_multi_head()
+
+    with ThreadPoolExecutor(max_workers=MODEL_LOAD_WORKERS, thread_name_prefix="model-loader") as executor:
+        # 1. YOLO 모델, 전처리기
+        yolo_future = executor.submit(timed, "yolo", timings, load_yolo, backend)
+        processor_future = executor.submit(timed, "processor", timings, load_processor)
+
+        # 2. 공유 백본 멀티헤드 모델이 있으면 ViT 1개로 Router + 모든 Specialist 처리
+        if use_multi_head:
+            multi_head_future = executor.submit(
+                timed, "multi_head", timings, load_multi_head, device, backend)
+            specialists = None
+            specialist_futures = {}
+        else:
+            # 3. 1차 분류기(Router), 2차 분류기(Specialist) 모델들
+            router_future = executor.submit(timed, "router", timings, load_router, device, backend)
+            available = [category for category, path in SPECIALIST_MODEL_PATHS.items() if os.path.isdir(path)]
+            if SPECIALIST_LAZY_LOAD:
+                # 사용 통계 기준으로 일부만 미리 로드, 나머지는 첫 사용 시 로드
+                specialists = SpecialistLRU(
+                    lambda category: load_specialist(category, device, backend),
+                    available,
+                    memory_budget_mb=SPECIALIST_MEMORY_BUDGET_MB,
+                    usage_path=SPECIALIST_USAGE_PATH
+                )
+                preload_future = executor.submit(timed, "specialist:preload", timings, specialists.preload, SPECIALIST_PRELOAD)
+                specialist_futures = {}
+            else:
+                specialists = None
+                specialist_futures = {
+                    category: executor.submit(timed, f"specialist:{category}", timings, load_specialist, category, device, backend)
+                    for category in available
+                }
+
+        if not use_multi_head and SPECIALIST_LAZY_LOAD:
+            preloaded = preload_future.result()
+            print(f"전문가 모델 미리 로드: {preloaded if preloaded else '없음 (첫 사용 시 로드)'}")
+
+        models = {
+            "version": get_model_version(backend),
+            "backend": backend,
+            "device": device,
+            "yolo": yolo_future.result(),
+            "yolo_lock": threading.Lock(),  # YOLO predictor는 스레드 안전하지 않음
+            "multi_head": multi_head_future.result() if use_multi_head else None,
+            "router": None if use_multi_head else router_future.result(),
+            "specialists": specialists if specialists is not None else {
+                category: future.result() for category, future in specialist_futures.items()
+            },
+            "processor": processor_future.result()
+        }
+        # 추론용 배치 전처리 (HF 처리기와 같은 설정, 벡터화된 rescale/normalize)
+        models["preprocess"] = BatchPreprocessor(models["processor"])
+        # 멀티헤드는 Router가 공유 특징 위의 선형층뿐이라 생략해도 이득이 없음
+        models["cascade"] = None
+        if CASCADE_ENABLED and not use_multi_head:
+            category_map = load_category_map(
+                YOLO_CATEGORY_MAP_PATH, set(models["router"].config.id2label.values()))
+            if category_map:
+                models["cascade"] = {"category_map": category_map, "stats": CascadeStats()}
+                print(f"YOLO cascade 활성화 (신뢰도 ≥ {CASCADE_YOLO_CONFIDENCE}, 매핑 클래스 {len(category_map)}개)")
+
+    total = time.perf_counter() - start
+    models["load_timings"] = dict(timings, total=total)
+    print_timings(timings, total)
+    print("공유 백본 멀티헤드 모델 로딩 완료!" if use_multi_head else "모든 모델 로딩 완료!")
+    return models
+
+def extract_garment_crops(image_array, yolo_result):
+    """
+    YOLO 박스로 옷 영역만 먼저 잘라낸 뒤, 잘라낸 해상도에서 마스크를 한 번에 적용
+    - 전체 크기 캔버스를 만들지 않으므로 메모리 복사가 옷 크기만큼만 발생
+    - 분류기에 배경이 대부분인 이미지 대신 옷에 꽉 맞는 이미지가 들어감
+    """
+    height, width = image_array.shape[:2]
+    boxes = yolo_result.boxes.xyxy.cpu().numpy()
+    masks = yolo_result.masks.data
+
+    # 마스크는 letterbox된 추론 해상도 → 원본 좌표와의 변환 계수 (ultralytics scale_image와 동일)
+    mask_height, mask_width = masks.shape[1:]
+    gain = min(mask_height / height, mask_width / width)
+    pad_x = (mask_width - width * gain) / 2
+    pad_y = (mask_height - height * gain) / 2
+
+    crops = []
+    for box, mask in zip(boxes, masks):
+        x1 = min(max(int(np.floor(box[0])), 0), width - 1)
+        y1 = min(max(int(np.floor(box[1])), 0), height - 1)
+        x2 = max(min(int(np.ceil(box[2])), width), x1 + 1)
+        y2 = max(min(int(np.ceil(box[3])), height), y1 + 1)
+
+        # 박스에 해당하는 마스크 영역만 CPU로 가져와서 잘라낸 크기로 리사이즈
+        mx1 = min(max(int(x1 * gain + pad_x), 0), mask_width - 1)
+        my1 = min(max(int(y1 * gain + pad_y), 0), mask_height - 1)
+        mx2 = max(min(int(np.ceil(x2 * gain + pad_x)), mask_width), mx1 + 1)
+        my2 = max(min(int(np.ceil(y2 * gain + pad_y)), mask_height), my1 + 1)
+        mask_crop = mask[my1:my2, mx1:mx2].cpu().numpy().astype(np.uint8)
+        mask_crop = cv2.resize(mask_crop, (x2 - x1, y2 - y1), interpolation=cv2.INTER_NEAREST)
+
+        region = image_array[y1:y2, x1:x2]
+        crops.append(Image.fromarray(region * mask_crop[..., None]))
+    return crops
+
+def classify_categories(models, pixel_values):
+    """1차 분류 (배치): ([카테고리 이름, ...], 공유 CLS 특징 또는 None) 반환"""
+    multi_head = models.get('multi_head')
+    with torch.no_grad():
+        if multi_head is not None:
+            features, logits = multi_head(pixel_values)
+            id2label = multi_head.id2label
+        else:
+            features = None
+            logits = models['router'](pixel_values=pixel_values).logits
+            id2label = models['router'].config.id2label
+    return [id2label[category_id] for category_id in logits.argmax(-1).tolist()], features
+
+def get_specialist(models, category):
+    """
+    카테고리 전문가 {'model': ..., 'labels': ...} (전문가가 없으면 None)
+    - 멀티헤드는 별도 모델 없이 공유 헤드를 사용하므로 model이 None
+    - 지연 로딩(SpecialistLRU)이면 여기서 처음 로드됨
+    """
+    multi_head = models.get('multi_head')
+    if multi_head is not None:
+        if not multi_head.has_specialist(category):
+            return None
+        return {'model': None, 'labels': multi_head.label_maps[category]}
+    return models['specialists'].get(category)
+
+def classify_attributes(models, specialist, category, pixel_values, features=None):
+    """
+    2차 분류 (배치): (속성별 로짓 딕셔너리, CLS 특징 또는 None)
+    - 멀티헤드는 1차 분류의 특징을 재사용 (ViT 재실행 없음)
+    - 전문가 모델은 속성 분류에 쓴 CLS 특징을 함께 반환 (옷장 임베딩용)
+    """
+    with torch.no_grad():
+        if features is not None:
+            return models['multi_head'].classify_attributes(features, category), features
+        return specialist['model'](pixel_values, return_features=True)
+
+def encode_embedding(features):
+    """
+    CLS 특징 1개 → L2 정규화 float16 base64 문자열 (768차원 기준 약 2KB)
+    - 분석 결과 JSON에 담아 프론트를 거쳐 저장 요청으로 돌아옴
+    """
+    vector = torch.nn.functional.normalize(features.float(), dim=-1).cpu().numpy().astype(np.float16)
+    return base64.b64encode(vector.tobytes()).decode('ascii')
+
+def decode_attributes(outputs, specialist_labels, row):
+    """속성 로짓 배치에서 row번째 아이템의 상세 속성을 결과 형식으로 변환"""
+    details = {}
+    for attr, logits in outputs.items():
+        if attr == '스타일':
+            probabilities = torch.nn.functional.softmax(logits[row], dim=-1)
+            top3 = torch.topk(probabilities, 3)
+            details[attr] = [
+                {"name": specialist_labels[attr][style_id], "confidence": prob}
+                for prob, style_id in zip(top3.values.tolist(), top3.indices.tolist())
+            ]
+        else:
+            details[attr] = specialist_labels[attr][logits[row].argmax(-1).item()]
+    return details
+
+def get_yolo_hints(models, yolo_result):
+    """cascade가 켜져 있으면 박스별 (YOLO 카테고리, 신뢰도), 아니면 None"""
+    cascade = models.get('cascade')
+    if cascade is None:
+        return None
+    return yolo_hints(yolo_result, models['yolo'].names, cascade['category_map'])
+
+def route_with_cascade(models, pixel_values, hints):
+    """
+    1차 분류 cascade: YOLO가 확실한 옷은 YOLO 카테고리 사용, 나머지만 Router 배치 실행
+    - 확실한 옷 중 CASCADE_AUDIT_RATE 비율은 Router도 실행해서 일치율만 기록
+      (결과는 항상 cascade 결과 → 같은 이미지는 같은 결과, 분석 결과 캐시와 일치)
+    - 반환: (카테고리 리스트, YOLO로 결정된 인덱스 집합)
+    """
+    stats = models['cascade']['stats']
+    categories = [None] * len(hints)
+    confident = set()
+    for idx, (category, confidence) in enumerate(hints):
+        if category is not None and confidence >= CASCADE_YOLO_CONFIDENCE:
+            categories[idx] = category
+            confident.add(idx)
+
+    audited = [idx for idx in sorted(confident) if random.random() < CASCADE_AUDIT_RATE]
+    routed = [idx for idx in range(len(hints)) if idx not in confident] + audited
+    if routed:
+        index = torch.tensor(routed, device=pixel_values.device)
+        router_categories, _ = classify_categories(models, pixel_values[index])
+        for idx, category in zip(routed, router_categories):
+            if idx in confident:
+                stats.record_audit("router", int(category == categories[idx]))
+            else:
+                categories[idx] = category
+
+    stats.record(yolo=len(confident), router=len(hints) - len(confident))
+    return categories, confident
+
+def use_low_res(specialist):
+    """저해상도 입력은 PyTorch 전문가 모델에서만 (ONNX는 입력 크기 고정, 멀티헤드는 특징 재사용)"""
+    return CASCADE_LOW_RES_SIZE > 0 and isinstance(specialist['model'], torch.nn.Module)
+
+def classify_crops(models, crops, hints=None):
+    """
+    잘라낸 옷 이미지들을 배치로 분류
+    - 배치 전처리 1회, Router 1회, 카테고리별 Specialist 1회씩
+    - hints(박스별 YOLO 카테고리/신뢰도)가 있으면 cascade로 확실한 옷은 Router 생략
+    - 반환: 입력 순서대로 [{"main_category": ..., "details": {...}, "embedding": ...}, ...]
+    """
+    pixel_values = models['preprocess'](crops, models['device'])
+    if models.get('cascade') is not None and hints is not None:
+        categories, confident = route_with_cascade(models, pixel_values, hints)
+        features = None
+    else:
+        categories, features = classify_categories(models, pixel_values)
+        confident = set()
+
+    results = [{"main_category": category, "details": {}, "embedding": None} for category in categories]
+
+    # 카테고리별로 묶어서 전문가 모델을 그룹당 한 번만 실행
+    groups = {}
+    for idx, category in enumerate(categories):
+        groups.setdefault(category, []).append(idx)
+
+    for category, indices in groups.items():
+        specialist = get_specialist(models, category)
+        if specialist is None:
+            continue
+        # YOLO가 확실하다고 본 옷은 (설정 시) 저해상도 입력으로 전문가 실행
+        low_res = [idx for idx in indices if idx in confident] if use_low_res(specialist) else []
+        full_res = [idx for idx in indices if idx not in low_res]
+        for subset, size in ((full_res, None), (low_res, CASCADE_LOW_RES_SIZE)):
+            if not subset:
+                continue
+            index = torch.tensor(subset, device=pixel_values.device)
+            inputs = pixel_values[index]
+            if size:
+                inputs = torch.nn.functional.interpolate(
+                    inputs, size=(size, size), mode='bilinear', align_corners=False, antialias=True)
+            group_features = features[index] if features is not None else None
+            outputs, embeddings = classify_attributes(models, specialist, category, inputs, group_features)
+            for row, idx in enumerate(subset):
+                results[idx]["details"] = decode_attributes(outputs, specialist['labels'], row)
+                # 저해상도 특징은 원해상도로 저장된 옷장 임베딩과 비교할 수 없으므로 중복 검사에서 제외
+                if embeddings is not None and not size:
+                    results[idx]["embedding"] = encode_embedding(embeddings[row])
+            if size:
+                models['cascade']['stats'].record(low_res=len(subset))
+                audit_low_res(models, specialist, category, pixel_values[index], outputs)
+
+    return results
+
+def audit_low_res(models, specialist, category, full_inputs, low_res_outputs):
+    """저해상도 결과 일부를 원해상도로 다시 돌려서 속성 일치율 기록"""
+    if random.random() >= CASCADE_AUDIT_RATE:
+        return
+    outputs, _ = classify_attributes(models, specialist, category, full_inputs)
+    agreed = sum(int((outputs[attr].argmax(-1) == logits.argmax(-1)).sum()) for attr, logits in low_res_outputs.items())
+    total = sum(logits.shape[0] for logits in low_res_outputs.values())
+    models['cascade']['stats'].record_audit("low_res", agreed, total)
+
+def enable_micro_batching(models, max_batch_size=16, max_wait_ms=5):
+    """
+    동시 요청의 분류를 하나의 배치로 묶어서 처리하도록 설정
+    - 이후 run_full_pipeline의 분류 단계는 스케줄러 스레드에서만 실행됨
+    - 배치 항목은 (옷 조각, YOLO 힌트) 쌍
+    """
+    def process(entries):
+        crops = [crop for crop, _ in entries]
+        hints = [hint for _, hint in entries]
+        return classify_crops(models, crops, hints if models.get('cascade') is not None else None)
+
+    models['batcher'] = MicroBatcher(
+        process,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms
+    )
+    print(f"마이크로 배칭 활성화 (배치 {max_batch_size}, 대기 {max_wait_ms}ms)")
+    return models['batcher']
+
+def print_item_result(item_result):
+    """아이템 분석 결과 로그 출력"""
+    main_category = item_result["main_category"]
+    print(f"\n--- 분석 #{item_result['item_id']} ---")
+    print(f"1차 분류 결과: 이 옷은 '{main_category}' 종류입니다.")
+    if not item_result["details"]:
+        print(f"-> '{main_category}'에 대한 전문 분석 모델이 없습니다.")
+        return
+    print("\n--- 최종 분석 결과 ---")
+    for attr, value in item_result["details"].items():
+        if attr == '스타일':
+            print("- 추천 스타일 Top 3:")
+            for style in value:
+                print(f"  * {style['name']} (확률: {style['confidence']:.2%})")
+        else:
+            print(f"- {attr}: {value}")
+    print("--------------------")
+
+def load_input_image(source):
+    """
+    분석 입력을 RGB PIL 이미지로 변환
+    - 파일 경로, 인코딩된 바이트(jpg/png), RGB numpy 배열, PIL 이미지 모두 허용
+    - 바이트/배열은 디스크를 거치지 않고 메모리에서 바로 디코딩
+    """
+    if isinstance(source, Image.Image):
+        return source.convert("RGB")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(source)).convert("RGB")
+    if isinstance(source, np.ndarray):
+        return Image.fromarray(source).convert("RGB")
+    return Image.open(source).convert("RGB")
+
+def describe_input(source):
+    """로그용 입력 설명"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return f"<메모리 이미지 {len(source)} bytes>"
+    if isinstance(source, np.ndarray):
+        return f"<배열 이미지 {source.shape}>"
+    if isinstance(source, Image.Image):
+        return f"<PIL 이미지 {source.size}>"
+    return str(source)
+
+def run_full_pipeline(models, image_source):
+    """
+    AI 서비스의 전체 파이프라인을 실행합니다.
+    image_source: 파일 경로 / 이미지 바이트 / RGB numpy 배열 / PIL 이미지
+    """
     print(f"\n=========================================")
-    print(f"--- 입력 이미지 분석 시작: {image_path} ---")
+    print(f"--- 입력 이미지 분석 시작: {describe_input(image_source)} ---")
     
     analysis_results = []  # 결과 저장소 추가
     
     try:
-        original_image = Image.open(image_path).convert("RGBA")
+        original_image = load_input_image(image_source)
     except FileNotFoundError:
-        print(f"오류: '{image_path}' 파일을 찾을 수 없습니다.")
+        print(f"오류: '{image_source}' 파일을 찾을 수 없습니다.")
         return {"error": "이미지를 찾을 수 없습니다", "status": "failed"}
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        print(f"오류: 이미지를 읽을 수 없습니다 ({e})")
+        return {"error": "이미지를 읽을 수 없습니다", "status": "failed"}
 
     # 1. YOLO로 옷의 외곽선 찾기
-    yolo_results = models['yolo'](original_image)
+    with models['yolo_lock']:
+        yolo_results = models['yolo'](original_image)
     
     if not yolo_results or yolo_results[0].masks is None:
         print("-> YOLO 모델이 이미지에서 옷을 찾지 못했습니다.")
         return {"error": "옷을 찾을 수 없습니다", "status": "failed"}
         
-    print(f"-> 총 {len(yolo_results[0].masks)}개의 옷을 찾았습니다. 각 옷을 분석합니다...")
+    print(f"-> 총 {len(yolo_results[0].masks)}개의 옷을 찾았습니다. 한 번에 분석합니다...")
 
-    # 2. 찾은 옷들을 하나씩 분석
-    for i, mask in enumerate(yolo_results[0].masks):
-        print(f"\n--- 분석 #{i+1} ---")
-        
-        item_result = {"item_id": i + 1, "details": {}}  # 개별 아이템 결과
-        
-        # 3. 마스크를 이용해 옷 부분만 잘라내기
-        mask_array = mask.data[0].cpu().numpy().astype(np.uint8)
-        mask_image = Image.fromarray(mask_array * 255).resize(original_image.size)
-        transparent_array = np.zeros_like(np.array(original_image))
-        transparent_array[np.array(mask_image) > 0] = np.array(original_image)[np.array(mask_image) > 0]
-        cropped_image = Image.fromarray(transparent_array)
-        cropped_image_rgb = cropped_image.convert("RGB")
-
-        # 4. 1차 분류기(Router)로 큰 카테고리 판단
-        inputs = models['processor'](images=cropped_image_rgb, return_tensors="pt").to(models['device'])
-        with torch.no_grad():
-            logits = models['router'](**inputs).logits
-        main_category_id = logits.argmax(-1).item()
-        main_category = models['router'].config.id2label[main_category_id]
-        print(f"1차 분류 결과: 이 옷은 '{main_category}' 종류입니다.")
-        
-        item_result["main_category"] = main_category  # 카테고리 저장
-
-        # 5. 2차 분류기(Specialist)로 상세 속성 분석
-        if main_category in models['specialists']:
-            specialist = models['specialists'][main_category]
-            specialist_model = specialist['model']
-            specialist_labels = specialist['labels']
-            
-            print(f"'{main_category}' 전문가가 상세 분석을 시작합니다...")
-            
-            with torch.no_grad():
-                outputs = specialist_model(**inputs)
-            
-            print("\n--- 최종 분석 결과 ---")
-            for attr, logits in outputs.items():
-                if attr == '스타일':
-                    probabilities = torch.nn.functional.softmax(logits, dim=-1)
-                    top3 = torch.topk(probabilities, 3)
-                    top3_styles = []
-                    print("- 추천 스타일 Top 3:")
-                    for k in range(3):
-                        prob = top3.values[0][k].item()
-                        style_id = top3.indices[0][k].item()
-                        style_name = specialist_labels[attr][style_id]
-                        top3_styles.append({"name": style_name, "confidence": prob})
-                        print(f"  * {style_name} (확률: {prob:.2%})")
-                    item_result["details"][attr] = top3_styles  # 저장
-                else:
-                    pred_id = logits.argmax(-1).item()
-                    pred_name = specialist_labels[attr][pred_id]
-                    item_result["details"][attr] = pred_name  # 저장
-                    print(f"- {attr}: {pred_name}")
-            print("--------------------")
-        else:
-            print(f"-> '{main_category}'에 대한 전문 분석 모델이 없습니다.")
-        
+    # 2. 박스 단위로 잘라낸 뒤 마스크 적용 (옷 크기 해상도)
+    crops = extract_garment_crops(np.asarray(original_image), yolo_results[0])
+    hints = get_yolo_hints(models, yolo_results[0])
+
+    # 3. 배치 분류 (Router 1회 + 카테고리별 Specialist 1회, YOLO가 확실한 옷은 Router 생략)
+    #    마이크로 배칭이 켜져 있으면 다른 요청의 옷과 함께 한 배치로 처리
+    if models.get('batcher') is not None:
+        classified = models['batcher'].run(list(zip(crops, hints or [None] * len(crops))))
+    else:
+        classified = classify_crops(models, crops, hints)
+
+    for i, classification in enumerate(classified):
+        item_result = {"item_id": i + 1, "details": classification["details"]}  # 개별 아이템 결과
+        item_result["main_category"] = classification["main_category"]  # 카테고리 저장
+        item_result["embedding"] = classification.get("embedding")  # 중복/유사 아이템 검색용
+        print_item_result(item_result)
         analysis_results.append(item_result)  # 결과 추가
     
     # 최종 결과 반환
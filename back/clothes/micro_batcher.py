@@ -0,0 +1,114 @@
+"""
+요청 간 동적 마이크로 배칭
+- 여러 요청 스레드가 잘라낸 옷 이미지를 대기열에 넣음
+- 스케줄러 스레드가 배치 크기에 도달하거나 대기 시간(수 ms)이 지나면 한 번에 추론
+- 결과를 요청별로 나눠서 기다리는 스레드에 돌려줌
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, process_fn, max_batch_size=16, max_wait_ms=5):
+        """
+        Args:
+            process_fn: 아이템 리스트 → 같은 순서의 결과 리스트 (예: classify_crops)
+            max_batch_size: 한 번에 처리할 최대 아이템 수 (처리량 ↑, 메모리 ↑)
+            max_wait_ms: 첫 요청 이후 배치를 모으는 최대 대기 시간 (지연 ↑, 배치 크기 ↑)
+        """
+        self.process_fn = process_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.running = True
+
+        # 통계
+        self.stats_lock = threading.Lock()
+        self.batch_count = 0
+        self.item_count = 0
+        self.request_count = 0
+
+        self.worker = threading.Thread(target=self._worker, daemon=True, name="micro-batcher")
+        self.worker.start()
+
+    def submit(self, items):
+        """아이템 리스트를 등록하고 Future 반환 (result()로 결과 리스트 수신)"""
+        future = Future()
+        if not items:
+            future.set_result([])
+            return future
+        self.requests.put((list(items), future))
+        return future
+
+    def run(self, items, timeout=None):
+        """등록 후 결과가 나올 때까지 대기"""
+        return self.submit(items).result(timeout=timeout)
+
+    def _collect_batch(self):
+        """첫 요청을 기다린 뒤, 배치가 차거나 마감 시간이 될 때까지 요청을 더 모음"""
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self.running = False
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _worker(self):
+        while self.running:
+            batch = self._collect_batch()
+            if batch is None:
+                break
+
+            items = [item for request_items, _ in batch for item in request_items]
+            try:
+                results = []
+                # 한 요청의 아이템이 max_batch_size보다 많으면 나눠서 처리
+                for start in range(0, len(items), self.max_batch_size):
+                    results.extend(self.process_fn(items[start:start + self.max_batch_size]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            # 요청별로 결과 분배
+            offset = 0
+            for request_items, future in batch:
+                future.set_result(results[offset:offset + len(request_items)])
+                offset += len(request_items)
+
+            with self.stats_lock:
+                self.batch_count += 1
+                self.item_count += len(items)
+                self.request_count += len(batch)
+
+    def stop(self):
+        self.running = False
+        self.requests.put(None)
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batch_count,
+                "requests": self.request_count,
+                "items": self.item_count,
+                "avg_batch_size": self.item_count / self.batch_count if self.batch_count else 0.0
+            }
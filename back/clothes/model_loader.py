@@ -0,0 +1,84 @@
+"""
+모델 가중치 로딩 유틸리티
+- safetensors 우선 로드 (메모리 맵 → torch.load 역직렬화 없이 바로 텐서 생성)
+- 기존 pytorch_model.bin 체크포인트를 safetensors로 변환하는 CLI 제공
+- 로딩 단계별 소요 시간 측정
+
+사용법:
+    python model_loader.py --convert   # 모든 모델 폴더에 model.safetensors 생성
+"""
+import argparse
+import os
+import sys
+import time
+import torch
+from safetensors.torch import load_file, save_file
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CURRENT_DIR)
+
+SAFETENSORS_NAME = 'model.safetensors'
+BIN_NAME = 'pytorch_model.bin'
+
+
+def has_fresh_safetensors(model_dir):
+    """model.safetensors가 있고 pytorch_model.bin보다 오래되지 않았는지 (재학습 후 변환 누락 방지)"""
+    bin_path = os.path.join(model_dir, BIN_NAME)
+    safetensors_path = os.path.join(model_dir, SAFETENSORS_NAME)
+    if not os.path.exists(safetensors_path):
+        return False
+    return not os.path.exists(bin_path) or os.path.getmtime(safetensors_path) >= os.path.getmtime(bin_path)
+
+
+def load_state_dict(model_dir, device):
+    """최신 model.safetensors가 있으면 mmap으로, 없으면 pytorch_model.bin을 torch.load로 로드"""
+    if has_fresh_safetensors(model_dir):
+        return load_file(os.path.join(model_dir, SAFETENSORS_NAME), device=str(device))
+    return torch.load(os.path.join(model_dir, BIN_NAME), map_location=device)
+
+
+def convert_to_safetensors(model_dir):
+    """pytorch_model.bin → model.safetensors (이미 최신이면 건너뜀)"""
+    bin_path = os.path.join(model_dir, BIN_NAME)
+    safetensors_path = os.path.join(model_dir, SAFETENSORS_NAME)
+    if not os.path.exists(bin_path) or has_fresh_safetensors(model_dir):
+        return False
+    state_dict = torch.load(bin_path, map_location='cpu')
+    save_file({key: value.contiguous() for key, value in state_dict.items()}, safetensors_path)
+    return True
+
+
+def timed(name, timings, fn, *args, **kwargs):
+    """fn 실행 시간을 timings[name]에 기록"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings[name] = time.perf_counter() - start
+    return result
+
+
+def print_timings(timings, total):
+    print("--- 모델 로딩 시간 ---")
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f"  {name:<20} {seconds:6.2f}s")
+    print(f"  {'전체 (병렬)':<20} {total:6.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="모델 가중치 safetensors 변환")
+    parser.add_argument("--convert", action="store_true", help="모든 모델 폴더의 가중치를 safetensors로 변환")
+    args = parser.parse_args()
+
+    if args.convert:
+        from transformers import AutoModelForImageClassification
+        from final_pipeline import ROUTER_MODEL_PATH, SPECIALIST_MODEL_PATHS, MULTI_HEAD_MODEL_PATH
+
+        # Router는 Hugging Face 형식이므로 save_pretrained로 safetensors 저장
+        if os.path.isdir(ROUTER_MODEL_PATH) and not os.path.exists(os.path.join(ROUTER_MODEL_PATH, SAFETENSORS_NAME)):
+            router = AutoModelForImageClassification.from_pretrained(ROUTER_MODEL_PATH)
+            router.save_pretrained(ROUTER_MODEL_PATH, safe_serialization=True)
+            print(f"변환 완료: {ROUTER_MODEL_PATH}")
+
+        for model_dir in list(SPECIALIST_MODEL_PATHS.values()) + [MULTI_HEAD_MODEL_PATH]:
+            if os.path.isdir(model_dir) and convert_to_safetensors(model_dir):
+                print(f"변환 완료: {model_dir}")
+        print("safetensors 변환이 끝났습니다.")
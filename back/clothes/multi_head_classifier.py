@@ -0,0 +1,81 @@
+"""
+공유 백본 멀티헤드 분류기
+- ViT 백본 1개가 CLS 특징을 한 번만 계산
+- 1차 분류(Router) 헤드 + 카테고리별 전문가(Specialist) 속성 헤드가 같은 특징을 사용
+- 기존 구조(Router 1개 + Specialist 4개 = ViT-base 5개) 대비 메모리 약 1/5, 아이템당 ViT 순전파 2회 → 1회
+"""
+import os
+import torch
+import torch.nn as nn
+from transformers import ViTConfig, ViTModel
+from model_loader import load_state_dict
+
+WEIGHTS_NAME = 'pytorch_model.bin'
+LABEL_MAPS_NAME = 'label_maps.pth'
+
+
+class MultiHeadClassifier(nn.Module):
+    def __init__(self, config, id2label, specialist_label_maps):
+        """
+        Args:
+            config: ViTConfig (백본 설정)
+            id2label: Router 클래스 id → 카테고리 이름
+            specialist_label_maps: {카테고리: {속성: {id: 라벨}}}
+        """
+        super().__init__()
+        self.config = config
+        self.id2label = {int(k): v for k, v in id2label.items()}
+        self.label_maps = specialist_label_maps
+
+        # ViTForImageClassification과 동일하게 pooler 없이 CLS 토큰 사용
+        self.body = ViTModel(config, add_pooling_layer=False)
+        hidden_size = config.hidden_size
+        self.router_head = nn.Linear(hidden_size, len(self.id2label))
+        self.specialist_heads = nn.ModuleDict({
+            category: nn.ModuleDict({
+                col: nn.Linear(hidden_size, len(class_map))
+                for col, class_map in label_maps.items()
+            })
+            for category, label_maps in specialist_label_maps.items()
+        })
+
+    def extract_features(self, pixel_values):
+        """백본 1회 순전파 → CLS 특징 (batch, hidden)"""
+        return self.body(pixel_values=pixel_values).last_hidden_state[:, 0, :]
+
+    def route(self, features):
+        """CLS 특징 → Router 로짓"""
+        return self.router_head(features)
+
+    def classify_attributes(self, features, category):
+        """CLS 특징 → 해당 카테고리 전문가의 속성별 로짓 (SpecialistClassifier.forward와 같은 형식)"""
+        heads = self.specialist_heads[category]
+        return {col: head(features) for col, head in heads.items()}
+
+    def has_specialist(self, category):
+        return category in self.specialist_heads
+
+    def forward(self, pixel_values):
+        features = self.extract_features(pixel_values)
+        return features, self.route(features)
+
+    def save_pretrained(self, output_dir):
+        """config.json + 가중치 + 라벨 정보 저장 (전문가 모델 저장 방식과 동일)"""
+        os.makedirs(output_dir, exist_ok=True)
+        torch.save(self.state_dict(), os.path.join(output_dir, WEIGHTS_NAME))
+        torch.save({
+            'router': self.id2label,
+            'specialists': self.label_maps,
+        }, os.path.join(output_dir, LABEL_MAPS_NAME))
+        self.config.save_pretrained(output_dir)
+
+
+def load_multi_head_model(model_dir, device):
+    """변환된 멀티헤드 모델을 로드"""
+    config = ViTConfig.from_pretrained(model_dir)
+    label_maps = torch.load(os.path.join(model_dir, LABEL_MAPS_NAME), map_location='cpu')
+    model = MultiHeadClassifier(config, label_maps['router'], label_maps['specialists'])
+    model.load_state_dict(load_state_dict(model_dir, device))
+    model.to(device)
+    model.eval()
+    return model
@@ -0,0 +1,134 @@
+"""
+onnxruntime CPU 추론 어댑터
+- export_onnx.py로 만든 ONNX(또는 int8 동적 양자화) 모델을 기존 PyTorch 모델 자리에 그대로 끼워 쓰기 위한 래퍼
+- 입력/출력은 torch 텐서 (내부에서 numpy로 변환), 호출 형식은 기존 모델과 동일
+  * OnnxRouter(pixel_values=...).logits, .config.id2label
+  * OnnxSpecialist(pixel_values) → {속성: 로짓}
+  * OnnxMultiHead(pixel_values) → (특징, Router 로짓), 속성 헤드는 작은 선형층이라 PyTorch로 실행
+"""
+import json
+import os
+from types import SimpleNamespace
+
+import torch
+import torch.nn as nn
+
+ONNX_INPUT_NAME = 'pixel_values'
+
+
+def onnx_model_path(onnx_dir, name, int8=False):
+    """export_onnx.py 저장 규칙: {name}.onnx / {name}.int8.onnx"""
+    return os.path.join(onnx_dir, f"{name}.int8.onnx" if int8 else f"{name}.onnx")
+
+
+def onnx_meta_path(onnx_dir, name):
+    """출력 이름(속성 순서) 등 부가 정보 JSON"""
+    return os.path.join(onnx_dir, f"{name}.json")
+
+
+def create_session(path, threads=0):
+    """CPU 전용 InferenceSession (그래프 최적화 전체 적용)"""
+    import onnxruntime as ort
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"ONNX 모델이 없습니다: {path} (export_onnx.py로 먼저 변환하세요)")
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads > 0:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+
+
+class OnnxClassifier:
+    """ViT 분류기 ONNX 세션 공통 부분 (InferenceSession.run은 스레드 안전)"""
+
+    def __init__(self, path, threads=0):
+        self.path = path
+        self.session = create_session(path, threads)
+        self.size_mb = os.path.getsize(path) / (1024 ** 2)  # SpecialistLRU 메모리 계산용
+
+    def run(self, pixel_values):
+        outputs = self.session.run(None, {ONNX_INPUT_NAME: pixel_values.detach().cpu().numpy()})
+        return [torch.from_numpy(output) for output in outputs]
+
+
+class OnnxRouter(OnnxClassifier):
+    """AutoModelForImageClassification 대체 (logits 속성, config.id2label 제공)"""
+
+    def __init__(self, path, config, threads=0):
+        super().__init__(path, threads)
+        self.config = config
+
+    def __call__(self, pixel_values):
+        return SimpleNamespace(logits=self.run(pixel_values)[0])
+
+
+class OnnxSpecialist(OnnxClassifier):
+    """SpecialistClassifier 대체 (속성별 로짓 딕셔너리 반환, 속성 뒤의 출력은 CLS 특징)"""
+
+    def __init__(self, path, attributes, threads=0):
+        super().__init__(path, threads)
+        self.attributes = list(attributes)
+
+    def __call__(self, pixel_values, return_features=False):
+        outputs = self.run(pixel_values)
+        logits = dict(zip(self.attributes, outputs))
+        if return_features:
+            # 특징 출력이 없는 예전 변환본이면 None
+            return logits, outputs[len(self.attributes)] if len(outputs) > len(self.attributes) else None
+        return logits
+
+
+class OnnxMultiHead(OnnxClassifier):
+    """MultiHeadClassifier 대체: 백본 + Router 헤드는 ONNX, 전문가 헤드는 PyTorch 선형층"""
+
+    def __init__(self, path, id2label, specialist_label_maps, head_state_dict, hidden_size, threads=0):
+        super().__init__(path, threads)
+        self.id2label = {int(k): v for k, v in id2label.items()}
+        self.label_maps = specialist_label_maps
+        self.specialist_heads = nn.ModuleDict({
+            category: nn.ModuleDict({
+                col: nn.Linear(hidden_size, len(class_map))
+                for col, class_map in label_maps.items()
+            })
+            for category, label_maps in specialist_label_maps.items()
+        })
+        self.specialist_heads.load_state_dict(head_state_dict)
+        self.specialist_heads.eval()
+
+    def __call__(self, pixel_values):
+        features, logits = self.run(pixel_values)
+        return features, logits
+
+    def classify_attributes(self, features, category):
+        heads = self.specialist_heads[category]
+        return {col: head(features) for col, head in heads.items()}
+
+    def has_specialist(self, category):
+        return category in self.specialist_heads
+
+
+def load_onnx_specialist(onnx_dir, name, int8=False, threads=0):
+    """전문가 ONNX 모델 + 저장된 속성 순서"""
+    with open(onnx_meta_path(onnx_dir, name), 'r', encoding='utf-8') as f:
+        attributes = json.load(f)['outputs']
+    return OnnxSpecialist(onnx_model_path(onnx_dir, name, int8), attributes, threads)
+
+
+def load_onnx_multi_head(onnx_dir, model_dir, int8=False, threads=0):
+    """멀티헤드 ONNX 백본 + 원본 체크포인트의 전문가 헤드 가중치"""
+    from transformers import ViTConfig
+    from model_loader import load_state_dict
+    from multi_head_classifier import LABEL_MAPS_NAME
+
+    config = ViTConfig.from_pretrained(model_dir)
+    label_maps = torch.load(os.path.join(model_dir, LABEL_MAPS_NAME), map_location='cpu')
+    prefix = 'specialist_heads.'
+    head_state = {
+        key[len(prefix):]: value
+        for key, value in load_state_dict(model_dir, 'cpu').items() if key.startswith(prefix)
+    }
+    return OnnxMultiHead(
+        onnx_model_path(onnx_dir, 'multi_head', int8),
+        label_maps['router'], label_maps['specialists'], head_state, config.hidden_size, threads
+    )
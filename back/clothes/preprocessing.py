@@ -0,0 +1,57 @@
+"""
+배치 텐서 전처리 (AutoImageProcessor 대체)
+- 리사이즈: 이미지별 PIL bilinear (HF 처리기와 동일한 리샘플링 → 결과 일치)
+- 스택 후 rescale/normalize를 torch 연산 한 번으로 처리
+- uint8 배치를 먼저 device로 옮긴 뒤 float 변환 (전송량 1/4)
+"""
+import numpy as np
+import torch
+from PIL import Image
+
+
+class BatchPreprocessor:
+    def __init__(self, processor):
+        """
+        Args:
+            processor: AutoImageProcessor (ViTImageProcessor) - 설정값(size, mean, std 등)만 사용
+        """
+        self.do_resize = processor.do_resize
+        self.size = (processor.size['width'], processor.size['height'])
+        self.resample = processor.resample
+        self.do_rescale = processor.do_rescale
+        self.rescale_factor = processor.rescale_factor
+        self.do_normalize = processor.do_normalize
+        self.mean = torch.tensor(processor.image_mean, dtype=torch.float32).view(1, 3, 1, 1)
+        self.std = torch.tensor(processor.image_std, dtype=torch.float32).view(1, 3, 1, 1)
+
+    def to_resized_array(self, image):
+        """PIL 이미지 또는 RGB uint8 배열 → 리사이즈된 (H, W, 3) uint8 배열 (normalize 전 단계, 데이터셋 캐시에서도 사용)"""
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if self.do_resize and image.size != self.size:
+            image = image.resize(self.size, resample=self.resample)
+        return np.asarray(image)
+
+    def __call__(self, images, device=None):
+        """
+        이미지 리스트 → pixel_values (N, 3, H, W) float32 텐서
+        HF 처리기의 inputs['pixel_values']와 같은 값
+        """
+        batch = np.stack([self.to_resized_array(image) for image in images])
+        pixel_values = torch.from_numpy(batch)
+        if device is not None:
+            pixel_values = pixel_values.to(device, non_blocking=True)
+        return self.normalize(pixel_values)
+
+    def normalize(self, pixel_values):
+        """리사이즈된 uint8 (N, H, W, 3) 텐서 → pixel_values (N, 3, H, W) float32 (텐서가 있는 device에서 계산)"""
+        pixel_values = pixel_values.permute(0, 3, 1, 2).float()
+        if self.do_rescale:
+            pixel_values = pixel_values * self.rescale_factor
+        if self.do_normalize:
+            mean = self.mean.to(pixel_values.device)
+            std = self.std.to(pixel_values.device)
+            pixel_values = (pixel_values - mean) / std
+        return pixel_values.contiguous()
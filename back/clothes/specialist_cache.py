@@ -0,0 +1,202 @@
+"""
+전문가(Specialist) 모델 지연 로딩 + 메모리 한도 LRU
+- 카테고리를 처음 사용할 때 로드
+- 로드된 모델의 총 메모리가 한도를 넘으면 가장 오래 안 쓴 모델부터 해제
+- 카테고리별 사용 횟수를 파일에 저장해두고, 다음 시작 시 많이 쓰는 순서로 미리 로드
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+
+
+def model_size_mb(model):
+    """파라미터 + 버퍼 메모리 (MB), ONNX 세션은 모델 파일 크기"""
+    if hasattr(model, 'size_mb'):
+        return model.size_mb
+    total = sum(t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers()))
+    return total / (1024 ** 2)
+
+
+class SpecialistLRU:
+    """models['specialists'] 딕셔너리 자리에 들어가는 지연 로딩 캐시"""
+
+    def __init__(self, loader, categories, memory_budget_mb=0, usage_path=None, save_every=20):
+        """
+        Args:
+            loader: category → {'model': ..., 'labels': ...}
+            categories: 사용 가능한(가중치가 있는) 카테고리 목록
+            memory_budget_mb: 로드된 전문가 모델 총 메모리 한도 (0이면 무제한)
+            usage_path: 사용 통계 JSON 경로 (None이면 저장 안 함)
+            save_every: 사용 통계를 몇 번 사용마다 저장할지
+        """
+        self.loader = loader
+        self.categories = list(categories)
+        self.memory_budget_mb = memory_budget_mb
+        self.usage_path = usage_path
+        self.save_every = save_every
+
+        self.loaded = OrderedDict()  # category → (entry, size_mb), 뒤쪽이 최근 사용
+        self.lock = threading.Lock()
+        self.category_locks = {category: threading.Lock() for category in self.categories}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.usage = self._load_usage()
+        self._unsaved = 0
+        self._usage_seq = 0      # 저장할 사용 통계 스냅샷 번호 (오래된 스냅샷이 새것을 덮어쓰지 않도록)
+        self._saved_seq = 0
+        self._save_lock = threading.Lock()
+
+    # --- dict 호환 인터페이스 ---
+    def __contains__(self, category):
+        return category in self.category_locks
+
+    def __getitem__(self, category):
+        entry = self.get(category)
+        if entry is None:
+            raise KeyError(category)
+        return entry
+
+    def keys(self):
+        return list(self.categories)
+
+    def get(self, category, default=None):
+        """전문가 모델 반환 (없으면 로드, 가중치가 없는 카테고리면 default)"""
+        if category not in self.category_locks:
+            return default
+
+        with self.lock:
+            snapshot = self._record_usage(category)
+            entry = None
+            if category in self.loaded:
+                self.loaded.move_to_end(category)
+                self.hits += 1
+                entry = self.loaded[category][0]
+        # 파일 저장은 lock 밖에서 (디스크 I/O가 다른 스레드의 조회를 막지 않도록)
+        if snapshot is not None:
+            self._save_usage(snapshot)
+        if entry is not None:
+            return entry
+
+        # 같은 카테고리를 여러 스레드가 동시에 로드하지 않도록 카테고리별 잠금
+        with self.category_locks[category]:
+            with self.lock:
+                if category in self.loaded:
+                    self.loaded.move_to_end(category)
+                    self.hits += 1
+                    return self.loaded[category][0]
+                self.misses += 1
+            return self._load(category)
+
+    def _load(self, category, evict=True):
+        print(f"[SpecialistLRU] '{category}' 전문가 모델 로딩...")
+        entry = self.loader(category)
+        size_mb = model_size_mb(entry['model'])
+        with self.lock:
+            self.loaded[category] = (entry, size_mb)
+            if evict:
+                self._evict(keep=category)
+        print(f"[SpecialistLRU] '{category}' 로딩 완료 ({size_mb:.0f}MB, 총 {self.loaded_mb():.0f}MB)")
+        return entry
+
+    def _evict(self, keep):
+        """메모리 한도를 넘으면 오래된 모델부터 해제 (방금 로드한 모델은 유지, lock 안에서 호출)"""
+        if self.memory_budget_mb <= 0:
+            return
+        evicted = False
+        while self.loaded_mb() > self.memory_budget_mb and len(self.loaded) > 1:
+            category = next(iter(self.loaded))
+            if category == keep:
+                break
+            # 캐시의 참조만 끊음 (추론 중인 스레드가 아직 쓰고 있을 수 있으므로 .to('cpu') 등으로 옮기지 않음)
+            # → 마지막 참조가 사라지면 해제되고, GPU 메모리는 아래 empty_cache로 반환
+            _, size_mb = self.loaded.pop(category)
+            self.evictions += 1
+            evicted = True
+            print(f"[SpecialistLRU] '{category}' 전문가 모델 해제 ({size_mb:.0f}MB)")
+        if evicted and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def loaded_mb(self):
+        return sum(size_mb for _, size_mb in self.loaded.values())
+
+    # --- 사용 통계 ---
+    def _load_usage(self):
+        if self.usage_path and os.path.exists(self.usage_path):
+            try:
+                with open(self.usage_path, 'r', encoding='utf-8') as f:
+                    return {k: int(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                print(f"[SpecialistLRU] 사용 통계 읽기 실패: {e}")
+        return {}
+
+    def _record_usage(self, category):
+        """lock 안에서 호출, 저장할 때가 되면 (번호, 사용 통계 사본) 반환 → lock 밖에서 _save_usage"""
+        self.usage[category] = self.usage.get(category, 0) + 1
+        self._unsaved += 1
+        if self._unsaved < self.save_every or not self.usage_path:
+            return None
+        self._unsaved = 0
+        self._usage_seq += 1
+        return self._usage_seq, dict(self.usage)
+
+    def _save_usage(self, snapshot):
+        seq, usage = snapshot
+        with self._save_lock:
+            # 다른 스레드가 이미 더 새로운 스냅샷을 저장했으면 건너뜀
+            if seq <= self._saved_seq:
+                return
+            try:
+                with open(self.usage_path, 'w', encoding='utf-8') as f:
+                    json.dump(usage, f, ensure_ascii=False)
+                self._saved_seq = seq
+            except OSError as e:
+                print(f"[SpecialistLRU] 사용 통계 저장 실패: {e}")
+
+    def preload(self, mode="usage"):
+        """
+        미리 로드
+        - "all": 모든 카테고리 (메모리 한도 안에서)
+        - "usage": 사용 기록이 있는 카테고리를 많이 쓴 순서로 (메모리 한도 안에서)
+        - "none": 미리 로드하지 않음
+        """
+        if mode == "all":
+            order = list(self.categories)
+        elif mode == "usage":
+            order = sorted(
+                (c for c in self.categories if self.usage.get(c, 0) > 0),
+                key=lambda c: -self.usage[c]
+            )
+        else:
+            return []
+
+        preloaded = []
+        for category in order:
+            with self.category_locks[category]:
+                if category not in self.loaded:
+                    self._load(category, evict=False)
+            with self.lock:
+                if self.memory_budget_mb > 0 and self.loaded_mb() > self.memory_budget_mb and len(self.loaded) > 1:
+                    # 한도를 넘기면 방금 로드한(덜 쓰는) 모델을 해제하고 중단
+                    self.loaded.pop(category, None)
+                    break
+                # 사용 횟수 내림차순으로 로드하므로, 나중에 로드한(덜 쓰는) 모델을 LRU 앞쪽(먼저 해제될 자리)으로 이동
+                self.loaded.move_to_end(category, last=False)
+            preloaded.append(category)
+        return preloaded
+
+    def stats(self):
+        with self.lock:
+            return {
+                "loaded": list(self.loaded.keys()),
+                "loaded_mb": round(self.loaded_mb(), 1),
+                "memory_budget_mb": self.memory_budget_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "usage": dict(self.usage)
+            }
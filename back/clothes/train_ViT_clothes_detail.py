@@ -6,6 +6,9 @@ from transformers import AutoImageProcessor, AutoModel
 import torch.nn as nn
 from torch.optim import AdamW
 import os
+import json
+import time
+import hashlib
 from tqdm import tqdm 
 import argparse
 
@@ -15,11 +18,21 @@ MODEL_NAME = "google/vit-base-patch16-224-in21k"
 NUM_EPOCHS = 3 # 먼저 3번만 훈련해서 성공하는지 확인
 BATCH_SIZE = 8
 LEARNING_RATE = 5e-5 # 5 * 10^-5
+NUM_WORKERS = int(os.getenv("TRAIN_NUM_WORKERS", "4")) # 데이터 로딩 워커 수 (--cache 사용 시)
+HOLDOUT_PERCENT = int(os.getenv("HOLDOUT_PERCENT", "10")) # 학습에서 빼두는 평가용 샘플 비율 (%)
+SPLIT_INFO_NAME = 'split.json' # 전문가 모델 폴더에 학습 때 쓴 분할 정보 기록
+
+
+def is_holdout(image_name, percent=HOLDOUT_PERCENT):
+    """이미지 이름 해시로 정해지는 평가용 샘플 여부 (CSV 순서가 바뀌거나 행이 추가돼도 같은 이미지는 항상 같은 쪽)"""
+    digest = hashlib.md5(str(image_name).encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') % 100 < percent
 
 
 # 1. 데이터셋 클래스
 class SpecialistDataset(Dataset):
-    def __init__(self, csv_path, image_dir, processor):
+    def __init__(self, csv_path, image_dir, processor, split=None):
+        """split: None(전체) / 'train'(학습용) / 'holdout'(평가용, 학습에 쓰지 않는 샘플)"""
         self.df = pd.read_csv(csv_path)
         self.image_dir = image_dir
         self.processor = processor
@@ -31,6 +44,13 @@ class SpecialistDataset(Dataset):
             cat_type = self.df[col].astype('category')
             self.encoded_labels[col] = cat_type.cat.codes
             self.label_maps[col] = dict(enumerate(cat_type.cat.categories))
+        if split is not None:
+            # 라벨 인코딩은 전체 CSV 기준 (분할과 상관없이 label_maps가 같도록) 후 행만 거름
+            holdout = self.df['image_name'].apply(is_holdout).to_numpy()
+            keep = holdout if split == 'holdout' else ~holdout
+            self.df = self.df[keep].reset_index(drop=True)
+            for col in self.label_columns:
+                self.encoded_labels[col] = self.encoded_labels[col][keep].reset_index(drop=True)
     def __len__(self):
         return len(self.df)
     def __getitem__(self, idx):
@@ -48,52 +68,50 @@ class SpecialistDataset(Dataset):
 
 # 2. Multi-Task 모델 설계
 class SpecialistClassifier(nn.Module):
-    def __init__(self, label_maps):
+    def __init__(self, label_maps, config=None):
         super().__init__()
-        self.body = AutoModel.from_pretrained(MODEL_NAME)
+        # config가 주어지면 사전학습 가중치를 받지 않고 구조만 생성 (저장된 가중치를 바로 덮어쓸 때)
+        if config is not None:
+            self.body = AutoModel.from_config(config)
+        else:
+            self.body = AutoModel.from_pretrained(MODEL_NAME)
         hidden_size = self.body.config.hidden_size
         self.heads = nn.ModuleDict({
             col: nn.Linear(hidden_size, len(class_map))
             for col, class_map in label_maps.items()
         })
-    def forward(self, pixel_values):
-        features = self.body(pixel_values=pixel_values).last_hidden_state[:, 0, :]
+    def forward(self, pixel_values, return_features=False):
+        # 학습 해상도와 다른 입력(저해상도 cascade)이면 위치 임베딩을 보간
+        interpolate = pixel_values.shape[-1] != self.body.config.image_size
+        features = self.body(pixel_values=pixel_values, interpolate_pos_encoding=interpolate).last_hidden_state[:, 0, :]
         logits = {col: head(features) for col, head in self.heads.items()}
+        if return_features:
+            # 옷장 유사 아이템 검색용 CLS 특징도 함께 반환
+            return logits, features
         return logits
 
-# --- 메인 실행 ---
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--category", required=True, type=str, choices=['상의', '하의', '아우터', '원피스'])
-    args = parser.parse_args()
-
-    CATEGORY = args.category
-    CSV_PATH = os.path.join(BASE_DATA_DIR, f"{CATEGORY}_metadata.csv")
-    IMAGE_DIR = os.path.join(BASE_DATA_DIR, CATEGORY)
-    OUTPUT_DIR = f"{CATEGORY}_specialist_model"
-
-    # --- 3. 데이터 준비 ---
-    processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
-    dataset = SpecialistDataset(CSV_PATH, IMAGE_DIR, processor)
-    dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True)
-
-    # --- 4. 모델, 옵티마이저, 손실 함수 준비 ---
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    print(f"'{CATEGORY}' 전문가 모델 훈련에 사용할 장치: {device}")
-
-    model = SpecialistClassifier(dataset.label_maps).to(device)
-    optimizer = AdamW(model.parameters(), lr=LEARNING_RATE)
+def train_end_to_end(model, dataloader, device, epochs, learning_rate=LEARNING_RATE, desc="", preprocess=None):
+    """
+    백본 + 헤드 전체 미세조정 (수동 훈련 루프)
+    - preprocess: 캐시 데이터셋(uint8 픽셀)일 때 device에서 정규화할 BatchPreprocessor
+    - 에포크마다 처리량(samples/sec) 출력
+    """
+    optimizer = AdamW(model.parameters(), lr=learning_rate)
     loss_fn = nn.CrossEntropyLoss()
 
-    # --- 5. 수동 훈련 루프 ---
     print("수동 훈련을 시작합니다...")
-    for epoch in range(NUM_EPOCHS):
-        print(f"--- 에포크 {epoch + 1}/{NUM_EPOCHS} ---")
+    for epoch in range(epochs):
+        print(f"--- 에포크 {epoch + 1}/{epochs} ---")
         model.train() # 훈련 모드
+        epoch_start = time.perf_counter()
+        samples = 0
         
-        for batch in tqdm(dataloader, desc=f"에포크 {epoch+1} 훈련 중"):
+        for batch in tqdm(dataloader, desc=f"{desc}에포크 {epoch+1} 훈련 중"):
             # 데이터를 GPU로 이동
-            pixel_values = batch['pixel_values'].to(device)
+            pixel_values = batch['pixel_values'].to(device, non_blocking=True)
+            if preprocess is not None:
+                pixel_values = preprocess.normalize(pixel_values)
+            samples += len(pixel_values)
             
             # 순전파 (Forward pass)
             logits_dict = model(pixel_values)
@@ -101,25 +119,87 @@ if __name__ == '__main__':
             # 손실 계산 (모든 머리의 오답 노트를 합침)
             total_loss = 0
             for col, logits in logits_dict.items():
-                labels = batch[f'label_{col}'].to(device)
+                labels = batch[f'label_{col}'].to(device, non_blocking=True)
                 total_loss += loss_fn(logits, labels)
             
             # 역전파 (Backward pass)
             optimizer.zero_grad()
             total_loss.backward()
             optimizer.step()
-    
-    # --- 6. 훈련이 끝나면, 무조건 모델을 저장! ---
-    print(f"\n훈련이 완료되었습니다. '{CATEGORY}' 전문가 모델을 직접 저장합니다...")
-    os.makedirs(OUTPUT_DIR, exist_ok=True) # 저장 폴더 생성
+        elapsed = time.perf_counter() - epoch_start
+        print(f"{desc}에포크 {epoch + 1}: {samples}개, {samples / max(elapsed, 1e-9):.1f} samples/sec")
+    model.eval()
+    return model
+
+def save_specialist(model, label_maps, output_dir):
+    """전문가 모델 저장 (가중치 + 라벨 정보 + config.json)"""
+    os.makedirs(output_dir, exist_ok=True) # 저장 폴더 생성
     
     # 모델의 '두뇌(가중치)' 저장
-    torch.save(model.state_dict(), os.path.join(OUTPUT_DIR, 'pytorch_model.bin'))
+    torch.save(model.state_dict(), os.path.join(output_dir, 'pytorch_model.bin'))
     
     # 라벨 정보 저장
-    torch.save(dataset.label_maps, os.path.join(OUTPUT_DIR, 'label_maps.pth'))
+    torch.save(label_maps, os.path.join(output_dir, 'label_maps.pth'))
     
     # Hugging Face 형식에 맞는 config.json 파일도 저장 (호환성을 위해)
-    model.body.config.save_pretrained(OUTPUT_DIR)
+    model.body.config.save_pretrained(output_dir)
+
+    # 평가용 샘플을 빼고 학습했다는 기록 (export_onnx.py 등에서 held-out 평가가 유효한지 확인)
+    with open(os.path.join(output_dir, SPLIT_INFO_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'holdout_percent': HOLDOUT_PERCENT}, f)
+
+
+def trained_without_holdout(model_dir):
+    """전문가 모델이 현재 HOLDOUT_PERCENT 분할의 학습용 샘플로만 학습됐는지"""
+    split_path = os.path.join(model_dir, SPLIT_INFO_NAME)
+    if not os.path.exists(split_path):
+        return False
+    with open(split_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('holdout_percent') == HOLDOUT_PERCENT
+
+# --- 메인 실행 ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--category", required=True, type=str, choices=['상의', '하의', '아우터', '원피스'])
+    parser.add_argument("--cache", action='store_true', help="전처리 데이터셋 캐시 사용 (없거나 CSV가 바뀌면 빌드)")
+    parser.add_argument("--num-workers", type=int, default=NUM_WORKERS)
+    args = parser.parse_args()
+
+    CATEGORY = args.category
+    CSV_PATH = os.path.join(BASE_DATA_DIR, f"{CATEGORY}_metadata.csv")
+    IMAGE_DIR = os.path.join(BASE_DATA_DIR, CATEGORY)
+    OUTPUT_DIR = f"{CATEGORY}_specialist_model"
+
+    # --- 3. 데이터 준비 ---
+    processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    preprocess = None
+    if args.cache:
+        from dataset_cache import CachedSpecialistDataset, ensure_dataset_cache, cache_dir_for
+        from preprocessing import BatchPreprocessor
+
+        ensure_dataset_cache(CSV_PATH, IMAGE_DIR, processor, cache_dir_for(CATEGORY), split='train')
+        dataset = CachedSpecialistDataset(cache_dir_for(CATEGORY))
+        preprocess = BatchPreprocessor(processor)
+        dataloader = DataLoader(
+            dataset, batch_size=BATCH_SIZE, shuffle=True,
+            num_workers=args.num_workers, pin_memory=device.type == 'cuda',
+            persistent_workers=args.num_workers > 0,
+        )
+    else:
+        dataset = SpecialistDataset(CSV_PATH, IMAGE_DIR, processor, split='train')
+        dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True)
+
+    # --- 4. 모델 준비 ---
+    print(f"'{CATEGORY}' 전문가 모델 훈련에 사용할 장치: {device}")
+
+    model = SpecialistClassifier(dataset.label_maps).to(device)
+
+    # --- 5. 수동 훈련 루프 ---
+    train_end_to_end(model, dataloader, device, NUM_EPOCHS, preprocess=preprocess)
+    
+    # --- 6. 훈련이 끝나면, 무조건 모델을 저장! ---
+    print(f"\n훈련이 완료되었습니다. '{CATEGORY}' 전문가 모델을 직접 저장합니다...")
+    save_specialist(model, dataset.label_maps, OUTPUT_DIR)
 
-    print(f"최종 모델 저장이 완료되었습니다! '{OUTPUT_DIR}' 폴더에 'pytorch_model.bin' 파일이 생성되었습니다.")
\ No newline at end of file
+    print(f"최종 모델 저장이 완료되었습니다! '{OUTPUT_DIR}' 폴더에 'pytorch_model.bin' 파일이 생성되었습니다.")
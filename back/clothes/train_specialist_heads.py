@@ -0,0 +1,310 @@
+"""
+특징 캐시 기반 전문가 헤드 학습 (4개 카테고리를 한 번에)
+- 백본(ViT) CLS 특징을 이미지당 한 번만 계산해서 메모리 맵 파일(feature_store/)에 저장
+- 속성 헤드(선형층)는 캐시된 특징만으로 학습 → CPU에서도 수 분
+- 라벨만 바뀌면 특징 추출 없이 바로 학습, 이미지가 추가되면 새 이미지만 추출
+- 선택: 학습된 헤드에서 이어서 전체(End-to-End) 미세조정 (--finetune-epochs)
+
+사용법:
+    # 기본 ViT 백본 특징으로 4개 카테고리 헤드 학습 → {카테고리}_specialist_model 저장
+    python train_specialist_heads.py --epochs 20
+
+    # 기존 전문가 모델의 (미세조정된) 백본은 그대로 두고 헤드만 재학습 (라벨 추가 후)
+    python train_specialist_heads.py --backbone specialist --categories 상의 하의
+
+    # 헤드 학습 후 전체 미세조정 1 에포크 이어서 실행
+    python train_specialist_heads.py --finetune-epochs 1
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.optim import AdamW
+from torch.utils.data import Dataset, DataLoader
+from PIL import Image
+from tqdm import tqdm
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CURRENT_DIR)
+
+from transformers import AutoImageProcessor, AutoModel
+from train_ViT_clothes_detail import (
+    SpecialistDataset, SpecialistClassifier, MODEL_NAME, BATCH_SIZE as FINETUNE_BATCH_SIZE,
+    train_end_to_end, save_specialist,
+)
+from final_pipeline import SPECIALIST_MODEL_PATHS, load_specialist
+from model_loader import load_state_dict
+
+BASE_DATA_DIR = os.path.join(CURRENT_DIR, 'specialist_data')
+FEATURE_STORE_DIR = os.path.join(CURRENT_DIR, 'feature_store')
+CATEGORIES = list(SPECIALIST_MODEL_PATHS.keys())
+HEAD_EPOCHS = 20
+HEAD_BATCH_SIZE = 256
+HEAD_LEARNING_RATE = 1e-3
+EXTRACT_BATCH_SIZE = 32
+VAL_RATIO = 0.1
+
+
+class ImageOnlyDataset(Dataset):
+    """특징 추출용: 이미지만 전처리 (깨진 파일은 다음 이미지로 넘기지 않고 valid=False로 표시)"""
+
+    def __init__(self, image_names, image_dir, processor):
+        self.image_names = image_names
+        self.image_dir = image_dir
+        self.processor = processor
+        self.image_size = processor.size.get('height', 224) if isinstance(processor.size, dict) else 224
+
+    def __len__(self):
+        return len(self.image_names)
+
+    def __getitem__(self, idx):
+        try:
+            image = Image.open(os.path.join(self.image_dir, self.image_names[idx])).convert("RGB")
+        except (FileNotFoundError, OSError):
+            return torch.zeros(3, self.image_size, self.image_size), False
+        return self.processor(images=image, return_tensors="pt").pixel_values.squeeze(0), True
+
+
+def backbone_id(backbone, category):
+    """
+    특징 캐시 식별자 - 백본 가중치가 바뀌면 캐시를 다시 만듦
+    - specialist: 체크포인트의 백본(body.*) 가중치 해시
+      (헤드만 재학습해서 같은 파일에 다시 저장해도 백본이 같으면 캐시 유지)
+    """
+    if backbone == 'base':
+        return f"base:{MODEL_NAME}"
+    state_dict = load_state_dict(SPECIALIST_MODEL_PATHS[category], 'cpu')
+    digest = hashlib.sha1()
+    for key in sorted(key for key in state_dict if key.startswith('body.')):
+        digest.update(key.encode('utf-8'))
+        digest.update(state_dict[key].contiguous().view(torch.uint8).numpy().tobytes())
+    return f"specialist:{digest.hexdigest()[:16]}"
+
+
+def load_backbone(backbone, category, device):
+    """base: 사전학습 ViT / specialist: 기존 전문가 모델의 미세조정된 백본"""
+    if backbone == 'base':
+        body = AutoModel.from_pretrained(MODEL_NAME)
+    else:
+        body = load_specialist(category, 'cpu')['model'].body
+    return body.to(device).eval()
+
+
+@torch.no_grad()
+def extract_into(body, dataset, features, valid, rows, device, num_workers):
+    """dataset 이미지의 CLS 특징을 features[rows[i]]에 기록"""
+    dataloader = DataLoader(
+        dataset, batch_size=EXTRACT_BATCH_SIZE, shuffle=False,
+        num_workers=num_workers, pin_memory=device.type == 'cuda'
+    )
+    offset = 0
+    for pixel_values, ok in tqdm(dataloader, desc="특징 추출 중"):
+        output = body(pixel_values=pixel_values.to(device, non_blocking=True)).last_hidden_state[:, 0, :]
+        target = rows[offset:offset + len(ok)]
+        features[target] = output.cpu().numpy().astype(np.float16)
+        valid[target] = ok.numpy()
+        offset += len(ok)
+
+
+def update_feature_store(category, image_names, image_dir, processor, backbone, device, num_workers):
+    """
+    카테고리 특징 캐시를 최신으로 맞춤
+    - feature_store/{카테고리}/features.npy: (이미지 수, hidden) float16 메모리 맵
+    - meta.json: 백본 식별자, 이미지 이름 순서, 깨진 이미지 표시
+    - 같은 백본으로 이미 추출한 이미지는 재사용, 새 이미지만 추출
+    반환: (읽기 전용 특징 메모리 맵, 이미지 이름 → 행 번호, valid 배열)
+    """
+    store_dir = os.path.join(FEATURE_STORE_DIR, category)
+    os.makedirs(store_dir, exist_ok=True)
+    features_path = os.path.join(store_dir, 'features.npy')
+    meta_path = os.path.join(store_dir, 'meta.json')
+    current_id = backbone_id(backbone, category)
+
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(features_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('backbone') != current_id:
+            print(f"-> '{category}' 백본이 바뀌어 특징 캐시를 새로 만듭니다.")
+            meta = None
+
+    cached_names = meta['image_names'] if meta else []
+    cached_rows = {name: row for row, name in enumerate(cached_names)}
+    missing = list(dict.fromkeys(name for name in image_names if name not in cached_rows))
+
+    if not missing:
+        print(f"-> '{category}' 특징 캐시 재사용 ({len(cached_names)}장)")
+        return np.load(features_path, mmap_mode='r'), cached_rows, np.array(meta['valid'], dtype=bool)
+
+    print(f"-> '{category}' 새 이미지 {len(missing)}장 특징 추출 (캐시 {len(cached_names)}장)")
+    body = load_backbone(backbone, category, device)
+    hidden_size = body.config.hidden_size
+    all_names = cached_names + missing
+
+    # 임시 파일에 기존 행 복사 + 새 행 추출 후 교체 (중간에 멈춰도 기존 캐시는 그대로)
+    tmp_path = os.path.join(store_dir, 'features.tmp.npy')
+    features = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float16, shape=(len(all_names), hidden_size))
+    valid = np.zeros(len(all_names), dtype=bool)
+    if meta:
+        old = np.load(features_path, mmap_mode='r')
+        for start in range(0, len(cached_names), 4096):
+            features[start:start + 4096] = old[start:start + 4096]
+        valid[:len(cached_names)] = meta['valid']
+        del old
+
+    rows = np.arange(len(cached_names), len(all_names))
+    extract_into(body, ImageOnlyDataset(missing, image_dir, processor), features, valid, rows, device, num_workers)
+    features.flush()
+    del features, body
+    os.replace(tmp_path, features_path)
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'backbone': current_id, 'image_names': all_names, 'valid': valid.tolist()}, f, ensure_ascii=False)
+
+    skipped = int((~valid[rows]).sum())
+    if skipped:
+        print(f"-> 열 수 없는 이미지 {skipped}장은 학습에서 제외")
+    return np.load(features_path, mmap_mode='r'), {name: row for row, name in enumerate(all_names)}, valid
+
+
+def train_heads(features, rows, labels, label_maps, device, epochs):
+    """
+    캐시된 특징으로 속성 헤드(선형층)만 학습
+    - rows: 학습에 쓸 특징 행 번호, labels: {속성: 라벨 배열} (rows와 같은 순서)
+    - 마지막 VAL_RATIO 만큼은 검증용으로 떼서 속성별 정확도 출력
+    """
+    hidden_size = features.shape[1]
+    heads = nn.ModuleDict({
+        col: nn.Linear(hidden_size, len(class_map))
+        for col, class_map in label_maps.items()
+    }).to(device)
+    loss_fn = nn.CrossEntropyLoss()
+    optimizer = AdamW(heads.parameters(), lr=HEAD_LEARNING_RATE)
+
+    generator = torch.Generator().manual_seed(0)
+    order = torch.randperm(len(rows), generator=generator).numpy()
+    n_val = int(len(order) * VAL_RATIO) if len(order) >= 20 else 0
+    val_idx, train_idx = order[:n_val], order[n_val:]
+
+    def batch(idx):
+        # 메모리 맵은 정렬된 행 순서로 읽는 편이 빠름
+        idx = np.sort(idx)
+        x = torch.from_numpy(np.asarray(features[rows[idx]], dtype=np.float32)).to(device)
+        y = {col: torch.from_numpy(labels[col][idx]).to(device) for col in label_maps}
+        return x, y
+
+    heads.train()
+    for epoch in range(epochs):
+        np.random.shuffle(train_idx)
+        total = 0.0
+        for start in range(0, len(train_idx), HEAD_BATCH_SIZE):
+            x, y = batch(train_idx[start:start + HEAD_BATCH_SIZE])
+            loss = 0
+            for col, head in heads.items():
+                loss += loss_fn(head(x), y[col])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item()
+        print(f"  에포크 {epoch + 1}/{epochs} - loss: {total:.4f}")
+    heads.eval()
+
+    if n_val:
+        with torch.no_grad():
+            correct = {col: 0 for col in label_maps}
+            for start in range(0, n_val, HEAD_BATCH_SIZE):
+                x, y = batch(val_idx[start:start + HEAD_BATCH_SIZE])
+                for col, head in heads.items():
+                    correct[col] += (head(x).argmax(-1) == y[col]).sum().item()
+        print("  검증 정확도: " + ", ".join(f"{col} {c / n_val:.1%}" for col, c in correct.items()))
+    return heads.cpu()
+
+
+def build_specialist(category, heads, label_maps, backbone):
+    """학습된 헤드 + 백본 → SpecialistClassifier (저장 형식은 train_ViT_clothes_detail.py와 동일)"""
+    if backbone == 'base':
+        model = SpecialistClassifier(label_maps)
+    else:
+        model = load_specialist(category, 'cpu')['model']
+    model.heads = heads
+    return model
+
+
+def run_category(category, processor, backbone, device, epochs, finetune_epochs, num_workers):
+    csv_path = os.path.join(BASE_DATA_DIR, f"{category}_metadata.csv")
+    image_dir = os.path.join(BASE_DATA_DIR, category)
+    if not os.path.exists(csv_path):
+        print(f"-> '{category}' 학습 데이터 없음, 건너뜀")
+        return None
+    if backbone == 'specialist' and not os.path.isdir(SPECIALIST_MODEL_PATHS[category]):
+        print(f"-> '{category}' 전문가 모델 없음 (--backbone base 로 먼저 학습하세요), 건너뜀")
+        return None
+
+    print(f"\n--- '{category}' ---")
+    timings = {}
+    # 라벨 인코딩은 기존 데이터셋 클래스를 그대로 사용 (저장되는 label_maps 형식 동일), 평가용 샘플 제외
+    dataset = SpecialistDataset(csv_path, image_dir, processor, split='train')
+    image_names = dataset.df['image_name'].tolist()
+
+    start = time.perf_counter()
+    features, name_rows, valid = update_feature_store(
+        category, image_names, image_dir, processor, backbone, device, num_workers
+    )
+    timings['extract'] = time.perf_counter() - start
+
+    rows = np.array([name_rows[name] for name in image_names], dtype=np.int64)
+    keep = valid[rows]
+    labels = {col: dataset.encoded_labels[col].to_numpy().astype(np.int64)[keep] for col in dataset.label_columns}
+
+    start = time.perf_counter()
+    heads = train_heads(features, rows[keep], labels, dataset.label_maps, device, epochs)
+    timings['heads'] = time.perf_counter() - start
+
+    model = build_specialist(category, heads, dataset.label_maps, backbone)
+    if finetune_epochs > 0:
+        start = time.perf_counter()
+        model.to(device)
+        dataloader = DataLoader(dataset, batch_size=FINETUNE_BATCH_SIZE, shuffle=True, num_workers=num_workers)
+        train_end_to_end(model, dataloader, device, finetune_epochs, desc=f"[{category}] ")
+        model.cpu()
+        timings['finetune'] = time.perf_counter() - start
+
+    save_specialist(model, dataset.label_maps, SPECIALIST_MODEL_PATHS[category])
+    print(f"-> '{category}' 저장 완료: {SPECIALIST_MODEL_PATHS[category]}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="특징 캐시 기반 전문가 헤드 학습")
+    parser.add_argument("--categories", nargs='+', default=CATEGORIES, choices=CATEGORIES)
+    parser.add_argument("--backbone", choices=['base', 'specialist'], default='base',
+                        help="base: 사전학습 ViT 특징 / specialist: 기존 전문가 모델 백본 특징 (헤드만 교체)")
+    parser.add_argument("--epochs", type=int, default=HEAD_EPOCHS, help="헤드 학습 에포크")
+    parser.add_argument("--finetune-epochs", type=int, default=0, help="헤드 학습 후 전체 미세조정 에포크 (0이면 생략)")
+    parser.add_argument("--num-workers", type=int, default=2, help="이미지 로딩 워커 수")
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"사용 장치: {device}, 백본: {args.backbone}")
+    processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
+
+    all_timings = {}
+    for category in args.categories:
+        timings = run_category(
+            category, processor, args.backbone, device, args.epochs, args.finetune_epochs, args.num_workers
+        )
+        if timings is not None:
+            all_timings[category] = timings
+
+    print("\n--- 소요 시간 (초) ---")
+    for category, timings in all_timings.items():
+        print(f"{category}: " + ", ".join(f"{name} {seconds:.1f}" for name, seconds in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
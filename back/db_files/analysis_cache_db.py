@@ -0,0 +1,135 @@
+import os
+import io
+import json
+import hashlib
+from PIL import Image
+from db_files.connection import connect
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
+
+# 근사 중복 검색 시 비교할 최근 캐시 항목 수
+PHASH_SCAN_LIMIT = 500
+
+def ensure_analysis_cache_table(conn):
+    """analysis_cache 테이블 생성 (기존 DB에도 적용되도록 사용 시점에 확인)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            AC_hash TEXT NOT NULL,
+            AC_modelVersion TEXT NOT NULL,
+            AC_phash TEXT,
+            AC_result TEXT NOT NULL,
+            AC_createDate DATE NOT NULL,
+            AC_hitCount INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (AC_hash, AC_modelVersion)
+        )
+    ''')
+
+def compute_content_hash(image_bytes):
+    """업로드 원본 바이트의 SHA-256 (완전 일치 판정)"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def compute_perceptual_hash(image_bytes):
+    """
+    64비트 difference hash (근사 중복 판정)
+    - 9x8 흑백으로 축소 후 좌우 밝기 차이의 부호를 비트로 사용
+    - 재압축/약간의 밝기 변화에도 값이 거의 같음
+    """
+    image = Image.open(io.BytesIO(image_bytes)).convert("L").resize((9, 8), Image.BILINEAR)
+    pixels = list(image.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | int(left > right)
+    return f"{bits:016x}"
+
+def _hamming_distance(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+def get_cached_analysis(content_hash, model_version, phash=None, max_distance=0):
+    """
+    캐시된 분석 결과 조회 (없으면 None)
+    - 같은 모델 버전의 결과만 사용
+    - max_distance > 0 이고 phash가 있으면 근사 중복도 허용
+    """
+    conn = connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        ensure_analysis_cache_table(conn)
+        cursor.execute('''
+            SELECT AC_hash, AC_result FROM analysis_cache
+            WHERE AC_hash = ? AND AC_modelVersion = ?
+        ''', (content_hash, model_version))
+        row = cursor.fetchone()
+
+        if row is None and phash and max_distance > 0:
+            cursor.execute('''
+                SELECT AC_hash, AC_result, AC_phash FROM analysis_cache
+                WHERE AC_modelVersion = ? AND AC_phash IS NOT NULL
+                ORDER BY AC_createDate DESC
+                LIMIT ?
+            ''', (model_version, PHASH_SCAN_LIMIT))
+            candidates = [
+                (_hamming_distance(phash, cached_phash), cached_hash, result)
+                for cached_hash, result, cached_phash in cursor.fetchall()
+            ]
+            candidates = [c for c in candidates if c[0] <= max_distance]
+            if candidates:
+                _, cached_hash, result = min(candidates)
+                row = (cached_hash, result)
+
+        if row is None:
+            return None
+
+        cursor.execute('''
+            UPDATE analysis_cache SET AC_hitCount = AC_hitCount + 1
+            WHERE AC_hash = ? AND AC_modelVersion = ?
+        ''', (row[0], model_version))
+        conn.commit()
+        return json.loads(row[1])
+
+    except Exception as e:
+        print(f"[DB] 분석 캐시 조회 실패: {e}")
+        return None
+    finally:
+        conn.close()
+
+def save_cached_analysis(content_hash, model_version, result, phash=None):
+    """분석 결과를 캐시에 저장"""
+    conn = connect(DB_PATH)
+
+    try:
+        ensure_analysis_cache_table(conn)
+        conn.execute('''
+            INSERT OR REPLACE INTO analysis_cache
+            (AC_hash, AC_modelVersion, AC_phash, AC_result, AC_createDate, AC_hitCount)
+            VALUES (?, ?, ?, ?, DATETIME('now'), 0)
+        ''', (content_hash, model_version, phash, json.dumps(result, ensure_ascii=False)))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"[DB] 분석 캐시 저장 실패: {e}")
+        return False
+    finally:
+        conn.close()
+
+def purge_stale_analysis_cache(model_version):
+    """현재 모델 버전이 아닌 캐시 항목 삭제 (가중치 교체 후 서버 시작 시 호출)"""
+    conn = connect(DB_PATH)
+
+    try:
+        ensure_analysis_cache_table(conn)
+        cursor = conn.execute('DELETE FROM analysis_cache WHERE AC_modelVersion != ?', (model_version,))
+        conn.commit()
+        if cursor.rowcount:
+            print(f"[DB] 이전 모델 버전의 분석 캐시 {cursor.rowcount}개 삭제")
+        return cursor.rowcount
+    except Exception as e:
+        conn.rollback()
+        print(f"[DB] 분석 캐시 정리 실패: {e}")
+        return 0
+    finally:
+        conn.close()
@@ -3,6 +3,7 @@ import os
 from datetime import datetime
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import generate_password_hash, check_password_hash
+from db_files.connection import connect
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
 
@@ -10,7 +11,7 @@ auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
 @auth_bp.route("/signup", methods=["POST"])
 def signup():
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     data = request.get_json(silent=True) or {}
@@ -50,7 +51,7 @@ def signup():
         
 @auth_bp.route("/login", methods=["POST"])
 def login():
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     conn.row_factory = sqlite3.Row
     
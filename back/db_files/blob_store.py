@@ -0,0 +1,263 @@
+import os
+import io
+import sys
+import time
+import base64
+import hashlib
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
+
+# 이미지 원본/썸네일 저장 위치 (내용의 SHA-256으로 저장 → 같은 사진은 한 번만 저장)
+BLOB_STORE_DIR = os.getenv(
+    "BLOB_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads', 'blobs')
+)
+# 자동 생성할 WebP 썸네일 크기 (긴 변 픽셀) / 품질
+BLOB_THUMBNAIL_SIZES = tuple(int(size) for size in os.getenv("BLOB_THUMBNAIL_SIZES", "128,256,512").split(','))
+BLOB_THUMBNAIL_QUALITY = int(os.getenv("BLOB_THUMBNAIL_QUALITY", "80"))
+# 저장 직후 백그라운드에서 썸네일 미리 생성 (0이면 첫 요청 때 생성)
+BLOB_EAGER_THUMBNAILS = os.getenv("BLOB_EAGER_THUMBNAILS", "1") == "1"
+# 어디서도 참조하지 않는 이미지를 지우기 전 유예 시간 (업로드 후 저장 전, 입어보기 사진 등)
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", str(24 * 3600)))
+
+# 이미지 제공 API 경로 (routes/images.py)
+BLOB_URL_PREFIX = '/api/images/'
+
+# 파일 앞부분 → MIME 타입
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF8', 'image/gif'),
+]
+
+def is_blob_hash(value):
+    return isinstance(value, str) and len(value) == 64 and all(c in '0123456789abcdef' for c in value)
+
+def blob_url(image_hash, size=None):
+    return BLOB_URL_PREFIX + image_hash + (f'?size={size}' if size else '')
+
+def image_url_sql(alias=''):
+    """응답의 image_url (해시가 있으면 이미지 API 경로, 없으면 기존 CI_imageURL)"""
+    return (f"CASE WHEN {alias}CI_imageHash IS NOT NULL "
+            f"THEN '{BLOB_URL_PREFIX}' || {alias}CI_imageHash ELSE {alias}CI_imageURL END")
+
+def guess_mimetype(head):
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+def decode_data_url(url):
+    """'data:image/...;base64,...' → 바이트 (data URL이 아니면 None)"""
+    if not isinstance(url, str) or not url.startswith('data:') or ';base64,' not in url[:100]:
+        return None
+    return base64.b64decode(url.split(',', 1)[1])
+
+class BlobStore:
+    """
+    내용 주소 기반 이미지 저장소
+    - 원본: {root}/{해시 앞 2자리}/{해시}, 썸네일: 같은 폴더의 {해시}_{크기}.webp
+    - 같은 내용은 같은 경로 → 중복 저장 없음, 한 번 쓴 파일은 바뀌지 않으므로 오래 캐시해도 됨
+    - DB에는 해시(CI_imageHash)만 저장, 어디서도 참조하지 않는 파일은 collect_garbage()로 정리
+    """
+
+    def __init__(self, root=BLOB_STORE_DIR, thumbnail_sizes=BLOB_THUMBNAIL_SIZES, eager_thumbnails=BLOB_EAGER_THUMBNAILS):
+        self.root = root
+        self.thumbnail_sizes = thumbnail_sizes
+        self.eager_thumbnails = eager_thumbnails
+        self._thumbnail_writer = None
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, image_hash):
+        return os.path.join(self.root, image_hash[:2], image_hash)
+
+    def thumbnail_file(self, image_hash, size):
+        return os.path.join(self.root, image_hash[:2], f'{image_hash}_{size}.webp')
+
+    def exists(self, image_hash):
+        return os.path.exists(self.path(image_hash))
+
+    def _write(self, path, data):
+        """
+        임시 파일에 쓴 뒤 교체 (쓰는 도중인 파일을 읽지 않도록)
+        - 임시 파일은 쓸 때마다 새 이름 (같은 사진/썸네일을 여러 스레드가 동시에 써도 서로 덮어쓰지 않음)
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, data):
+        """이미지 저장 후 해시 반환 (이미 있으면 수정 시각만 갱신 → GC 유예 시간 다시 시작)"""
+        image_hash = hashlib.sha256(data).hexdigest()
+        path = self.path(image_hash)
+        if os.path.exists(path):
+            os.utime(path)
+            return image_hash
+
+        self._write(path, data)
+        if self.eager_thumbnails:
+            if self._thumbnail_writer is None:
+                self._thumbnail_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnail-writer")
+            self._thumbnail_writer.submit(self.make_thumbnails, image_hash)
+        return image_hash
+
+    def make_thumbnails(self, image_hash, sizes=None):
+        """WebP 썸네일 생성 (이미 있는 크기는 건너뜀), 실패 시 False"""
+        sizes = [size for size in (sizes or self.thumbnail_sizes) if not os.path.exists(self.thumbnail_file(image_hash, size))]
+        if not sizes:
+            return True
+        try:
+            from PIL import Image
+            with Image.open(self.path(image_hash)) as image:
+                image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+                for size in sorted(sizes, reverse=True):
+                    image.thumbnail((size, size), Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    image.save(buffer, 'WEBP', quality=BLOB_THUMBNAIL_QUALITY)
+                    self._write(self.thumbnail_file(image_hash, size), buffer.getvalue())
+            return True
+        except Exception as e:
+            print(f"[DB] 썸네일 생성 실패 ({image_hash[:12]}): {e}")
+            return False
+
+    def thumbnail_path(self, image_hash, size):
+        """썸네일 경로 (없으면 생성, 실패하면 None)"""
+        path = self.thumbnail_file(image_hash, size)
+        if os.path.exists(path) or self.make_thumbnails(image_hash, [size]):
+            return path
+        return None
+
+    def iter_blobs(self):
+        """(해시, 경로, 크기, 수정 시각) - 원본만"""
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                continue
+            for file_name in os.listdir(directory):
+                if is_blob_hash(file_name):
+                    path = os.path.join(directory, file_name)
+                    stat = os.stat(path)
+                    yield file_name, path, stat.st_size, stat.st_mtime
+
+    def delete(self, image_hash):
+        """원본과 썸네일 삭제, 지운 바이트 수 반환"""
+        freed = 0
+        directory = os.path.join(self.root, image_hash[:2])
+        for file_name in os.listdir(directory) if os.path.isdir(directory) else []:
+            if file_name.startswith(image_hash):
+                path = os.path.join(directory, file_name)
+                freed += os.path.getsize(path)
+                os.remove(path)
+        return freed
+
+    def collect_garbage(self, referenced, grace_seconds=BLOB_GC_GRACE_SECONDS):
+        """referenced에 없고 grace_seconds보다 오래된 이미지 삭제"""
+        cutoff = time.time() - grace_seconds
+        total = removed = freed = 0
+        for image_hash, _, _, mtime in list(self.iter_blobs()):
+            total += 1
+            if image_hash in referenced or mtime > cutoff:
+                continue
+            freed += self.delete(image_hash)
+            removed += 1
+        return {"blobs": total, "removed": removed, "freed_mb": round(freed / (1024 ** 2), 2)}
+
+    def stats(self):
+        count = size = 0
+        for _, _, blob_size, _ in self.iter_blobs():
+            count += 1
+            size += blob_size
+        return {"blobs": count, "size_mb": round(size / (1024 ** 2), 2)}
+
+blob_store = BlobStore()
+
+def store_image_url(image_url, allow_blob_path=False):
+    """
+    저장할 이미지 URL → (CI_imageHash, CI_imageURL)
+    - data URL이면 저장소에 넣고 (해시, '') → DB에는 해시만
+    - 이미 저장소에 있는 이미지 경로(/api/images/<해시>)면 (해시, '')
+      allow_blob_path가 True(신뢰하는 호출자)이거나, 해시를 받아 허용 여부를 돌려주는 함수가 True일 때만
+      (클라이언트가 보낸 경로를 그대로 받으면 다른 사용자 이미지도 자기 옷에 연결할 수 있음)
+    - 외부 URL 등, 허용하지 않은 저장소 경로는 기존처럼 (None, URL)
+    """
+    if allow_blob_path and isinstance(image_url, str) and image_url.startswith(BLOB_URL_PREFIX):
+        image_hash = image_url[len(BLOB_URL_PREFIX):].split('?', 1)[0]
+        if (is_blob_hash(image_hash) and (allow_blob_path is True or allow_blob_path(image_hash))
+                and blob_store.exists(image_hash)):
+            return image_hash, ''
+    data = decode_data_url(image_url)
+    if data is None:
+        return None, image_url
+    return blob_store.put(data), ''
+
+def referenced_image_hashes(cursor):
+    cursor.execute('SELECT DISTINCT CI_imageHash FROM clothing_information WHERE CI_imageHash IS NOT NULL')
+    return {row[0] for row in cursor.fetchall()}
+
+def collect_garbage(db_path=DB_PATH, grace_seconds=BLOB_GC_GRACE_SECONDS):
+    """DB에서 참조하지 않는 이미지 정리"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        referenced = referenced_image_hashes(conn.cursor())
+    finally:
+        conn.close()
+    result = blob_store.collect_garbage(referenced, grace_seconds)
+    print(f"[DB] 이미지 정리: {result['blobs']}개 중 {result['removed']}개 삭제 ({result['freed_mb']} MB)")
+    return result
+
+def backfill_image_hashes(db_path=DB_PATH, batch_size=100):
+    """
+    기존 옷의 data URL(CI_imageURL)을 저장소로 옮기고 해시만 남김
+    - batch_size개씩 읽고 커밋 (큰 data URL을 한꺼번에 메모리에 올리지 않음)
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    moved = 0
+    last_id = 0
+    try:
+        while True:
+            rows = conn.execute('''
+                SELECT CI_id, CI_imageURL FROM clothing_information
+                WHERE CI_id > ? AND CI_imageHash IS NULL AND CI_imageURL LIKE 'data:%'
+                ORDER BY CI_id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            updates = []
+            for ci_id, image_url in rows:
+                image_hash, stored_url = store_image_url(image_url)
+                if image_hash:
+                    updates.append((image_hash, stored_url, ci_id))
+            conn.executemany('UPDATE clothing_information SET CI_imageHash = ?, CI_imageURL = ? WHERE CI_id = ?', updates)
+            conn.commit()
+            moved += len(updates)
+            last_id = rows[-1][0]
+            print(f"[DB] 이미지 이동: {moved}개")
+    finally:
+        conn.close()
+    print(f"[DB] 이미지 이동 완료: {moved}개 (DB 파일 크기를 줄이려면 VACUUM 실행)")
+    return moved
+
+if __name__ == '__main__':
+    # back 폴더에서: python -m db_files.blob_store [backfill|gc|stats]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'backfill':
+        backfill_image_hashes()
+    elif command == 'gc':
+        collect_garbage()
+    else:
+        print(blob_store.stats())
@@ -1,59 +1,219 @@
 import sqlite3
 import os
+import json
+import base64
+import threading
 from datetime import datetime
-from flask import session, jsonify
+from flask import session, jsonify, g
+from db_files.connection import connect
+from db_files.wardrobe_cache import get_wardrobe_cache
+from db_files.embedding_index import (
+    embedding_index,
+    decode_embedding,
+    save_embeddings,
+    delete_embedding
+)
+from db_files.clothing_search import facet_row, save_facets, delete_facets, search_clothing, DETAILS_SQL
+from db_files.blob_store import store_image_url, image_url_sql
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
 
+# 옷장 조회 응답 필드 → SELECT 컬럼 (id는 항상 포함)
+WARDROBE_FIELDS = ('id', 'main_category', 'sub_category', 'details', 'created_at', 'image_url')
+WARDROBE_COLUMNS = {
+    'main_category': 'ci.CI_mainCategory',
+    'sub_category': 'ci.CI_subCategory',
+    'created_at': 'ci.CI_createDate',
+    # 이미지 저장소에 있는 옷은 /api/images/<해시>
+    'image_url': image_url_sql('ci.'),
+    # 속성은 옷마다 CI_id 인덱스로 묶어서 JSON 하나로
+    'details': DETAILS_SQL,
+}
+
+def build_wardrobe_query(fields=WARDROBE_FIELDS, after=False, limit=False):
+    """
+    옷장 조회 쿼리 (최신순) - 정렬은 (User_id, CI_createDate, CI_id) 인덱스 순서 그대로
+    - fields에 없는 컬럼은 읽지 않음 (이미지 URL 등 큰 값 제외 가능)
+    - after: 키셋 페이지네이션 (CI_createDate, CI_id) < (?, ?), limit: LIMIT ?
+    - 결과 행: (CI_id, CI_createDate, *선택한 필드) → 다음 페이지 커서용 날짜를 항상 포함
+    """
+    columns = ['ci.CI_id', 'ci.CI_createDate'] + [WARDROBE_COLUMNS[field] for field in fields if field in WARDROBE_COLUMNS]
+    query = f'''
+    SELECT {', '.join(columns)}
+    FROM clothing_information ci
+    WHERE ci.User_id = ?{' AND (ci.CI_createDate, ci.CI_id) < (?, ?)' if after else ''}
+    ORDER BY ci.CI_createDate DESC, ci.CI_id DESC{' LIMIT ?' if limit else ''}
+'''
+    return query
+
+# 옷장 전체 조회 (fetch_wardrobe) - test_query_plans.py에서 인덱스 사용 여부 확인
+WARDROBE_QUERY = build_wardrobe_query()
+
+def wardrobe_changed(user_id):
+    """
+    옷 저장/삭제 커밋 후 호출 - 캐시된 옷장 메모리를 바로 해제
+    (옷장 버전은 DB 트리거가 올리므로 이 함수를 부르지 않는 다른 프로세스의 저장도 ETag/캐시에 반영됨)
+    """
+    get_wardrobe_cache().invalidate(user_id)
+
 def get_current_user_id():
     """현재 세션의 사용자 ID 반환 (없으면 None)"""
     user = session.get("user")
     if not user:
         return None
     
+    # 같은 요청 안에서는 한 번만 조회
+    cached = g.get('_current_user')
+    if cached and cached[0] == user["id"]:
+        return cached[1]
+    
     # 이메일(user_id)로 DB의 User_id 조회
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("SELECT User_id FROM User WHERE User_email = ?", (user["id"],))
     result = cursor.fetchone()
     conn.close()
     
-    return result[0] if result else None
+    user_id = result[0] if result else None
+    g._current_user = (user["id"], user_id)
+    return user_id
 
-def insert_clothing_for_current_user(image_url, main_category, sub_category, attributes_dict):
-    """현재 세션 사용자의 옷 저장"""
+def user_owns_image(user_id, image_hash):
+    """사용자의 옷 중 이미지 저장소 해시를 참조하는 행이 있는지 (이미지 제공 API 권한 확인)"""
+    conn = connect(DB_PATH)
+    try:
+        row = conn.execute(
+            'SELECT 1 FROM clothing_information WHERE CI_imageHash = ? AND User_id = ? LIMIT 1',
+            (image_hash, user_id)
+        ).fetchone()
+        return row is not None
+    finally:
+        conn.close()
+
+# 속성 이름 → A_id (attributes 테이블은 거의 바뀌지 않으므로 프로세스에서 한 번만 로드)
+_attribute_ids = None
+_attribute_ids_lock = threading.Lock()
+
+def get_attribute_ids(cursor, names=()):
+    """
+    속성 이름 → A_id 딕셔너리
+    - 처음 호출할 때 한 번 로드
+    - names 중 모르는 이름이 있으면 행 개수만 확인해서, 다른 곳에서 속성이 추가된 경우에만 다시 로드
+      (프론트가 항상 보내는 '카테고리'처럼 등록되지 않은 이름 때문에 매번 전체를 읽지 않음)
+    """
+    global _attribute_ids
+    with _attribute_ids_lock:
+        attribute_ids = _attribute_ids
+    if attribute_ids is not None and any(name not in attribute_ids for name in names):
+        cursor.execute('SELECT COUNT(*) FROM attributes')
+        if cursor.fetchone()[0] != len(attribute_ids):
+            attribute_ids = None
+    if attribute_ids is None:
+        cursor.execute('SELECT A_name, A_id FROM attributes')
+        attribute_ids = dict(cursor.fetchall())
+        with _attribute_ids_lock:
+            _attribute_ids = attribute_ids
+    return attribute_ids
+
+def invalidate_attribute_ids():
+    """attributes 테이블 변경 후 호출 (다음 조회 때 다시 로드)"""
+    global _attribute_ids
+    with _attribute_ids_lock:
+        _attribute_ids = None
+
+def insert_clothing_rows(cursor, user_id, items, allow_blob_path=False):
+    """
+    옷 여러 개 INSERT (호출한 쪽 트랜잭션 안에서 실행)
+    - clothing_information은 옷마다 INSERT (CI_id 필요), 속성은 전체를 executemany 한 번으로
+    - items: [{'image_url', 'main_category', 'sub_category', 'attributes'}, ...]
+    - data URL 이미지는 이미지 저장소에 넣고 해시(CI_imageHash)만 저장 (같은 사진을 공유하는 옷은 한 번만)
+    - allow_blob_path: 저장소 경로(/api/images/<해시>)를 해시로 연결할지 (blob_store.store_image_url 참고,
+      클라이언트가 보낸 옷 저장 요청은 기본값 False)
+    - 'created_at'(선택, 가져오기용): 원래 등록일 유지 (없으면 오늘, 속성 수정일도 같은 날짜)
+    반환: 저장된 CI_id 리스트 (items 순서)
+    """
+    names = {attr_name for item in items for attr_name in item['attributes']}
+    attribute_ids = get_attribute_ids(cursor, names)
+    
+    ci_ids = []
+    attribute_rows = []
+    facet_rows = []
+    stored_images = {}
+    for item in items:
+        if item['image_url'] not in stored_images:
+            stored_images[item['image_url']] = store_image_url(item['image_url'], allow_blob_path)
+        image_hash, image_url = stored_images[item['image_url']]
+        created_at = item.get('created_at')
+        cursor.execute('''
+            INSERT INTO clothing_information 
+            (User_id, CI_imageURL, CI_imageHash, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
+            VALUES (?, ?, ?, ?, ?, COALESCE(?, DATE('now')), ?)
+        ''', (user_id, image_url, image_hash, item['main_category'], item['sub_category'], created_at, 1))
+        ci_id = cursor.lastrowid
+        ci_ids.append(ci_id)
+        
+        # 등록되지 않은 속성 이름은 기존처럼 저장하지 않음
+        attribute_rows.extend(
+            (ci_id, attribute_ids[attr_name], attr_value, created_at)
+            for attr_name, attr_value in item['attributes'].items()
+            if attr_name in attribute_ids
+        )
+        facet_rows.append(facet_row(ci_id, user_id, item['main_category'], item['sub_category'], item['attributes'], created_at))
+    
+    cursor.executemany('''
+        INSERT INTO clothing_attributes 
+        (CI_id, A_id, CA_value, CA_updateDate)
+        VALUES (?, ?, ?, COALESCE(?, DATE('now')))
+    ''', attribute_rows)
+    # 검색용 투영(clothing_facet)도 같은 트랜잭션에서
+    save_facets(cursor, facet_rows)
+    return ci_ids
+
+def insert_clothing_for_current_user(image_url, main_category, sub_category, attributes_dict,
+                                     embedding=None, allow_duplicate=False):
+    """
+    현재 세션 사용자의 옷 저장
+    - embedding(분석 결과의 base64 임베딩)이 있으면 같은 카테고리의 거의 같은 옷이 이미 있는지 확인 (409)
+    - allow_duplicate=True면 중복이어도 저장
+    """
     user_id = get_current_user_id()
     
     if not user_id:
         return jsonify(ok=False, message="로그인이 필요합니다."), 401
     
-    conn = sqlite3.connect(DB_PATH)
+    vector = decode_embedding(embedding)
+    if vector is not None and not allow_duplicate:
+        duplicate = embedding_index.find_duplicate(user_id, vector, main_category)
+        if duplicate:
+            print(f"[DB] 사용자 {user_id}의 중복 의심 옷 (CI_id: {duplicate[0]}, 유사도: {duplicate[1]:.3f})")
+            return jsonify(
+                ok=False,
+                duplicate=True,
+                duplicate_of=duplicate[0],
+                similarity=round(duplicate[1], 4),
+                message="이미 비슷한 옷이 옷장에 있습니다."
+            ), 409
+    
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
-        # 1. clothing_information 테이블에 INSERT
-        cursor.execute('''
-            INSERT INTO clothing_information 
-            (User_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
-            VALUES (?, ?, ?, ?, DATE('now'), ?)
-        ''', (user_id, image_url, main_category, sub_category, 1))
+        # 1. clothing_information + clothing_attributes INSERT
+        ci_id = insert_clothing_rows(cursor, user_id, [{
+            'image_url': image_url,
+            'main_category': main_category,
+            'sub_category': sub_category,
+            'attributes': attributes_dict
+        }])[0]
         
-        ci_id = cursor.lastrowid
-        
-        # 2. clothing_attributes 테이블에 INSERT
-        for attr_name, attr_value in attributes_dict.items():
-            cursor.execute('SELECT A_id FROM attributes WHERE A_name = ?', (attr_name,))
-            result = cursor.fetchone()
-            
-            if result:
-                a_id = result[0]
-                cursor.execute('''
-                    INSERT INTO clothing_attributes 
-                    (CI_id, A_id, CA_value, CA_updateDate)
-                    VALUES (?, ?, ?, DATE('now'))
-                ''', (ci_id, a_id, attr_value))
+        # 2. 유사 아이템 검색용 임베딩
+        if vector is not None:
+            save_embeddings(cursor, user_id, [(ci_id, main_category, vector)])
         
         conn.commit()
+        wardrobe_changed(user_id)
+        if vector is not None:
+            embedding_index.invalidate(user_id)
         print(f"[DB] 사용자 {user_id}의 옷 저장 완료! (CI_id: {ci_id})")
         return jsonify(ok=True, ci_id=ci_id)
         
@@ -64,49 +224,161 @@ def insert_clothing_for_current_user(image_url, main_category, sub_category, att
     finally:
         conn.close()
 
-def get_current_user_clothing():
-    """현재 세션 사용자의 모든 옷 조회"""
+def insert_clothing_batch_for_current_user(items, allow_duplicate=False):
+    """
+    현재 세션 사용자의 옷 여러 개를 한 번의 요청/트랜잭션으로 저장 (사진 한 장의 옷 전체 등)
+    - items: [{'image_url', 'main_category', 'sub_category', 'attributes', 'embedding'(선택), 'allow_duplicate'(선택)}, ...]
+    - 중복 의심 옷은 저장하지 않고 duplicates로 돌려줌 (allow_duplicate=True면 확인 없이 저장)
+    반환: saved [{index, ci_id}], duplicates [{index, duplicate_of, similarity}]
+    """
     user_id = get_current_user_id()
     
     if not user_id:
-        return jsonify(ok=False, message="로그인이 필요합니다.", authenticated=False), 401
+        return jsonify(ok=False, message="로그인이 필요합니다."), 401
+    
+    to_save = []
+    duplicates = []
+    for index, item in enumerate(items):
+        vector = decode_embedding(item.get('embedding'))
+        if vector is not None and not (allow_duplicate or item.get('allow_duplicate')):
+            duplicate = embedding_index.find_duplicate(user_id, vector, item['main_category'])
+            if duplicate:
+                duplicates.append({
+                    'index': index,
+                    'duplicate_of': duplicate[0],
+                    'similarity': round(duplicate[1], 4)
+                })
+                continue
+        to_save.append((index, item, vector))
+    
+    if not to_save:
+        return jsonify(ok=True, saved=[], duplicates=duplicates)
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
-        cursor.execute('''
-            SELECT CI_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate
-            FROM clothing_information
-            WHERE User_id = ?
-            ORDER BY CI_createDate DESC
-        ''', (user_id,))
+        ci_ids = insert_clothing_rows(cursor, user_id, [
+            {
+                'image_url': item['image_url'],
+                'main_category': item['main_category'],
+                'sub_category': item['sub_category'],
+                'attributes': item['attributes']
+            }
+            for _, item, _ in to_save
+        ])
         
-        clothing_list = cursor.fetchall()
-        result = []
+        embeddings = [
+            (ci_id, item['main_category'], vector)
+            for ci_id, (_, item, vector) in zip(ci_ids, to_save) if vector is not None
+        ]
+        if embeddings:
+            save_embeddings(cursor, user_id, embeddings)
         
-        for clothing in clothing_list:
-            ci_id, image_url, main_category, sub_category, create_date = clothing
-            
-            # 각 의류의 속성 조회
-            cursor.execute('''
-                SELECT a.A_name, ca.CA_value
-                FROM clothing_attributes ca
-                JOIN attributes a ON ca.A_id = a.A_id
-                WHERE ca.CI_id = ?
-            ''', (ci_id,))
-            
-            attributes = cursor.fetchall()
-            details = {attr_name: attr_value for attr_name, attr_value in attributes}
-            
-            result.append({
-                'id': ci_id,
-                'main_category': main_category,
-                'sub_category': sub_category,
-                'details': details,
-                'created_at': create_date,
-                'image_url': image_url
-            })
+        conn.commit()
+        wardrobe_changed(user_id)
+        if embeddings:
+            embedding_index.invalidate(user_id)
+        print(f"[DB] 사용자 {user_id}의 옷 {len(ci_ids)}개 저장 완료 (중복 의심 {len(duplicates)}개)")
+        return jsonify(
+            ok=True,
+            saved=[{'index': index, 'ci_id': ci_id} for ci_id, (index, _, _) in zip(ci_ids, to_save)],
+            duplicates=duplicates
+        )
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"[DB] 옷 일괄 저장 실패: {e}")
+        return jsonify(ok=False, message="옷 저장에 실패했습니다."), 500
+    finally:
+        conn.close()
+
+def _wardrobe_rows_to_items(rows, fields):
+    selected = [field for field in fields if field in WARDROBE_COLUMNS]
+    items = []
+    for row in rows:
+        item = {'id': row[0]}
+        for field, value in zip(selected, row[2:]):
+            item[field] = json.loads(value) if field == 'details' else value
+        items.append(item)
+    return items
+
+def fetch_wardrobe(cursor, user_id, fields=WARDROBE_FIELDS):
+    """
+    사용자의 모든 옷 + 속성을 쿼리 한 번으로 조회 (옷마다 속성 쿼리를 따로 하지 않음)
+    - 속성은 json_group_object로 옷 한 행에 묶어서 받음 (이미지 URL이 속성 수만큼 반복되지 않음)
+    - 반환: [{'id', 'main_category', 'sub_category', 'details', 'created_at', 'image_url'}, ...] (최신순)
+    """
+    cursor.execute(build_wardrobe_query(fields), (user_id,))
+    return _wardrobe_rows_to_items(cursor.fetchall(), fields)
+
+def encode_wardrobe_cursor(create_date, ci_id):
+    """다음 페이지 커서 (마지막 옷의 날짜, CI_id) → URL에 그대로 쓸 수 있는 문자열"""
+    return base64.urlsafe_b64encode(json.dumps([create_date, ci_id]).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_wardrobe_cursor(page_cursor):
+    """잘못된 커서면 ValueError"""
+    try:
+        padded = page_cursor + '=' * (-len(page_cursor) % 4)
+        create_date, ci_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(create_date), int(ci_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("잘못된 커서입니다.")
+
+def fetch_wardrobe_page(cursor, user_id, limit, page_cursor=None, fields=WARDROBE_FIELDS):
+    """
+    옷장 한 페이지 (키셋 페이지네이션 - 앞 페이지 개수와 상관없이 인덱스에서 바로 이어서 읽음)
+    반환: (옷 리스트, 다음 페이지 커서 또는 None)
+    """
+    params = [user_id]
+    if page_cursor:
+        params.extend(decode_wardrobe_cursor(page_cursor))
+    # 한 개 더 읽어서 다음 페이지가 있는지 확인
+    params.append(limit + 1)
+    cursor.execute(build_wardrobe_query(fields, after=bool(page_cursor), limit=True), params)
+    rows = cursor.fetchall()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_wardrobe_cursor(rows[-1][1], rows[-1][0])
+    return _wardrobe_rows_to_items(rows, fields), next_cursor
+
+def load_wardrobe(user_id):
+    """사용자 옷장 전체 (옷장 캐시 → 없으면 DB)"""
+    def load():
+        conn = connect(DB_PATH)
+        try:
+            return fetch_wardrobe(conn.cursor(), user_id)
+        finally:
+            conn.close()
+    return get_wardrobe_cache().get_or_load(user_id, load)
+
+def paginate_wardrobe(items, limit, page_cursor=None, fields=WARDROBE_FIELDS):
+    """캐시된 옷장(최신순)에서 fetch_wardrobe_page와 같은 페이지를 잘라냄"""
+    start = 0
+    if page_cursor:
+        after = decode_wardrobe_cursor(page_cursor)
+        start = next(
+            (i for i, item in enumerate(items) if (item['created_at'], item['id']) < after),
+            len(items)
+        )
+    page = items[start:start + limit]
+    next_cursor = None
+    if start + limit < len(items):
+        next_cursor = encode_wardrobe_cursor(page[-1]['created_at'], page[-1]['id'])
+    selected = [field for field in fields if field in WARDROBE_COLUMNS]
+    return [dict({'id': item['id']}, **{field: item[field] for field in selected}) for item in page], next_cursor
+
+def get_current_user_clothing():
+    """현재 세션 사용자의 모든 옷 조회"""
+    user_id = get_current_user_id()
+    
+    if not user_id:
+        return jsonify(ok=False, message="로그인이 필요합니다.", authenticated=False), 401
+    
+    try:
+        result = load_wardrobe(user_id)
         
         print(f"[DB] 사용자 {user_id}의 옷 {len(result)}개 조회 완료")
         return jsonify(ok=True, clothing=result)
@@ -114,6 +386,68 @@ def get_current_user_clothing():
     except Exception as e:
         print(f"[DB] 조회 실패: {e}")
         return jsonify(ok=False, message="조회에 실패했습니다."), 500
+
+def get_current_user_clothing_page(limit, page_cursor=None, fields=WARDROBE_FIELDS):
+    """현재 세션 사용자의 옷장 한 페이지 (next_cursor가 None이면 마지막 페이지)"""
+    user_id = get_current_user_id()
+    
+    if not user_id:
+        return jsonify(ok=False, message="로그인이 필요합니다.", authenticated=False), 401
+    
+    # 옷장 전체가 이미 캐시에 있으면 DB 없이 잘라서 응답 (첫 페이지를 위해 전체를 읽지는 않음)
+    cached = get_wardrobe_cache().peek(user_id)
+    if cached is not None:
+        try:
+            result, next_cursor = paginate_wardrobe(cached, limit, page_cursor, fields)
+        except ValueError as e:
+            return jsonify(ok=False, message=str(e)), 400
+        print(f"[DB] 사용자 {user_id}의 옷 {len(result)}개 조회 완료 (캐시)")
+        return jsonify(ok=True, clothing=result, next_cursor=next_cursor, has_more=next_cursor is not None)
+    
+    conn = connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        result, next_cursor = fetch_wardrobe_page(cursor, user_id, limit, page_cursor, fields)
+        
+        print(f"[DB] 사용자 {user_id}의 옷 {len(result)}개 조회 완료 (다음 페이지: {'있음' if next_cursor else '없음'})")
+        return jsonify(ok=True, clothing=result, next_cursor=next_cursor, has_more=next_cursor is not None)
+        
+    except ValueError as e:
+        return jsonify(ok=False, message=str(e)), 400
+    except Exception as e:
+        print(f"[DB] 조회 실패: {e}")
+        return jsonify(ok=False, message="조회에 실패했습니다."), 500
+    finally:
+        conn.close()
+
+def search_current_user_clothing(filters, facets, min_style_prob=None, limit=50, text=None, page_cursor=None,
+                                 include_details=False):
+    """
+    현재 세션 사용자의 옷 패싯 검색 (clothing_facet, 결과 + 전체 개수 + 패싯별 개수)
+    - page_cursor: 이전 응답의 next_cursor (옷장 조회와 같은 형식, next_cursor가 None이면 마지막 페이지)
+    """
+    user_id = get_current_user_id()
+    
+    if not user_id:
+        return jsonify(ok=False, message="로그인이 필요합니다.", authenticated=False), 401
+    
+    conn = connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        after = decode_wardrobe_cursor(page_cursor) if page_cursor else None
+        result = search_clothing(cursor, user_id, filters, facets, min_style_prob, limit, text, after, include_details)
+        next_after = result.pop('next_after')
+        next_cursor = encode_wardrobe_cursor(*next_after) if next_after else None
+        print(f"[DB] 사용자 {user_id} 옷 검색: {result['total']}개 (필터: {filters}, 검색어: {text})")
+        return jsonify(ok=True, next_cursor=next_cursor, has_more=next_cursor is not None, **result)
+        
+    except ValueError as e:
+        return jsonify(ok=False, message=str(e)), 400
+    except Exception as e:
+        print(f"[DB] 검색 실패: {e}")
+        return jsonify(ok=False, message="검색에 실패했습니다."), 500
     finally:
         conn.close()
 
@@ -124,7 +458,7 @@ def delete_current_user_clothing(ci_id):
     if not user_id:
         return jsonify(ok=False, message="로그인이 필요합니다."), 401
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
@@ -138,13 +472,19 @@ def delete_current_user_clothing(ci_id):
         if result[0] != user_id:
             return jsonify(ok=False, message="삭제 권한이 없습니다."), 403
         
-        # 2. clothing_attributes에서 삭제
+        # 2. clothing_attributes, clothing_facet에서 삭제
         cursor.execute('DELETE FROM clothing_attributes WHERE CI_id = ?', (ci_id,))
+        delete_facets(cursor, ci_id)
         
         # 3. clothing_information에서 삭제
         cursor.execute('DELETE FROM clothing_information WHERE CI_id = ?', (ci_id,))
         
+        # 4. 임베딩 삭제
+        delete_embedding(cursor, ci_id)
+        
         conn.commit()
+        wardrobe_changed(user_id)
+        embedding_index.invalidate(user_id)
         print(f"[DB] 사용자 {user_id}의 CI_id {ci_id} 삭제 완료")
         return jsonify(ok=True)
         
@@ -155,9 +495,56 @@ def delete_current_user_clothing(ci_id):
     finally:
         conn.close()
 
+def get_similar_clothing_for_current_user(ci_id, k=5):
+    """현재 세션 사용자의 옷장에서 ci_id와 비슷한 옷 k개 (같은 카테고리, 유사도 순)"""
+    user_id = get_current_user_id()
+    
+    if not user_id:
+        return jsonify(ok=False, message="로그인이 필요합니다.", authenticated=False), 401
+    
+    stored = embedding_index.get_vector(ci_id)
+    if stored is None or stored[0] != user_id:
+        return jsonify(ok=False, message="임베딩이 없는 의류입니다."), 404
+    
+    _, category, vector = stored
+    matches = embedding_index.search(user_id, vector, k=k, category=category, exclude=ci_id)
+    if not matches:
+        return jsonify(ok=True, similar=[])
+    
+    conn = connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        placeholders = ','.join('?' * len(matches))
+        cursor.execute(f'''
+            SELECT CI_id, {image_url_sql()}, CI_mainCategory, CI_subCategory, CI_createDate
+            FROM clothing_information
+            WHERE CI_id IN ({placeholders}) AND User_id = ?
+        ''', [match_id for match_id, _ in matches] + [user_id])
+        rows = {row[0]: row for row in cursor.fetchall()}
+        
+        similar = [
+            {
+                'id': match_id,
+                'similarity': round(similarity, 4),
+                'main_category': rows[match_id][2],
+                'sub_category': rows[match_id][3],
+                'created_at': rows[match_id][4],
+                'image_url': rows[match_id][1]
+            }
+            for match_id, similarity in matches if match_id in rows
+        ]
+        return jsonify(ok=True, similar=similar)
+        
+    except Exception as e:
+        print(f"[DB] 유사 아이템 조회 실패: {e}")
+        return jsonify(ok=False, message="조회에 실패했습니다."), 500
+    finally:
+        conn.close()
+
 def insert_user(email, password, nickname):
     """사용자 정보를 DB에 저장"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
@@ -177,21 +564,24 @@ def insert_user(email, password, nickname):
 
 def insert_clothing(user_id, image_url, main_category, sub_category):
     """옷 정보를 DB에 저장"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
+    image_hash, image_url = store_image_url(image_url)
     cursor.execute('''
         INSERT INTO clothing_information 
-        (User_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
-        VALUES (?, ?, ?, ?, DATE('now'), ?)
-    ''', (user_id, image_url, main_category, sub_category, 1))
+        (User_id, CI_imageURL, CI_imageHash, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
+        VALUES (?, ?, ?, ?, ?, DATE('now'), ?)
+    ''', (user_id, image_url, image_hash, main_category, sub_category, 1))
+    save_facets(cursor, [facet_row(cursor.lastrowid, user_id, main_category, sub_category, {})])
     
     conn.commit()
+    wardrobe_changed(user_id)
     conn.close()
 
 def get_user_clothing(user_id):
     """사용자의 모든 옷 조회"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -204,7 +594,7 @@ def get_user_clothing(user_id):
 
 def get_all_users():
     """모든 사용자 조회"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -222,7 +612,7 @@ def get_all_users():
 
 def insert_attributes():
     """옷 속성 데이터를 DB에 미리 저장"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     # 모든 속성 목록 (카테고리, 메인 분류 제외)
@@ -250,6 +640,7 @@ def insert_attributes():
             ''', (attr,))
         
         conn.commit()
+        invalidate_attribute_ids()
         print("속성 데이터 저장 완료!")
         return True
     except Exception as e:
@@ -260,7 +651,7 @@ def insert_attributes():
 
 def get_all_attributes():
     """모든 속성 조회"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('SELECT A_id, A_name FROM attributes')
@@ -294,35 +685,20 @@ def insert_clothing_with_attributes(user_id, image_url, main_category, sub_categ
         '서브색상': '없음'
     }
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
-        # 1. clothing_information 테이블에 INSERT
-        cursor.execute('''
-            INSERT INTO clothing_information 
-            (User_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
-            VALUES (?, ?, ?, ?, DATE('now'), ?)
-        ''', (user_id, image_url, main_category, sub_category, 1))
-        
-        # 방금 INSERT된 의류의 ID 가져오기
-        ci_id = cursor.lastrowid
-        
-        # 2. clothing_attributes 테이블에 INSERT (반복)
-        for attr_name, attr_value in attributes_dict.items():
-            # 속성 이름으로 A_id 조회
-            cursor.execute('SELECT A_id FROM attributes WHERE A_name = ?', (attr_name,))
-            result = cursor.fetchone()
-            
-            if result:
-                a_id = result[0]
-                cursor.execute('''
-                    INSERT INTO clothing_attributes 
-                    (CI_id, A_id, CA_value, CA_updateDate)
-                    VALUES (?, ?, ?, DATE('now'))
-                ''', (ci_id, a_id, attr_value))
+        # clothing_information + clothing_attributes INSERT
+        ci_id = insert_clothing_rows(cursor, user_id, [{
+            'image_url': image_url,
+            'main_category': main_category,
+            'sub_category': sub_category,
+            'attributes': attributes_dict
+        }])[0]
         
         conn.commit()
+        wardrobe_changed(user_id)
         print(f"옷 정보 저장 완료! (CI_id: {ci_id})")
         return ci_id
         
@@ -333,9 +709,55 @@ def insert_clothing_with_attributes(user_id, image_url, main_category, sub_categ
     finally:
         conn.close()
 
+def get_user_id_by_email(email):
+    """이메일로 User_id 조회 (없으면 None)"""
+    conn = connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT User_id FROM User WHERE User_email = ?", (email,))
+    result = cursor.fetchone()
+    conn.close()
+    
+    return result[0] if result else None
+
+def insert_clothing_items(user_id, items):
+    """
+    여러 옷을 한 번의 트랜잭션으로 저장 (대량 등록용)
+    
+    items: [{'image_url', 'main_category', 'sub_category', 'attributes', 'embedding'(선택)}, ...]
+    반환: 저장된 CI_id 리스트 (실패 시 전체 롤백 후 예외)
+    """
+    conn = connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        ci_ids = insert_clothing_rows(cursor, user_id, items)
+        
+        embeddings = [
+            (ci_id, item['main_category'], decode_embedding(item.get('embedding')))
+            for ci_id, item in zip(ci_ids, items)
+        ]
+        embeddings = [row for row in embeddings if row[2] is not None]
+        if embeddings:
+            save_embeddings(cursor, user_id, embeddings)
+        
+        conn.commit()
+        wardrobe_changed(user_id)
+        if embeddings:
+            embedding_index.invalidate(user_id)
+        print(f"[DB] 사용자 {user_id}의 옷 {len(ci_ids)}개 일괄 저장 완료")
+        return ci_ids
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"[DB] 일괄 저장 실패: {e}")
+        raise
+    finally:
+        conn.close()
+
 def get_all_clothing():
     """모든 의류 정보 조회"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('SELECT * FROM clothing_information')
@@ -350,7 +772,7 @@ def get_all_clothing():
 
 def get_clothing_attributes(ci_id):
     """특정 의류의 속성 조회"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -371,7 +793,7 @@ def get_clothing_attributes(ci_id):
 
 def get_all_clothing_with_attributes():
     """모든 의류와 해당 속성 조회 (종합)"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('SELECT CI_id FROM clothing_information')
@@ -384,7 +806,7 @@ def get_all_clothing_with_attributes():
 
 def check_database_contents():
     """DB의 모든 테이블 내용을 상세하게 확인"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     print("\n" + "="*80)
@@ -401,13 +823,13 @@ def check_database_contents():
     else:
         print("  (데이터 없음)")
     
-    # 2. clothing_information 테이블 (CI_imageURL 제외)
+    # 2. clothing_information 테이블 (CI_imageURL 제외, 이미지 저장소 해시는 앞 12자리만)
     print("\n [clothing_information 테이블]")
-    cursor.execute('SELECT CI_id, User_id, CI_mainCategory, CI_subCategory, CI_createDate, CI_check FROM clothing_information')
+    cursor.execute('SELECT CI_id, User_id, CI_mainCategory, CI_subCategory, CI_createDate, CI_check, CI_imageHash FROM clothing_information')
     clothing_info = cursor.fetchall()
     if clothing_info:
         for cloth in clothing_info:
-            print(f"  CI_id: {cloth[0]}, User_id: {cloth[1]}, MainCategory: {cloth[2]}, SubCategory: {cloth[3]}, Created: {cloth[4]}, Check: {cloth[5]}")
+            print(f"  CI_id: {cloth[0]}, User_id: {cloth[1]}, MainCategory: {cloth[2]}, SubCategory: {cloth[3]}, Created: {cloth[4]}, Check: {cloth[5]}, Image: {(cloth[6] or '-')[:12]}")
     else:
         print("  (데이터 없음)")
     
@@ -466,48 +888,8 @@ def check_database_contents():
 # llm에 넣어서 처리
 def get_user_clothing_with_attributes(user_id):
     """사용자의 모든 옷과 속성을 조회"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     try:
-        # 사용자의 모든 의류 조회
-        cursor.execute('''
-            SELECT CI_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate
-            FROM clothing_information
-            WHERE User_id = ?
-            ORDER BY CI_createDate DESC
-        ''', (user_id,))
-        
-        clothing_list = cursor.fetchall()
-        result = []
-        
-        for clothing in clothing_list:
-            ci_id, image_url, main_category, sub_category, create_date = clothing
-            
-            # 각 의류의 속성 조회
-            cursor.execute('''
-                SELECT a.A_name, ca.CA_value
-                FROM clothing_attributes ca
-                JOIN attributes a ON ca.A_id = a.A_id
-                WHERE ca.CI_id = ?
-            ''', (ci_id,))
-            
-            attributes = cursor.fetchall()
-            
-            # 속성을 딕셔너리로 변환
-            details = {}
-            for attr_name, attr_value in attributes:
-                details[attr_name] = attr_value
-            
-            # 결과에 추가
-            result.append({
-                'id': ci_id,
-                'main_category': main_category,
-                'sub_category': sub_category,
-                'details': details,
-                'created_at': create_date,
-                'image_url': image_url
-            })
+        result = load_wardrobe(user_id)
         
         print(f"[DB] 사용자 {user_id}의 옷 {len(result)}개 조회 완료")
         print(result)
@@ -516,22 +898,31 @@ def get_user_clothing_with_attributes(user_id):
     except Exception as e:
         print(f"[DB] 조회 실패: {str(e)}")
         return []
-    finally:
-        conn.close()
 
 def delete_clothing(ci_id):
     """의류 삭제 (속성도 함께 삭제)"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
-        # 1. clothing_attributes 테이블에서 먼저 삭제 (외래키 제약)
+        # 검색 캐시는 사용자 단위이므로 소유자를 먼저 확인
+        cursor.execute('SELECT User_id FROM clothing_information WHERE CI_id = ?', (ci_id,))
+        owner = cursor.fetchone()
+        
+        # 1. clothing_attributes, clothing_facet 테이블에서 먼저 삭제 (외래키 제약)
         cursor.execute('DELETE FROM clothing_attributes WHERE CI_id = ?', (ci_id,))
+        delete_facets(cursor, ci_id)
         
         # 2. clothing_information 테이블에서 삭제
         cursor.execute('DELETE FROM clothing_information WHERE CI_id = ?', (ci_id,))
         
+        # 3. 임베딩 삭제
+        delete_embedding(cursor, ci_id)
+        
         conn.commit()
+        if owner:
+            wardrobe_changed(owner[0])
+            embedding_index.invalidate(owner[0])
         print(f"[DB] CI_id {ci_id} 삭제 완료")
         return True
         
@@ -544,7 +935,7 @@ def delete_clothing(ci_id):
 
 def insert_test_data():
     """테스트용 의류 데이터 3개 삽입"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
@@ -0,0 +1,203 @@
+import re
+import json
+from db_files.blob_store import image_url_sql
+
+# 검색 파라미터 이름 → clothing_facet 컬럼 (패싯 집계 대상)
+FACET_COLUMNS = {
+    'main_category': 'CF_mainCategory',
+    'sub_category': 'CF_subCategory',
+    'color': 'CF_color',
+    'sub_color': 'CF_subColor',
+    'fit': 'CF_fit',
+    'material': 'CF_material',
+    'print': 'CF_print',
+    'length': 'CF_length',
+    'sleeve': 'CF_sleeve',
+    'neckline': 'CF_neckline',
+    'collar': 'CF_collar',
+    'detail': 'CF_detail',
+    'style': 'CF_style1',
+}
+# clothing_attributes 속성 이름 → 패싯 이름
+ATTRIBUTE_FACETS = {
+    '색상': 'color',
+    '서브색상': 'sub_color',
+    '핏': 'fit',
+    '소재': 'material',
+    '프린트': 'print',
+    '기장': 'length',
+    '소매기장': 'sleeve',
+    '넥라인': 'neckline',
+    '옷깃': 'collar',
+    '디테일': 'detail',
+}
+STYLE_ATTRIBUTES = ['추천 스타일 1순위', '추천 스타일 2순위', '추천 스타일 3순위']
+STYLE_PATTERN = re.compile(r'^(.*?)\s*\(확률:\s*([\d.]+)%\)\s*$')
+
+# 검색어(?q=)로 찾는 컬럼 (카테고리 + 속성 값 + 스타일 이름)
+TEXT_SEARCH_COLUMNS = list(dict.fromkeys(list(FACET_COLUMNS.values()) + ['CF_style2', 'CF_style3']))
+# 옷장 카드에 그대로 쓰는 속성 전체 ({속성 이름: 값}, 옷장 조회의 details와 같은 값)
+DETAILS_SQL = '''(SELECT json_group_object(a.A_name, ca.CA_value)
+            FROM clothing_attributes ca
+            JOIN attributes a ON a.A_id = ca.A_id
+            WHERE ca.CI_id = ci.CI_id)'''
+
+FACET_ROW_COLUMNS = [
+    'CI_id', 'User_id', 'CF_mainCategory', 'CF_subCategory',
+    'CF_color', 'CF_subColor', 'CF_fit', 'CF_material', 'CF_print', 'CF_length',
+    'CF_sleeve', 'CF_neckline', 'CF_collar', 'CF_detail',
+    'CF_style1', 'CF_style1Prob', 'CF_style2', 'CF_style2Prob', 'CF_style3', 'CF_style3Prob',
+]
+
+def parse_style_value(value):
+    """'모던 (확률: 70.17%)' → ('모던', 70.17), 확률이 없으면 (값, None)"""
+    if value is None:
+        return None, None
+    match = STYLE_PATTERN.match(str(value))
+    if not match:
+        return str(value), None
+    return match.group(1), float(match.group(2))
+
+def facet_row(ci_id, user_id, main_category, sub_category, attributes, created_at=None):
+    """저장하는 옷 한 개 → clothing_facet 행 (FACET_ROW_COLUMNS 순서 + CF_createDate, None이면 오늘)"""
+    by_facet = {facet: attributes.get(name) for name, facet in ATTRIBUTE_FACETS.items()}
+    styles = []
+    for name in STYLE_ATTRIBUTES:
+        styles.extend(parse_style_value(attributes.get(name)))
+    return (
+        ci_id, user_id, main_category, sub_category,
+        by_facet['color'], by_facet['sub_color'], by_facet['fit'], by_facet['material'],
+        by_facet['print'], by_facet['length'], by_facet['sleeve'], by_facet['neckline'],
+        by_facet['collar'], by_facet['detail'],
+        *styles,
+        created_at,
+    )
+
+def save_facets(cursor, rows):
+    """clothing_facet 저장 (호출한 쪽 트랜잭션 안에서, clothing_attributes INSERT와 함께)"""
+    cursor.executemany(f'''
+        INSERT OR REPLACE INTO clothing_facet ({', '.join(FACET_ROW_COLUMNS)}, CF_createDate)
+        VALUES ({', '.join('?' * len(FACET_ROW_COLUMNS))}, COALESCE(?, DATE('now')))
+    ''', rows)
+
+def delete_facets(cursor, ci_id):
+    """clothing_facet 삭제 (호출한 쪽 트랜잭션 안에서)"""
+    cursor.execute('DELETE FROM clothing_facet WHERE CI_id = ?', (ci_id,))
+
+def _filter_clause(filters, min_style_prob, skip=None, alias='', text=None):
+    """
+    (SQL 조건, 파라미터) - skip 패싯의 필터는 빼고 (해당 패싯의 다른 값 개수를 보여주기 위해)
+    - text: 카테고리/속성 값/스타일 이름 중 하나라도 포함하면 일치 (대소문자 구분, 부분 문자열)
+    """
+    clauses, params = [], []
+    for facet, values in filters.items():
+        if facet == skip or not values:
+            continue
+        clauses.append(f"{alias}{FACET_COLUMNS[facet]} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if min_style_prob is not None and skip != 'style':
+        clauses.append(f'{alias}CF_style1Prob >= ?')
+        params.append(min_style_prob)
+    if text:
+        clauses.append('(' + ' OR '.join(f'instr({alias}{column}, ?) > 0' for column in TEXT_SEARCH_COLUMNS) + ')')
+        params.extend([text] * len(TEXT_SEARCH_COLUMNS))
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+def build_facet_count_query(user_id, filters, facets, min_style_prob=None, text=None):
+    """
+    패싯별 값 개수를 쿼리 한 번으로 (UNION ALL)
+    - 각 패싯은 자기 자신을 제외한 나머지 필터를 적용한 개수 (값을 바꿔 고를 때 결과 수를 미리 보여줌)
+    반환: (SQL, 파라미터), 결과 행: (패싯, 값, 개수)
+    """
+    parts, params = [], []
+    for facet in facets:
+        column = FACET_COLUMNS[facet]
+        where, where_params = _filter_clause(filters, min_style_prob, skip=facet, text=text)
+        parts.append(f'''
+        SELECT '{facet}', {column}, COUNT(*)
+        FROM clothing_facet
+        WHERE User_id = ? AND {column} IS NOT NULL{where}
+        GROUP BY {column}''')
+        params.extend([user_id] + where_params)
+    return '\n        UNION ALL'.join(parts), params
+
+def build_search_query(user_id, filters, min_style_prob=None, limit=50, text=None, after=None, include_details=False):
+    """
+    조건에 맞는 옷 (최신순) - 이미지 URL 등은 clothing_information에서 PRIMARY KEY로
+    - after: (CF_createDate, CI_id) 키셋 페이지네이션 (이전 페이지 마지막 옷 다음부터)
+    - include_details: 옷마다 전체 속성(details)을 JSON으로 함께 (옷장 화면용)
+    - 결과 행: (CI_id, 이미지 URL, CI_createDate, CF_createDate, [details], *FACET_ROW_COLUMNS[2:])
+    """
+    where, params = _filter_clause(filters, min_style_prob, alias='cf.', text=text)
+    if after:
+        where += ' AND (cf.CF_createDate, cf.CI_id) < (?, ?)'
+        params.extend(after)
+    details = f'{DETAILS_SQL}, ' if include_details else ''
+    sql = f'''
+        SELECT cf.CI_id, {image_url_sql('ci.')}, ci.CI_createDate, cf.CF_createDate, {details}{', '.join('cf.' + column for column in FACET_ROW_COLUMNS[2:])}
+        FROM clothing_facet cf
+        JOIN clothing_information ci ON ci.CI_id = cf.CI_id
+        WHERE cf.User_id = ?{where}
+        ORDER BY cf.CF_createDate DESC, cf.CI_id DESC
+        LIMIT ?
+    '''
+    return sql, [user_id] + params + [limit]
+
+def build_count_query(user_id, filters, min_style_prob=None, text=None):
+    where, params = _filter_clause(filters, min_style_prob, text=text)
+    return f'SELECT COUNT(*) FROM clothing_facet WHERE User_id = ?{where}', [user_id] + params
+
+def search_clothing(cursor, user_id, filters, facets, min_style_prob=None, limit=50, text=None, after=None,
+                    include_details=False):
+    """
+    패싯 검색
+    - filters: {패싯: [값, ...]} (같은 패싯 안은 OR, 패싯끼리는 AND)
+    - facets: 개수를 집계할 패싯 이름 리스트
+    - text: 검색어 (_filter_clause 참고), after: 이전 결과의 next_after (다음 페이지)
+    반환: {'total', 'items', 'facets': {패싯: {값: 개수}}, 'next_after': 다음 페이지 키 또는 None}
+    """
+    sql, params = build_count_query(user_id, filters, min_style_prob, text)
+    total = cursor.execute(sql, params).fetchone()[0]
+
+    # 한 개 더 읽어서 다음 페이지가 있는지 확인
+    sql, params = build_search_query(user_id, filters, min_style_prob, limit + 1, text, after, include_details)
+    rows = cursor.execute(sql, params).fetchall()
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = (rows[-1][3], rows[-1][0])
+
+    items = []
+    for row in rows:
+        ci_id, image_url, create_date = row[:3]
+        columns = row[5:] if include_details else row[4:]
+        values = dict(zip(FACET_ROW_COLUMNS[2:], columns))
+        item = {
+            'id': ci_id,
+            'main_category': values['CF_mainCategory'],
+            'sub_category': values['CF_subCategory'],
+            'created_at': create_date,
+            'image_url': image_url,
+            'attributes': {
+                facet: values[column]
+                for facet, column in FACET_COLUMNS.items()
+                if facet not in ('main_category', 'sub_category', 'style')
+            },
+            'styles': [
+                {'name': values[f'CF_style{rank}'], 'probability': values[f'CF_style{rank}Prob']}
+                for rank in (1, 2, 3) if values[f'CF_style{rank}']
+            ],
+        }
+        if include_details:
+            item['details'] = json.loads(row[4]) if row[4] else {}
+        items.append(item)
+
+    facet_counts = {facet: {} for facet in facets}
+    if facets:
+        sql, params = build_facet_count_query(user_id, filters, facets, min_style_prob, text)
+        for facet, value, count in cursor.execute(sql, params).fetchall():
+            facet_counts[facet][value] = count
+        for facet in facet_counts:
+            facet_counts[facet] = dict(sorted(facet_counts[facet].items(), key=lambda kv: -kv[1]))
+
+    return {'total': total, 'items': items, 'facets': facet_counts, 'next_after': next_after}
@@ -0,0 +1,131 @@
+import sqlite3
+import os
+import threading
+from flask import g, has_request_context
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
+
+# 다른 연결이 쓰기 중일 때 바로 "database is locked"로 실패하지 않고 기다리는 시간
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# 연결마다 캐시해두는 prepared statement 수 (풀에서 재사용되므로 요청이 바뀌어도 유지)
+STATEMENT_CACHE_SIZE = int(os.getenv("SQLITE_STATEMENT_CACHE_SIZE", "256"))
+# 반납된 연결을 닫지 않고 보관할 최대 개수 (DB 파일별)
+POOL_MAX_IDLE = int(os.getenv("SQLITE_POOL_MAX_IDLE", "8"))
+
+def _open_connection(db_path):
+    """
+    새 연결 생성
+    - WAL: 읽기와 쓰기가 서로 막지 않음 (쓰기끼리만 순서대로)
+    - synchronous=NORMAL: WAL에서는 커밋마다 fsync하지 않아도 DB가 깨지지 않음
+    - 풀에서 스레드 간에 넘겨주므로 check_same_thread=False (동시에 두 스레드가 쓰지는 않음)
+    """
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False
+    )
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    return conn
+
+class ConnectionPool:
+    """DB 파일 하나의 연결 풀 (반납된 연결을 닫지 않고 다음 요청에서 재사용)"""
+
+    def __init__(self, db_path, max_idle=POOL_MAX_IDLE):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+            self.opened += 1
+        return _open_connection(self.db_path)
+
+    def release(self, conn):
+        """커밋 안 된 트랜잭션은 롤백 후 보관 (보관 개수를 넘으면 닫음)"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {"idle": len(self._idle), "opened": self.opened, "reused": self.reused}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path=DB_PATH):
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+        return pool
+
+class PooledConnection:
+    """
+    sqlite3.Connection 처럼 쓰는 핸들 (cursor/execute/commit/rollback 그대로)
+    - close()는 연결을 닫지 않고 풀에 반납
+    - 요청 안에서 얻은 핸들은 요청 전체가 연결 하나를 공유 → close()는 아무것도 하지 않고 요청 종료 때 반납
+    """
+
+    def __init__(self, conn, pool, request_scoped):
+        self._conn = conn
+        self._pool = pool
+        self._request_scoped = request_scoped
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._request_scoped or self._conn is None:
+            return
+        self._pool.release(self._conn)
+        self._conn = None
+
+def connect(db_path=DB_PATH):
+    """
+    sqlite3.connect(DB_PATH) 대체
+    - Flask 요청 안: 요청 단위로 연결 하나를 재사용 (get_current_user_id + 저장/조회가 같은 연결)
+    - 요청 밖 (백그라운드 작업, CLI): 풀에서 빌려오고 close() 때 반납
+    """
+    pool = get_pool(db_path)
+    if not has_request_context():
+        return PooledConnection(pool.acquire(), pool, request_scoped=False)
+
+    connections = g.setdefault('_sqlite_connections', {})
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = pool.acquire()
+    return PooledConnection(conn, pool, request_scoped=True)
+
+def release_request_connections(exception=None):
+    """요청 종료 시 요청에서 쓴 연결을 풀에 반납 (teardown_request)"""
+    connections = g.pop('_sqlite_connections', None)
+    if not connections:
+        return
+    for db_path, conn in connections.items():
+        get_pool(db_path).release(conn)
+
+def init_app(app):
+    app.teardown_request(release_request_connections)
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {os.path.basename(pool.db_path): pool.stats() for pool in pools}
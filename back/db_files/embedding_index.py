@@ -0,0 +1,172 @@
+import os
+import base64
+import threading
+from collections import OrderedDict
+import numpy as np
+from db_files.connection import connect
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
+
+# 같은 카테고리에서 코사인 유사도가 이 값 이상이면 "이미 가진 옷"으로 판단
+DUPLICATE_SIMILARITY_THRESHOLD = float(os.getenv("DUPLICATE_SIMILARITY_THRESHOLD", "0.95"))
+# 메모리에 행렬을 올려둘 최대 사용자 수 (오래 안 쓴 사용자부터 해제)
+EMBEDDING_CACHE_USERS = int(os.getenv("EMBEDDING_CACHE_USERS", "256"))
+# 검색 시 float16 → float32 변환 단위 (행)
+SEARCH_CHUNK_ROWS = 4096
+
+def ensure_embedding_table(conn):
+    """clothing_embedding 테이블 생성 (기존 DB에도 적용되도록 사용 시점에 확인)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS clothing_embedding (
+            CI_id INTEGER PRIMARY KEY,
+            User_id INTEGER NOT NULL,
+            CE_category TEXT,
+            CE_vector BLOB NOT NULL,
+            CE_createDate DATE NOT NULL,
+            FOREIGN KEY (CI_id) REFERENCES clothing_information(CI_id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_clothing_embedding_user ON clothing_embedding (User_id)')
+
+def decode_embedding(embedding):
+    """분석 결과의 base64 float16 임베딩 → numpy 벡터 (없거나 잘못된 값이면 None)"""
+    if not embedding:
+        return None
+    try:
+        vector = np.frombuffer(base64.b64decode(embedding), dtype=np.float16)
+    except (ValueError, TypeError):
+        return None
+    return vector if vector.size else None
+
+def save_embeddings(cursor, user_id, rows):
+    """
+    임베딩 저장 (호출한 쪽 트랜잭션 안에서 실행, 커밋 후 embedding_index.invalidate 호출 필요)
+    rows: [(CI_id, 카테고리, float16 벡터), ...]
+    """
+    ensure_embedding_table(cursor.connection)
+    cursor.executemany('''
+        INSERT OR REPLACE INTO clothing_embedding (CI_id, User_id, CE_category, CE_vector, CE_createDate)
+        VALUES (?, ?, ?, ?, DATE('now'))
+    ''', [(ci_id, user_id, category, np.asarray(vector, dtype=np.float16).tobytes()) for ci_id, category, vector in rows])
+
+def delete_embedding(cursor, ci_id):
+    """임베딩 삭제 (호출한 쪽 트랜잭션 안에서 실행)"""
+    ensure_embedding_table(cursor.connection)
+    cursor.execute('DELETE FROM clothing_embedding WHERE CI_id = ?', (ci_id,))
+
+class EmbeddingIndex:
+    """
+    사용자별 옷장 임베딩 검색
+    - DB의 clothing_embedding 이 원본, 사용자별 float16 행렬을 메모리에 캐시
+    - 검색 범위가 사용자 한 명의 옷장이라 수만 개도 내적 한 번(수 ms)으로 처리
+    """
+
+    def __init__(self, db_path=DB_PATH, max_users=EMBEDDING_CACHE_USERS):
+        self.db_path = db_path
+        self.max_users = max_users
+        self._users = OrderedDict()  # user_id → {차원: (CI_id 배열, 카테고리 배열, float16 행렬)}
+        self._generations = {}  # user_id → 무효화 횟수 (로드 중에 무효화되면 캐시에 넣지 않음)
+        self._lock = threading.Lock()
+
+    def _load_user(self, user_id):
+        with self._lock:
+            if user_id in self._users:
+                self._users.move_to_end(user_id)
+                return self._users[user_id]
+            generation = self._generations.get(user_id, 0)
+
+        conn = connect(self.db_path)
+        try:
+            ensure_embedding_table(conn)
+            rows = conn.execute(
+                'SELECT CI_id, CE_category, CE_vector FROM clothing_embedding WHERE User_id = ?', (user_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        # 모델이 바뀌어 차원이 다른 벡터가 섞여 있을 수 있으므로 차원별로 나눠서 보관
+        groups = {}
+        for ci_id, category, blob in rows:
+            vector = np.frombuffer(blob, dtype=np.float16)
+            groups.setdefault(vector.size, []).append((ci_id, category, vector))
+        entry = {
+            dim: (
+                np.array([row[0] for row in group], dtype=np.int64),
+                np.array([row[1] for row in group], dtype=object),
+                np.stack([row[2] for row in group]),
+            )
+            for dim, group in groups.items()
+        }
+
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return entry
+            self._users[user_id] = entry
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id):
+        """옷 추가/삭제 후 해당 사용자 캐시 제거 (다음 검색 때 다시 로드)"""
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def search(self, user_id, vector, k=5, category=None, exclude=None):
+        """
+        코사인 유사도 상위 k개 [(CI_id, 유사도), ...]
+        - category가 있으면 같은 카테고리만 (전문가 모델별로 특징 공간이 다름)
+        - exclude: 결과에서 뺄 CI_id (기준 아이템 자신)
+        """
+        group = self._load_user(user_id).get(vector.size)
+        if group is None:
+            return []
+        ci_ids, categories, matrix = group
+
+        query = vector.astype(np.float32)
+        scores = np.concatenate([
+            matrix[start:start + SEARCH_CHUNK_ROWS].astype(np.float32) @ query
+            for start in range(0, len(matrix), SEARCH_CHUNK_ROWS)
+        ])
+        if category is not None:
+            scores[categories != category] = -np.inf
+        if exclude is not None:
+            scores[ci_ids == exclude] = -np.inf
+
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ci_ids[i]), float(scores[i])) for i in top]
+
+    def find_duplicate(self, user_id, vector, category, threshold=DUPLICATE_SIMILARITY_THRESHOLD):
+        """같은 카테고리에서 가장 비슷한 옷이 threshold 이상이면 (CI_id, 유사도), 아니면 None"""
+        matches = self.search(user_id, vector, k=1, category=category)
+        if matches and matches[0][1] >= threshold:
+            return matches[0]
+        return None
+
+    def get_vector(self, ci_id):
+        """저장된 아이템의 (User_id, 카테고리, 벡터) (없으면 None)"""
+        conn = connect(self.db_path)
+        try:
+            ensure_embedding_table(conn)
+            row = conn.execute(
+                'SELECT User_id, CE_category, CE_vector FROM clothing_embedding WHERE CI_id = ?', (ci_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return row[0], row[1], np.frombuffer(row[2], dtype=np.float16)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_users": len(self._users),
+                "cached_items": sum(len(group[0]) for entry in self._users.values() for group in entry.values()),
+            }
+
+embedding_index = EmbeddingIndex()
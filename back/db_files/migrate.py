@@ -0,0 +1,96 @@
+"""
+smart_closet.db 스키마 마이그레이션
+- db_files/migrations/NNNN_이름.sql 을 번호 순서대로 한 번씩 적용
+- 적용한 버전은 schema_version 테이블에 기록 (이미 적용된 스크립트는 건너뜀)
+- 스크립트 하나는 트랜잭션 하나 (실패하면 그 스크립트 전체 롤백, 버전도 기록 안 됨)
+
+사용법:
+    python -m db_files.migrate            # 남은 마이그레이션 적용
+    python -m db_files.migrate --status   # 현재 버전/대기 중인 스크립트 확인
+"""
+import argparse
+import os
+import re
+import sqlite3
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_([\w-]+)\.sql$')
+
+def ensure_schema_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            SV_version INTEGER PRIMARY KEY,
+            SV_name TEXT NOT NULL,
+            SV_appliedDate DATETIME NOT NULL
+        )
+    ''')
+    conn.commit()
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """[(버전, 이름, 경로), ...] 버전 순"""
+    migrations = []
+    for file_name in os.listdir(migrations_dir):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(migrations_dir, file_name)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"마이그레이션 버전 번호가 중복됩니다: {versions}")
+    return migrations
+
+def get_schema_version(conn):
+    """적용된 가장 높은 버전 (없으면 0)"""
+    ensure_schema_version_table(conn)
+    row = conn.execute('SELECT MAX(SV_version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+def migrate(db_path=DB_PATH, migrations_dir=MIGRATIONS_DIR):
+    """남은 마이그레이션 적용 후 최종 버전 반환"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        current = get_schema_version(conn)
+        for version, name, path in list_migrations(migrations_dir):
+            if version <= current:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                script = f.read()
+            try:
+                # executescript는 자체 COMMIT을 하므로 BEGIN ~ COMMIT 을 스크립트 안에 넣어 한 트랜잭션으로 실행
+                conn.executescript(
+                    'BEGIN;\n' + script + '\n;'
+                    f"INSERT INTO schema_version (SV_version, SV_name, SV_appliedDate) VALUES ({version}, '{name}', DATETIME('now'));\n"
+                    'COMMIT;'
+                )
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise RuntimeError(f"마이그레이션 {version:04d}_{name} 실패: {e}") from e
+            current = version
+            print(f"[DB] 마이그레이션 적용: {version:04d}_{name}")
+        return current
+    finally:
+        conn.close()
+
+def status(db_path=DB_PATH, migrations_dir=MIGRATIONS_DIR):
+    conn = sqlite3.connect(db_path)
+    try:
+        current = get_schema_version(conn)
+    finally:
+        conn.close()
+    pending = [f"{version:04d}_{name}" for version, name, _ in list_migrations(migrations_dir) if version > current]
+    return current, pending
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="smart_closet.db 마이그레이션")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--status", action='store_true', help="적용하지 않고 상태만 출력")
+    args = parser.parse_args()
+
+    if args.status:
+        current, pending = status(args.db)
+        print(f"현재 스키마 버전: {current}")
+        print(f"대기 중: {', '.join(pending) if pending else '없음'}")
+    else:
+        print(f"스키마 버전: {migrate(args.db)}")
@@ -0,0 +1,56 @@
+-- 기존 init_db.py 스키마 (이미 만들어진 DB에는 아무 변화 없음)
+CREATE TABLE IF NOT EXISTS User (
+    User_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    User_email TEXT NOT NULL UNIQUE,
+    User_password TEXT NOT NULL,
+    User_nickname TEXT NOT NULL,
+    User_createDate DATE NOT NULL,
+    User_updateDate DATE NOT NULL,
+    User_gender TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS clothing_information (
+    CI_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    User_id INTEGER NOT NULL,
+    CI_imageURL TEXT NOT NULL,
+    CI_mainCategory TEXT NOT NULL,
+    CI_subCategory TEXT NOT NULL,
+    CI_createDate DATE NOT NULL,
+    CI_check INTEGER NOT NULL,
+    FOREIGN KEY (User_id) REFERENCES User(User_id)
+);
+
+CREATE TABLE IF NOT EXISTS attributes (
+    A_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    A_name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS clothing_attributes (
+    CA_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    CI_id INTEGER NOT NULL,
+    A_id INTEGER NOT NULL,
+    CA_value TEXT NOT NULL,
+    CA_updateDate DATE NOT NULL,
+    FOREIGN KEY (CI_id) REFERENCES clothing_information(CI_id),
+    FOREIGN KEY (A_id) REFERENCES attributes(A_id)
+);
+
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    AC_hash TEXT NOT NULL,
+    AC_modelVersion TEXT NOT NULL,
+    AC_phash TEXT,
+    AC_result TEXT NOT NULL,
+    AC_createDate DATE NOT NULL,
+    AC_hitCount INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (AC_hash, AC_modelVersion)
+);
+
+CREATE TABLE IF NOT EXISTS clothing_embedding (
+    CI_id INTEGER PRIMARY KEY,
+    User_id INTEGER NOT NULL,
+    CE_category TEXT,
+    CE_vector BLOB NOT NULL,
+    CE_createDate DATE NOT NULL,
+    FOREIGN KEY (CI_id) REFERENCES clothing_information(CI_id)
+);
+CREATE INDEX IF NOT EXISTS idx_clothing_embedding_user ON clothing_embedding (User_id);
@@ -0,0 +1,13 @@
+-- 옷장 조회: WHERE User_id = ? ORDER BY CI_createDate DESC, CI_id DESC (정렬까지 인덱스로 처리)
+CREATE INDEX IF NOT EXISTS idx_clothing_information_user_date
+    ON clothing_information (User_id, CI_createDate, CI_id);
+
+-- 옷별 속성 조회/삭제: WHERE CI_id = ? (A_id까지 포함해서 attributes 조인도 인덱스만으로)
+CREATE INDEX IF NOT EXISTS idx_clothing_attributes_ci
+    ON clothing_attributes (CI_id, A_id);
+
+-- 속성별 조회 (A_id로 거꾸로 찾는 경우)
+CREATE INDEX IF NOT EXISTS idx_clothing_attributes_attribute
+    ON clothing_attributes (A_id);
+
+ANALYZE;
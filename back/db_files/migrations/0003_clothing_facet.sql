@@ -0,0 +1,73 @@
+-- 옷 속성의 타입 있는 투영 테이블 (검색/패싯 집계용, clothing_attributes가 원본)
+-- 스타일 '모던 (확률: 70.17%)' → CF_style1 = '모던', CF_style1Prob = 70.17
+CREATE TABLE IF NOT EXISTS clothing_facet (
+    CI_id INTEGER PRIMARY KEY,
+    User_id INTEGER NOT NULL,
+    CF_mainCategory TEXT,
+    CF_subCategory TEXT,
+    CF_color TEXT,
+    CF_subColor TEXT,
+    CF_fit TEXT,
+    CF_material TEXT,
+    CF_print TEXT,
+    CF_length TEXT,
+    CF_sleeve TEXT,
+    CF_neckline TEXT,
+    CF_collar TEXT,
+    CF_detail TEXT,
+    CF_style1 TEXT,
+    CF_style1Prob REAL,
+    CF_style2 TEXT,
+    CF_style2Prob REAL,
+    CF_style3 TEXT,
+    CF_style3Prob REAL,
+    CF_createDate DATE NOT NULL,
+    FOREIGN KEY (CI_id) REFERENCES clothing_information(CI_id)
+);
+
+-- 사용자 범위 검색 + 자주 쓰는 필터 (카테고리 → 색상, 핏, 스타일)
+CREATE INDEX IF NOT EXISTS idx_clothing_facet_user_category_color
+    ON clothing_facet (User_id, CF_mainCategory, CF_color);
+CREATE INDEX IF NOT EXISTS idx_clothing_facet_user_fit
+    ON clothing_facet (User_id, CF_fit);
+CREATE INDEX IF NOT EXISTS idx_clothing_facet_user_style
+    ON clothing_facet (User_id, CF_style1, CF_style1Prob);
+CREATE INDEX IF NOT EXISTS idx_clothing_facet_user_date
+    ON clothing_facet (User_id, CF_createDate, CI_id);
+
+-- 기존 옷 채우기
+INSERT OR REPLACE INTO clothing_facet
+SELECT
+    ci.CI_id,
+    ci.User_id,
+    ci.CI_mainCategory,
+    ci.CI_subCategory,
+    MAX(CASE WHEN a.A_name = '색상' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '서브색상' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '핏' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '소재' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '프린트' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '기장' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '소매기장' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '넥라인' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '옷깃' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '디테일' THEN ca.CA_value END),
+    MAX(CASE WHEN a.A_name = '추천 스타일 1순위' THEN
+        CASE WHEN instr(ca.CA_value, ' (확률: ') > 0 THEN substr(ca.CA_value, 1, instr(ca.CA_value, ' (확률: ') - 1) ELSE ca.CA_value END END),
+    MAX(CASE WHEN a.A_name = '추천 스타일 1순위' AND instr(ca.CA_value, '확률: ') > 0 THEN
+        CAST(rtrim(substr(ca.CA_value, instr(ca.CA_value, '확률: ') + 4), '%)') AS REAL) END),
+    MAX(CASE WHEN a.A_name = '추천 스타일 2순위' THEN
+        CASE WHEN instr(ca.CA_value, ' (확률: ') > 0 THEN substr(ca.CA_value, 1, instr(ca.CA_value, ' (확률: ') - 1) ELSE ca.CA_value END END),
+    MAX(CASE WHEN a.A_name = '추천 스타일 2순위' AND instr(ca.CA_value, '확률: ') > 0 THEN
+        CAST(rtrim(substr(ca.CA_value, instr(ca.CA_value, '확률: ') + 4), '%)') AS REAL) END),
+    MAX(CASE WHEN a.A_name = '추천 스타일 3순위' THEN
+        CASE WHEN instr(ca.CA_value, ' (확률: ') > 0 THEN substr(ca.CA_value, 1, instr(ca.CA_value, ' (확률: ') - 1) ELSE ca.CA_value END END),
+    MAX(CASE WHEN a.A_name = '추천 스타일 3순위' AND instr(ca.CA_value, '확률: ') > 0 THEN
+        CAST(rtrim(substr(ca.CA_value, instr(ca.CA_value, '확률: ') + 4), '%)') AS REAL) END),
+    ci.CI_createDate
+FROM clothing_information ci
+LEFT JOIN clothing_attributes ca ON ca.CI_id = ci.CI_id
+LEFT JOIN attributes a ON a.A_id = ca.A_id
+GROUP BY ci.CI_id;
+
+ANALYZE;
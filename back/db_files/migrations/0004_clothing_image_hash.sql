@@ -0,0 +1,8 @@
+-- 옷 이미지를 내용 주소 저장소(db_files/blob_store.py)로: DB에는 SHA-256 해시만
+-- 해시가 있는 행은 CI_imageURL = '' (외부 URL로 저장한 옷은 기존처럼 CI_imageURL 사용)
+-- 기존 data URL 옮기기: back 폴더에서 python -m db_files.blob_store backfill
+ALTER TABLE clothing_information ADD COLUMN CI_imageHash TEXT;
+
+-- 이미지 정리(GC) 시 참조 중인 해시 조회
+CREATE INDEX IF NOT EXISTS idx_clothing_information_image_hash
+    ON clothing_information (CI_imageHash);
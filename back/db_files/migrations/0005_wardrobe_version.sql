@@ -0,0 +1,32 @@
+-- 사용자별 옷장 버전 (옷장 조회 ETag, 옷장 캐시 무효화용)
+-- 트리거로 관리하므로 서버 밖(bulk_ingest.py, wardrobe_transfer import 등)에서 저장해도 버전이 바뀜
+-- 행이 없는 사용자는 버전 0
+CREATE TABLE IF NOT EXISTS wardrobe_version (
+    User_id INTEGER PRIMARY KEY,
+    WV_version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_wardrobe_version_insert
+AFTER INSERT ON clothing_information
+BEGIN
+    INSERT INTO wardrobe_version (User_id, WV_version) VALUES (NEW.User_id, 1)
+    ON CONFLICT (User_id) DO UPDATE SET WV_version = WV_version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_wardrobe_version_delete
+AFTER DELETE ON clothing_information
+BEGIN
+    INSERT INTO wardrobe_version (User_id, WV_version) VALUES (OLD.User_id, 1)
+    ON CONFLICT (User_id) DO UPDATE SET WV_version = WV_version + 1;
+END;
+
+-- 이미지 이동(blob_store backfill) 등 기존 옷 수정, 소유자가 바뀌면 양쪽 모두
+CREATE TRIGGER IF NOT EXISTS trg_wardrobe_version_update
+AFTER UPDATE ON clothing_information
+BEGIN
+    INSERT INTO wardrobe_version (User_id, WV_version) VALUES (NEW.User_id, 1)
+    ON CONFLICT (User_id) DO UPDATE SET WV_version = WV_version + 1;
+    INSERT INTO wardrobe_version (User_id, WV_version)
+    SELECT OLD.User_id, 1 WHERE OLD.User_id IS NOT NEW.User_id
+    ON CONFLICT (User_id) DO UPDATE SET WV_version = WV_version + 1;
+END;
@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import OrderedDict
+from db_files.wardrobe_version import wardrobe_versions
+
+# 캐시에 둘 최대 사용자 수 / 전체 크기 (이미지 URL이 data URL이면 옷 하나가 수백 KB)
+WARDROBE_CACHE_USERS = int(os.getenv("WARDROBE_CACHE_USERS", "128"))
+WARDROBE_CACHE_MAX_MB = float(os.getenv("WARDROBE_CACHE_MAX_MB", "256"))
+# 옷 하나의 이미지 URL 외 부분(카테고리, 속성 등) 대략적인 크기
+ITEM_OVERHEAD_BYTES = 1024
+
+def estimate_wardrobe_bytes(items):
+    return sum(len(item.get('image_url') or '') + ITEM_OVERHEAD_BYTES for item in items)
+
+class WardrobeCache:
+    """
+    사용자별 옷장(fetch_wardrobe 결과) 읽기 캐시
+    - 옷장 화면, 챗봇 매 턴, 추천 등에서 같은 사용자의 옷장을 반복 조회할 때 DB를 다시 읽지 않음
+    - 항목은 옷장 버전(wardrobe_versions, DB의 wardrobe_version 테이블)과 함께 저장
+      → 저장/삭제로 버전이 바뀌면 자동으로 무효 (bulk_ingest.py, 가져오기 CLI 등 다른 프로세스의 저장 포함)
+    - 오래 안 쓴 사용자부터 제거 (사용자 수 / 전체 크기 한도)
+    - 반환된 리스트는 여러 요청이 공유하므로 수정하지 말 것
+    - 다른 저장소(Redis 등)를 쓰려면 같은 메서드(get_or_load, peek, invalidate, stats)를 가진 객체로
+      configure_wardrobe_cache()에 넘기면 됨
+    """
+
+    def __init__(self, max_users=WARDROBE_CACHE_USERS, max_bytes=int(WARDROBE_CACHE_MAX_MB * 1024 ** 2), versions=None):
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.versions = versions or wardrobe_versions
+        self._entries = OrderedDict()  # user_id → (버전, 옷 리스트, 크기)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _current(self, user_id, version):
+        """현재 버전과 같은 항목 (잠금 안에서 호출, version은 잠금 밖에서 DB 기준으로 확인한 값)"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(user_id)
+        return entry[1]
+
+    def peek(self, user_id):
+        """캐시에 최신 옷장이 있으면 반환, 없으면 None (옷장을 읽지 않음, 통계에 포함하지 않음)"""
+        version = self.versions.get(user_id)
+        with self._lock:
+            return self._current(user_id, version)
+
+    def get_or_load(self, user_id, loader):
+        """캐시에 있으면 반환, 없으면 loader()로 DB에서 읽어서 저장"""
+        # 읽는 도중 저장/삭제가 일어나면 버전이 바뀌므로 읽기 전 버전으로 저장 (다음 조회에서 무효 처리)
+        version = self.versions.get(user_id)
+        with self._lock:
+            items = self._current(user_id, version)
+            if items is not None:
+                self.hits += 1
+                return items
+            self.misses += 1
+        items = loader()
+        size = estimate_wardrobe_bytes(items)
+        if size > self.max_bytes:
+            return items
+
+        with self._lock:
+            old = self._entries.pop(user_id, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[user_id] = (version, items, size)
+            self._bytes += size
+            while len(self._entries) > self.max_users or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.evictions += 1
+        return items
+
+    def invalidate(self, user_id):
+        """옷 저장/삭제 후 메모리 해제 (버전이 바뀌어 어차피 다시 읽지만 큰 옷장을 바로 비움)"""
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "users": len(self._entries),
+                "size_mb": round(self._bytes / (1024 ** 2), 2),
+                "max_mb": round(self.max_bytes / (1024 ** 2), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+wardrobe_cache = WardrobeCache()
+
+def configure_wardrobe_cache(cache):
+    """옷장 캐시 교체 (다른 저장소 구현 또는 한도를 바꾼 WardrobeCache)"""
+    global wardrobe_cache
+    wardrobe_cache = cache
+
+def get_wardrobe_cache():
+    return wardrobe_cache
@@ -0,0 +1,346 @@
+# 옷장 NDJSON 내보내기/가져오기 (User, attributes, clothing_information, clothing_attributes)
+# 파일 형식 (한 줄에 JSON 하나, 아래 순서):
+#   {"type": "header", "format": "smart_closet.wardrobe", "version": 1, "schema_version": 4, "exported_at": ..., "counts": {...}}
+#   {"type": "attribute", "name": "색상"}
+#   {"type": "user", "id": 1, "email": ..., "password": ..., "nickname": ..., "created_at": ..., "updated_at": ..., "gender": ...}
+#   {"type": "clothing", "id": 10, "user_id": 1, "main_category": ..., "sub_category": ..., "created_at": ...,
+#    "image_url": ..., "attributes": {"색상": "블랙", ...}}
+#   {"type": "end", "counts": {"attribute": ..., "user": ..., "clothing": ...}}
+# - id / user_id는 원래 DB의 값 (가져올 때 새로 발급, 사용자는 이메일로 기존 계정과 연결)
+# - image_url: 이미지 저장소 경로(/api/images/<해시>) 또는 외부 URL, 이미지 포함 내보내기면 원본 data URL
+#   (저장소 경로는 CLI 가져오기에서만 그대로 연결, 요청으로 받은 파일은 받는 사용자가 이미 가진 이미지만)
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tempfile
+from datetime import datetime
+from db_files.connection import connect
+from db_files.blob_store import blob_store, blob_url, decode_data_url, image_url_sql, guess_mimetype
+from db_files.clothes_db import (
+    WARDROBE_COLUMNS,
+    insert_clothing_rows,
+    invalidate_attribute_ids,
+    wardrobe_changed
+)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
+
+# NDJSON 파일 형식 (첫 줄 header의 format / version)
+TRANSFER_FORMAT = 'smart_closet.wardrobe'
+TRANSFER_FORMAT_VERSION = 1
+# 가져오기: 한 번에 INSERT할 최대 옷 개수
+TRANSFER_BATCH_SIZE = int(os.getenv("TRANSFER_BATCH_SIZE", "1000"))
+# 내보내기 CLI 진행 상황 출력 간격 (옷 개수)
+TRANSFER_PROGRESS_EVERY = int(os.getenv("TRANSFER_PROGRESS_EVERY", "5000"))
+
+def _image_data_url(image_hash):
+    with open(blob_store.path(image_hash), 'rb') as f:
+        data = f.read()
+    return f"data:{guess_mimetype(data[:12])};base64," + base64.b64encode(data).decode('ascii')
+
+def export_records(db_path=DB_PATH, user_id=None, include_images=False, include_passwords=True):
+    """
+    옷장 내보내기 (레코드 dict를 하나씩 yield)
+    - 커서를 한 행씩 읽으므로 옷 개수와 상관없이 메모리 일정
+    - user_id: 해당 사용자만 (없으면 전체), include_passwords=False면 비밀번호 해시 제외
+    """
+    user_filter = ' WHERE User_id = ?' if user_id is not None else ''
+    params = (user_id,) if user_id is not None else ()
+    conn = connect(db_path)
+    try:
+        cursor = conn.cursor()
+        # 가져오는 쪽 진행률 표시용 예상 개수 (실제 개수는 마지막 end 레코드)
+        schema_version = cursor.execute('SELECT MAX(SV_version) FROM schema_version').fetchone()[0]
+        expected = {
+            'attribute': cursor.execute('SELECT COUNT(*) FROM attributes').fetchone()[0],
+            'user': cursor.execute(f'SELECT COUNT(*) FROM User{user_filter}', params).fetchone()[0],
+            'clothing': cursor.execute(f'SELECT COUNT(*) FROM clothing_information{user_filter}', params).fetchone()[0],
+        }
+        yield {
+            'type': 'header',
+            'format': TRANSFER_FORMAT,
+            'version': TRANSFER_FORMAT_VERSION,
+            'schema_version': schema_version,
+            'exported_at': datetime.now().isoformat(timespec='seconds'),
+            'counts': expected,
+        }
+        counts = {'attribute': 0, 'user': 0, 'clothing': 0}
+
+        for (name,) in cursor.execute('SELECT A_name FROM attributes ORDER BY A_id'):
+            counts['attribute'] += 1
+            yield {'type': 'attribute', 'name': name}
+
+        for row in cursor.execute(f'''
+            SELECT User_id, User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender
+            FROM User{user_filter} ORDER BY User_id
+        ''', params):
+            record = {
+                'type': 'user', 'id': row[0], 'email': row[1], 'password': row[2], 'nickname': row[3],
+                'created_at': row[4], 'updated_at': row[5], 'gender': row[6],
+            }
+            if not include_passwords:
+                del record['password']
+            counts['user'] += 1
+            yield record
+
+        for ci_id, owner_id, main_category, sub_category, create_date, image_hash, image_url, details in cursor.execute(f'''
+            SELECT ci.CI_id, ci.User_id, ci.CI_mainCategory, ci.CI_subCategory, ci.CI_createDate,
+                   ci.CI_imageHash, {image_url_sql('ci.')}, {WARDROBE_COLUMNS['details']}
+            FROM clothing_information ci{user_filter.replace('User_id', 'ci.User_id')}
+            ORDER BY ci.User_id, ci.CI_id
+        ''', params):
+            if include_images and image_hash and blob_store.exists(image_hash):
+                image_url = _image_data_url(image_hash)
+            counts['clothing'] += 1
+            yield {
+                'type': 'clothing', 'id': ci_id, 'user_id': owner_id,
+                'main_category': main_category, 'sub_category': sub_category, 'created_at': create_date,
+                'image_url': image_url, 'attributes': json.loads(details) if details else {},
+            }
+
+        yield {'type': 'end', 'counts': counts}
+    finally:
+        conn.close()
+
+def export_ndjson(db_path=DB_PATH, user_id=None, include_images=False, include_passwords=True):
+    """export_records → NDJSON 줄 (스트리밍 응답 / 파일 쓰기용)"""
+    for record in export_records(db_path, user_id, include_images, include_passwords):
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+def _import_user(cursor, record):
+    """이메일이 같은 계정이 있으면 그 계정, 없으면 새로 생성 → (User_id, 새로 만들었는지)"""
+    cursor.execute('SELECT User_id FROM User WHERE User_email = ?', (record['email'],))
+    row = cursor.fetchone()
+    if row:
+        return row[0], False
+    if not record.get('password'):
+        raise ValueError(f"비밀번호가 없는 사용자는 새로 만들 수 없습니다: {record['email']}")
+    cursor.execute('''
+        INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+        VALUES (?, ?, ?, COALESCE(?, DATE('now')), COALESCE(?, DATE('now')), ?)
+    ''', (record['email'], record['password'], record['nickname'],
+          record.get('created_at'), record.get('updated_at'), record['gender']))
+    return cursor.lastrowid, True
+
+def _allowed_image_check(conn, owner, stored_hashes):
+    """
+    파일의 data URL에서 저장한 이미지(stored_hashes)와 owner의 옷이 이미 참조하는 이미지만 허용
+    (자기 옷장 내보내기 파일을 다시 가져오는 경우)
+    """
+    def allow(image_hash):
+        if image_hash in stored_hashes:
+            return True
+        return conn.execute(
+            'SELECT 1 FROM clothing_information WHERE CI_imageHash = ? AND User_id = ? LIMIT 1',
+            (image_hash, owner)
+        ).fetchone() is not None
+    return allow
+
+def _spool_records(lines, spool, user_id=None):
+    """
+    가져오기 1단계: 파일 전체를 읽어 검증하고 임시 파일(spool)에 기록 (DB 트랜잭션 없음)
+    - header, 레코드 순서, end 레코드의 옷 개수까지 확인 → 끊긴 업로드는 DB에 손대기 전에 거부
+    - data URL 이미지는 여기서 이미지 저장소에 넣고 저장소 경로로 바꿔 기록 (트랜잭션 안에서 파일을 쓰지 않도록)
+    반환: (옷 개수, data URL에서 저장한 해시 set)
+    """
+    header = None
+    end = None
+    user_ids = set()
+    clothing = 0
+    stored_hashes = set()
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        kind = record.get('type')
+
+        if end is not None:
+            raise ValueError(f"{line_number}번째 줄: end 레코드 뒤에 내용이 있습니다")
+        if header is None:
+            if kind != 'header' or record.get('format') != TRANSFER_FORMAT:
+                raise ValueError("옷장 내보내기 파일이 아닙니다 (첫 줄 header 없음)")
+            if record.get('version', 0) > TRANSFER_FORMAT_VERSION:
+                raise ValueError(f"지원하지 않는 파일 버전입니다: {record.get('version')}")
+            header = record
+            continue
+
+        if kind == 'user':
+            user_ids.add(record['id'])
+        elif kind == 'clothing':
+            if user_id is None and record['user_id'] not in user_ids:
+                raise ValueError(f"{line_number}번째 줄: 사용자 {record['user_id']} 레코드가 옷보다 먼저 나와야 합니다")
+            data = decode_data_url(record['image_url'])
+            if data is not None:
+                image_hash = blob_store.put(data)
+                stored_hashes.add(image_hash)
+                record['image_url'] = blob_url(image_hash)
+            clothing += 1
+        elif kind == 'end':
+            end = record
+            continue
+        elif kind != 'attribute':
+            raise ValueError(f"{line_number}번째 줄: 알 수 없는 레코드 종류 {kind!r}")
+        spool.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    if header is None:
+        raise ValueError("빈 파일입니다")
+    if end is None:
+        raise ValueError(f"파일이 중간에 끊겼습니다 (end 레코드 없음, 옷 {clothing}개까지 읽음)")
+    expected = end.get('counts', {}).get('clothing')
+    if expected is not None and expected != clothing:
+        raise ValueError(f"옷 개수가 맞지 않습니다 (파일 {expected}개, 읽은 옷 {clothing}개)")
+    return clothing, stored_hashes
+
+def import_ndjson(lines, db_path=DB_PATH, user_id=None, batch_size=TRANSFER_BATCH_SIZE, progress=None,
+                  trust_blob_paths=False):
+    """
+    NDJSON 가져오기 (파일/요청 본문을 한 줄씩 읽음 → 메모리는 배치 크기만큼만)
+    - 1단계: 전체를 임시 파일로 받으면서 검증 (_spool_records, 끊긴 파일/개수 불일치는 여기서 거부)
+      → 느린 업로드를 읽는 동안 쓰기 트랜잭션을 열지 않으므로 다른 요청의 저장/삭제를 막지 않음
+    - 2단계: 임시 파일에서 옷을 batch_size개씩 INSERT하고 짧은 트랜잭션 하나로 커밋 (실패하면 전체 롤백)
+    - user_id: 모든 옷을 이 사용자 옷장으로 (파일의 user 레코드는 무시), 없으면 이메일로 사용자 연결/생성
+    - progress(INSERT한 옷 개수, 파일 전체 옷 개수): 배치마다 호출
+    - trust_blob_paths: 파일의 저장소 경로(/api/images/<해시>)를 그대로 연결 (서버에서 직접 실행하는 CLI용)
+      False면 받는 사용자의 옷이 이미 참조하는 이미지만 연결하고, 나머지는 외부 URL처럼 저장
+    반환: 요약 딕셔너리
+    """
+    start = time.perf_counter()
+    summary = {'attributes': 0, 'users_created': 0, 'users_matched': 0, 'clothing': 0, 'batches': 0}
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+        try:
+            expected, stored_hashes = _spool_records(lines, spool, user_id)
+        except Exception as e:
+            print(f"[DB] 옷장 가져오기 중단: {e} (저장된 옷 없음)")
+            raise
+        spool.seek(0)
+
+        conn = connect(db_path)
+        cursor = conn.cursor()
+        user_map = {}
+        owners = set()
+        batch = []
+
+        def flush():
+            nonlocal batch
+            if not batch:
+                return
+            # 파일은 사용자 순서로 정렬되어 있으므로 연속된 같은 사용자끼리 한 번에
+            group_start = 0
+            for index in range(1, len(batch) + 1):
+                if index == len(batch) or batch[index][0] != batch[group_start][0]:
+                    owner = batch[group_start][0]
+                    allow_blob_path = trust_blob_paths or _allowed_image_check(conn, owner, stored_hashes)
+                    insert_clothing_rows(cursor, owner, [item for _, item in batch[group_start:index]], allow_blob_path)
+                    owners.add(owner)
+                    group_start = index
+            summary['clothing'] += len(batch)
+            summary['batches'] += 1
+            batch = []
+            if progress:
+                progress(summary['clothing'], expected)
+
+        try:
+            for line in spool:
+                record = json.loads(line)
+                kind = record['type']
+                if kind == 'attribute':
+                    cursor.execute('INSERT OR IGNORE INTO attributes (A_name) VALUES (?)', (record['name'],))
+                    summary['attributes'] += cursor.rowcount
+                elif kind == 'user':
+                    if user_id is None:
+                        user_map[record['id']], created = _import_user(cursor, record)
+                        summary['users_created' if created else 'users_matched'] += 1
+                else:
+                    owner = user_id if user_id is not None else user_map[record['user_id']]
+                    batch.append((owner, {
+                        'image_url': record['image_url'],
+                        'main_category': record['main_category'],
+                        'sub_category': record['sub_category'],
+                        'attributes': record.get('attributes') or {},
+                        'created_at': record.get('created_at'),
+                    }))
+                    if len(batch) >= batch_size:
+                        flush()
+            flush()
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            # 롤백된 속성 id가 캐시에 남지 않도록
+            invalidate_attribute_ids()
+            print(f"[DB] 옷장 가져오기 중단: {e} (전체 롤백, 저장된 옷 없음)")
+            raise
+        finally:
+            conn.close()
+
+    for owner in owners:
+        wardrobe_changed(owner)
+    elapsed = time.perf_counter() - start
+    summary['seconds'] = round(elapsed, 2)
+    summary['clothing_per_sec'] = round(summary['clothing'] / elapsed, 1) if elapsed > 0 else 0.0
+    print(f"[DB] 옷장 가져오기 완료: 옷 {summary['clothing']}개, 사용자 새로 만듦 {summary['users_created']}명 / "
+          f"기존 연결 {summary['users_matched']}명, 속성 추가 {summary['attributes']}개 ({summary['seconds']}초)")
+    return summary
+
+def _print_progress(start):
+    def progress(done, total):
+        rate = done / max(time.perf_counter() - start, 1e-9)
+        print(f"[DB] 옷 {done:,}개{f' / {total:,}개' if total else ''} ({rate:,.0f}개/초)", file=sys.stderr)
+    return progress
+
+if __name__ == '__main__':
+    # back 폴더에서:
+    #   python -m db_files.wardrobe_transfer export wardrobe.ndjson [--email 사용자] [--images]
+    #   python -m db_files.wardrobe_transfer import wardrobe.ndjson [--email 받을 사용자]
+    # 파일 이름을 - 로 하면 표준 출력/입력
+    parser = argparse.ArgumentParser(description="옷장 NDJSON 내보내기/가져오기")
+    parser.add_argument("command", choices=['export', 'import'])
+    parser.add_argument("path")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--email", help="export: 이 사용자만 / import: 모든 옷을 이 사용자 옷장으로")
+    parser.add_argument("--images", action='store_true', help="export: 이미지 원본을 data URL로 포함")
+    parser.add_argument("--batch-size", type=int, default=TRANSFER_BATCH_SIZE)
+    args = parser.parse_args()
+
+    target_user = None
+    if args.email:
+        conn = connect(args.db)
+        try:
+            row = conn.cursor().execute('SELECT User_id FROM User WHERE User_email = ?', (args.email,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            parser.error(f"사용자를 찾을 수 없습니다: {args.email}")
+        target_user = row[0]
+
+    started = time.perf_counter()
+    if args.command == 'export':
+        out = sys.stdout if args.path == '-' else open(args.path, 'w', encoding='utf-8')
+        report = _print_progress(started)
+        written = 0
+        total = None
+        try:
+            for record in export_records(args.db, target_user, args.images):
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                if record['type'] == 'header':
+                    total = record['counts']['clothing']
+                elif record['type'] == 'clothing':
+                    written += 1
+                    if written % TRANSFER_PROGRESS_EVERY == 0:
+                        report(written, total)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"[DB] 옷장 내보내기 완료: 옷 {written:,}개 ({time.perf_counter() - started:.2f}초)", file=sys.stderr)
+    else:
+        source = sys.stdin if args.path == '-' else open(args.path, 'r', encoding='utf-8')
+        try:
+            import_ndjson(source, args.db, target_user, args.batch_size, progress=_print_progress(started),
+                          trust_blob_paths=True)
+        finally:
+            if source is not sys.stdin:
+                source.close()
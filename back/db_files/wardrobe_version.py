@@ -0,0 +1,55 @@
+import os
+import hashlib
+import sqlite3
+import threading
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'smart_closet.db')
+
+class WardrobeVersions:
+    """
+    사용자별 옷장 버전 (옷장 조회 ETag, 옷장 캐시 무효화에 사용)
+    - 원본은 DB의 wardrobe_version 테이블 (clothing_information 트리거가 저장/삭제마다 1씩 올림)
+      → bulk_ingest.py, wardrobe_transfer import처럼 다른 프로세스에서 저장해도 반영됨
+    - 조회한 버전은 메모리에 두고, 전용 연결의 PRAGMA data_version이 바뀌었을 때만 (어디선가 커밋이
+      있었을 때만) 다시 읽음 → 바뀐 게 없으면 요청마다 PRAGMA 한 번
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._data_version = None
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """버전 확인 전용 연결 (쓰기를 하지 않으므로 모든 커밋이 data_version 변화로 보임, 잠금 안에서 호출)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        return self._conn
+
+    def get(self, user_id):
+        with self._lock:
+            conn = self._connection()
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if data_version != self._data_version:
+                self._data_version = data_version
+                self._versions.clear()
+            if user_id not in self._versions:
+                row = conn.execute('SELECT WV_version FROM wardrobe_version WHERE User_id = ?', (user_id,)).fetchone()
+                self._versions[user_id] = row[0] if row else 0
+            return self._versions[user_id]
+
+    def etag(self, user_id, variant=''):
+        """variant: 같은 옷장이라도 응답이 달라지는 요청 조건 (페이지 커서, 필드 선택 등)"""
+        digest = hashlib.sha1(variant.encode('utf-8')).hexdigest()[:12]
+        return f'"{user_id}-{self.get(user_id)}-{digest}"'
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._data_version = None
+            self._versions.clear()
+
+wardrobe_versions = WardrobeVersions()
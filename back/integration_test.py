@@ -72,7 +72,7 @@ def test_environment():
     
     # 필수 디렉토리 확인
     required_dirs = [
-        "uploads/clothes",
+        "uploads/blobs",
         "instance",
         "chat",
         "clothes",
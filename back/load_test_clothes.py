@@ -0,0 +1,101 @@
+"""
+옷 분석 동시 요청 부하 테스트
+- 동시 요청 수 x 마이크로 배칭 설정 조합별 처리량(장/초)과 지연시간(p50/p95) 측정
+- 배칭 없음(요청별 개별 추론) vs 배치 크기/대기 시간 조합 비교
+
+실행 방법:
+python load_test_clothes.py --image fit/input/cloth.jpg --concurrency 1 4 8 --batch-sizes 8 16 --wait-ms 2 5 10
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+clothes_dir = os.path.join(current_dir, 'clothes')
+if clothes_dir not in sys.path:
+    sys.path.insert(0, clothes_dir)
+
+import final_pipeline
+
+
+def run_load(models, image_path, concurrency, requests_per_thread):
+    """concurrency개 스레드가 동시에 run_full_pipeline 호출"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            final_pipeline.run_full_pipeline(models, image_path)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "throughput": len(latencies) / total,
+        "p50": float(np.percentile(latencies_ms, 50)),
+        "p95": float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="옷 분석 동시 요청 부하 테스트")
+    parser.add_argument("--image", default=os.path.join(current_dir, 'fit', 'input', 'cloth.jpg'))
+    parser.add_argument("--concurrency", type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=5, help="스레드당 요청 수")
+    parser.add_argument("--batch-sizes", type=int, nargs='+', default=[8, 16])
+    parser.add_argument("--wait-ms", type=float, nargs='+', default=[2, 5, 10])
+    args = parser.parse_args()
+
+    models = final_pipeline.load_all_models()
+    final_pipeline.run_full_pipeline(models, args.image)  # 워밍업
+
+    # 로그 출력이 측정을 방해하지 않도록 억제
+    devnull = open(os.devnull, 'w')
+
+    configs = [("배칭 없음", None, None)] + [
+        (f"배치 {size} / {wait}ms", size, wait) for size in args.batch_sizes for wait in args.wait_ms
+    ]
+
+    rows = []
+    for label, batch_size, wait_ms in configs:
+        models.pop('batcher', None)
+        if batch_size is not None:
+            batcher = final_pipeline.enable_micro_batching(models, batch_size, wait_ms)
+        for concurrency in args.concurrency:
+            stdout = sys.stdout
+            sys.stdout = devnull
+            try:
+                result = run_load(models, args.image, concurrency, args.requests)
+            finally:
+                sys.stdout = stdout
+            avg_batch = models['batcher'].stats()['avg_batch_size'] if batch_size is not None else 1.0
+            rows.append((label, concurrency, result, avg_batch))
+            print(f"{label:<18} 동시 {concurrency:>2}: {result['throughput']:.2f} 장/초, "
+                  f"p50 {result['p50']:.1f}ms, p95 {result['p95']:.1f}ms")
+        if batch_size is not None:
+            batcher.stop()
+
+    print("\n" + "=" * 78)
+    print(f"{'설정':<18}{'동시 요청':>10}{'장/초':>10}{'p50(ms)':>12}{'p95(ms)':>12}{'평균 배치':>12}")
+    print("=" * 78)
+    for label, concurrency, result, avg_batch in rows:
+        print(f"{label:<18}{concurrency:>10}{result['throughput']:>10.2f}"
+              f"{result['p50']:>12.1f}{result['p95']:>12.1f}{avg_batch:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
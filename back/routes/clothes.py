@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify, Response
+from werkzeug.exceptions import RequestEntityTooLarge
 import base64
 import os
 from datetime import datetime
@@ -7,16 +8,60 @@ import subprocess
 import importlib.util
 import cv2
 import numpy as np
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 clothes_bp = Blueprint('clothes', __name__, url_prefix='/api')
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads', 'clothes')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from analysis_jobs import AnalysisJobQueue, QUEUED, RUNNING, DONE, FAILED
+from db_files.analysis_cache_db import (
+    compute_content_hash,
+    compute_perceptual_hash,
+    get_cached_analysis,
+    save_cached_analysis,
+    purge_stale_analysis_cache
+)
+from db_files.clothes_db import get_current_user_id
+from db_files.blob_store import blob_store, blob_url
+from bulk_ingest import ingest as bulk_ingest
 
 MODELS = None
 final_pipeline = None
 
+# 분석 작업 큐 설정 (환경변수로 조정 가능)
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "1"))  # 동시 분석 수 (GPU 1개 기준 1)
+ANALYSIS_MAX_QUEUE = int(os.getenv("ANALYSIS_MAX_QUEUE", "8"))      # 최대 대기 작업 수
+ANALYSIS_JOB_TTL = int(os.getenv("ANALYSIS_JOB_TTL", "600"))        # 완료 작업 보관 시간 (초)
+
+# 요청 간 마이크로 배칭 설정 (동시 분석 워커가 2개 이상일 때 기본 활성화)
+ANALYSIS_MICRO_BATCH = os.getenv("ANALYSIS_MICRO_BATCH", "1" if ANALYSIS_MAX_WORKERS > 1 else "0") == "1"
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "16"))   # 배치 최대 옷 개수
+ANALYSIS_BATCH_WAIT_MS = float(os.getenv("ANALYSIS_BATCH_WAIT_MS", "5"))  # 배치 모으는 최대 대기 (ms)
+
+# 분석 결과 캐시 설정
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "1") == "1"
+ANALYSIS_CACHE_PHASH_DISTANCE = int(os.getenv("ANALYSIS_CACHE_PHASH_DISTANCE", "0"))  # 0이면 완전 일치만 사용
+
+analysis_jobs = AnalysisJobQueue(
+    max_workers=ANALYSIS_MAX_WORKERS,
+    max_queue=ANALYSIS_MAX_QUEUE,
+    job_ttl=ANALYSIS_JOB_TTL
+)
+
+# 대량 등록은 오래 걸리므로 일반 분석과 별도 큐에서 하나씩 실행
+BULK_INGEST_MAX_QUEUE = int(os.getenv("BULK_INGEST_MAX_QUEUE", "2"))
+# 대량 등록 업로드 최대 크기 (zip 압축 해제 크기는 bulk_ingest.py의 BULK_INGEST_MAX_TOTAL_MB로 따로 제한)
+BULK_INGEST_MAX_UPLOAD_MB = float(os.getenv("BULK_INGEST_MAX_UPLOAD_MB", "200"))
+bulk_jobs = AnalysisJobQueue(max_workers=1, max_queue=BULK_INGEST_MAX_QUEUE, job_ttl=ANALYSIS_JOB_TTL)
+
+# 업로드 원본은 분석과 별도로 백그라운드에서 이미지 저장소에 기록
+upload_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-writer")
+
 def initialize_models():
     """서버 시작 시 모델 로드"""
     global MODELS, final_pipeline
@@ -47,11 +92,15 @@ def initialize_models():
         
         print("[clothes.py] [OK] 모듈 임포트 성공")
         
-        print("[clothes.py] 모델 로드 중... (1-2분 소요)")
+        print("[clothes.py] 모델 로드 중... (병렬 로딩)")
         MODELS = final_pipeline.load_all_models()
         
         if MODELS is not None:
-            print("[clothes.py] [SUCCESS] 모델 로드 성공")
+            print("[clothes.py] [SUCCESS] 모델 로드 성공 (버전: " + MODELS["version"] + ", 백엔드: " + MODELS["backend"] + ")")
+            if ANALYSIS_CACHE_ENABLED:
+                purge_stale_analysis_cache(MODELS["version"])
+            if ANALYSIS_MICRO_BATCH:
+                final_pipeline.enable_micro_batching(MODELS, ANALYSIS_BATCH_SIZE, ANALYSIS_BATCH_WAIT_MS)
             print("="*70 + "\n")
             return True
         else:
@@ -144,9 +193,66 @@ def initialize_models():
 #         traceback.print_exc()
 #         return jsonify({"error": str(e)}), 500
 
+def _persist_upload(image_bytes):
+    """
+    업로드 원본을 이미지 저장소에 저장 (분석 경로와 무관하게 백그라운드에서 실행)
+    - 옷장에 저장하지 않은 사진은 참조가 없으므로 이미지 정리(GC) 때 삭제됨
+    """
+    try:
+        image_hash = blob_store.put(image_bytes)
+        print("[clothes.py] 파일 저장 완료: " + image_hash[:12])
+    except Exception as e:
+        print("[clothes.py] [ERROR] 파일 저장 실패: " + str(e))
+
+def _analyze_upload(image_bytes, content_hash=None, phash=None):
+    """작업 큐 워커에서 실행되는 분석 함수 (메모리의 이미지를 바로 분석, 성공 결과는 캐시에 저장)"""
+    print("[clothes.py] AI 분석 시작: " + str(len(image_bytes)) + " bytes")
+    analysis_result = final_pipeline.run_full_pipeline(MODELS, image_bytes)
+    print("[clothes.py] AI 분석 완료: " + str(analysis_result))
+    
+    if content_hash and analysis_result and analysis_result.get('status') == 'success':
+        save_cached_analysis(content_hash, MODELS["version"], analysis_result, phash)
+    
+    return analysis_result
+
+def _build_job_response(job):
+    """작업 상태 → 응답 (완료 시 기존 동기 응답과 같은 detected/analysis 필드 포함)"""
+    response = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "filename": job.get("filename"),
+        "path": job.get("path"),
+        "completed": job["status"] in (DONE, FAILED),
+        "detected": None
+    }
+
+    if job["status"] == QUEUED:
+        response["success"] = True
+        response["position"] = job.get("position")
+        response["message"] = "분석 대기 중..."
+    elif job["status"] == RUNNING:
+        response["success"] = True
+        response["message"] = "분석 진행 중..."
+    elif job["status"] == FAILED:
+        response["success"] = False
+        response["error"] = "AI 분석 실패: " + str(job["error"])
+    else:
+        analysis_result = job["result"] or {}
+        items = analysis_result.get('items', [])
+        response["analysis"] = analysis_result
+        if items:
+            response["success"] = True
+            response["detected"] = items
+        else:
+            response["success"] = False
+            response["error"] = "옷을 감지하지 못했습니다"
+            response["message"] = "더 명확한 옷 사진을 찍어주세요"
+
+    return response
+
 @clothes_bp.route('/clothes', methods=['POST', 'OPTIONS'])
 def save_clothes():
-    """이미지 저장 및 AI 분석"""
+    """이미지 저장 및 AI 분석 작업 등록 (job_id 즉시 반환)"""
     
     if request.method == 'OPTIONS':
         return '', 200
@@ -167,17 +273,6 @@ def save_clothes():
         print("[clothes.py] 파일명: " + file.filename)
         file_content = file.read()
         print("[clothes.py] 파일 크기: " + str(len(file_content)) + " bytes")
-        file.seek(0)  # ← 파일 포인터 초기화
-        
-        # 파일 저장
-        filename = "cloth_" + datetime.now().strftime('%Y%m%d_%H%M%S') + ".jpg"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        print("[clothes.py] 파일 저장 완료: " + filename)
-        
-        # AI 분석 실행
-        print("[clothes.py] AI 분석 시작...")
         
         if MODELS is None:
             print("[clothes.py] [WARNING] 모델 미로드")
@@ -187,56 +282,56 @@ def save_clothes():
                 "status": "model_not_loaded"
             }), 500
         
-        try:
-            analysis_result = final_pipeline.run_full_pipeline(MODELS, filepath)
-            print("[clothes.py] AI 분석 완료")
-            print("[clothes.py] 분석 결과: " + str(analysis_result))
-            print("[clothes.py] 분석 결과 타입: " + str(type(analysis_result)))
-            
-            # 분석 결과 확인
-            if analysis_result is None:
-                print("[clothes.py] [ERROR] 분석 결과가 None입니다")
-                return jsonify({
-                    "success": False,
-                    "error": "분석 결과 없음",
-                    "status": "no_result"
-                }), 400
+        # 파일 저장은 백그라운드로 (내용 해시가 경로 → 같은 사진은 한 번만 저장)
+        # 분석은 메모리의 바이트를 그대로 사용하므로 디스크 기록을 기다리지 않음
+        filename = "cloth_" + datetime.now().strftime('%Y%m%d_%H%M%S_%f') + ".jpg"
+        content_hash = compute_content_hash(file_content)
+        filepath = blob_url(content_hash)
+        upload_writer.submit(_persist_upload, file_content)
+        
+        # 같은 사진(또는 거의 같은 사진)을 이미 분석했으면 캐시 결과 즉시 반환
+        phash = None
+        if ANALYSIS_CACHE_ENABLED:
+            if ANALYSIS_CACHE_PHASH_DISTANCE > 0:
+                try:
+                    phash = compute_perceptual_hash(file_content)
+                except Exception as e:
+                    print("[clothes.py] [WARNING] 지각 해시 계산 실패: " + str(e))
             
-            # items 키 확인
-            items = analysis_result.get('items', [])
-            print("[clothes.py] items 개수: " + str(len(items)))
-            
-            if not items or len(items) == 0:
-                print("[clothes.py] [WARNING] 옷을 감지하지 못했습니다")
-                return jsonify({
-                    "success": False,
-                    "error": "옷을 감지하지 못했습니다",
-                    "status": "no_detection",
-                    "message": "더 명확한 옷 사진을 찍어주세요"
-                }), 400
-            
-            # 정상 응답
-            response = {
-                "success": True,
-                "filename": filename,
-                "path": filepath,
-                "detected": items,
-                "status": analysis_result.get('status', 'success'),
-                "analysis": analysis_result
-            }
-            
-            print("[clothes.py] 응답 전송\n")
-            return jsonify(response), 200
-                    
-        except Exception as e:
-            print("[clothes.py] [ERROR] AI 분석 실패: " + str(e))
-            import traceback
-            traceback.print_exc()
+            cached_result = get_cached_analysis(
+                content_hash, MODELS["version"], phash, ANALYSIS_CACHE_PHASH_DISTANCE
+            )
+            if cached_result is not None:
+                print("[clothes.py] 분석 캐시 적중: " + content_hash[:12])
+                response = _build_job_response({
+                    "job_id": None,
+                    "status": DONE,
+                    "filename": filename,
+                    "path": filepath,
+                    "result": cached_result
+                })
+                response["cached"] = True
+                return jsonify(response), 200
+        
+        # AI 분석 작업 등록
+        try:
+            job = analysis_jobs.submit(
+                _analyze_upload, file_content, content_hash if ANALYSIS_CACHE_ENABLED else None, phash,
+                filename=filename, path=filepath, user_id=get_current_user_id()
+            )
+        except queue.Full as e:
+            print("[clothes.py] [WARNING] " + str(e))
             return jsonify({
                 "success": False,
-                "error": "AI 분석 실패: " + str(e),
-                "status": "analysis_failed"
-            }), 500
+                "error": "분석 요청이 많습니다. 잠시 후 다시 시도해주세요.",
+                "status": "queue_full"
+            }), 503
+        
+        print("[clothes.py] 분석 작업 등록: " + job["job_id"])
+        
+        response = _build_job_response(job)
+        response["status_url"] = "/api/analysis-status/" + job["job_id"]
+        return jsonify(response), 202
         
     except Exception as e:
         print("[clothes.py] [ERROR] 예외: " + str(e))
@@ -248,33 +343,106 @@ def save_clothes():
             "status": "server_error"
         }), 500
 
-@clothes_bp.route('/analysis-status/<filename>', methods=['GET'])
-def get_analysis_status(filename):
-    """분석 상태 확인 API"""
+@clothes_bp.route('/analysis-status/<job_id>', methods=['GET'])
+def get_analysis_status(job_id):
+    """분석 상태 확인 API (job_id로 조회, 분석을 요청한 사용자만)"""
     try:
-        # 업로드된 파일 경로
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        job = analysis_jobs.get(job_id)
         
-        if not os.path.exists(filepath):
+        if job is None or job.get("user_id") != get_current_user_id():
             return jsonify({
                 "completed": False,
                 "detected": None,
-                "error": "파일을 찾을 수 없습니다"
+                "error": "분석 작업을 찾을 수 없습니다"
             }), 404
         
-        # DB 구현 전 (임시로 파일 분석 상태 확인)
-        # 나중에 DB에서 분석 완료 여부 확인하도록 수정
-        
-        return jsonify({
-            "completed": True,
-            "detected": None,  # 나중에 DB에서 가져오기
-            "message": "분석 진행 중..."
-        }), 200
+        return jsonify(_build_job_response(job)), 200
         
     except Exception as e:
         print(f"[clothes.py] [ERROR] {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@clothes_bp.route('/analysis-queue', methods=['GET'])
+def get_analysis_queue():
+    """분석 작업 큐 현황"""
+    stats = analysis_jobs.stats()
+    if MODELS is not None and MODELS.get('batcher') is not None:
+        stats["micro_batching"] = MODELS['batcher'].stats()
+    if MODELS is not None and hasattr(MODELS.get('specialists'), 'stats'):
+        stats["specialists"] = MODELS['specialists'].stats()
+    if MODELS is not None and MODELS.get('cascade') is not None:
+        stats["cascade"] = MODELS['cascade']['stats'].stats()
+    return jsonify(stats), 200
+
+@clothes_bp.route('/clothes/bulk-ingest', methods=['POST', 'OPTIONS'])
+def bulk_ingest_clothes():
+    """옷장 대량 등록 (zip 파일 1개 'file' 또는 여러 사진 'files') → 작업 등록 후 job_id 반환"""
+    
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    print("\n[clothes.py] POST /api/clothes/bulk-ingest 요청")
+    
+    user_id = get_current_user_id()
+    if not user_id:
+        return jsonify({"success": False, "error": "로그인이 필요합니다", "authenticated": False}), 401
+    
+    if MODELS is None:
+        print("[clothes.py] [WARNING] 모델 미로드")
+        return jsonify({"success": False, "error": "모델 미로드", "status": "model_not_loaded"}), 500
+    
+    # 이 요청만 업로드 크기 제한 (넘으면 본문을 읽기 전에 413)
+    request.max_content_length = int(BULK_INGEST_MAX_UPLOAD_MB * 1024 ** 2)
+    try:
+        if 'file' in request.files:
+            source = request.files['file'].read()
+        else:
+            source = [(file.filename, file.read()) for file in request.files.getlist('files') if file.filename]
+    except RequestEntityTooLarge:
+        return jsonify({
+            "success": False,
+            "error": f"업로드 파일이 너무 큽니다 (최대 {BULK_INGEST_MAX_UPLOAD_MB:.0f} MB)",
+            "status": "too_large"
+        }), 413
+    if not source:
+        return jsonify({"success": False, "error": "파일 없음"}), 400
+    
+    try:
+        job = bulk_jobs.submit(bulk_ingest, final_pipeline, MODELS, source, user_id, user_id=user_id)
+    except queue.Full as e:
+        print("[clothes.py] [WARNING] " + str(e))
+        return jsonify({
+            "success": False,
+            "error": "대량 등록 요청이 많습니다. 잠시 후 다시 시도해주세요.",
+            "status": "queue_full"
+        }), 503
+    
+    print("[clothes.py] 대량 등록 작업 등록: " + job["job_id"])
+    return jsonify({
+        "success": True,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": "/api/clothes/bulk-ingest/" + job["job_id"]
+    }), 202
+
+@clothes_bp.route('/clothes/bulk-ingest/<job_id>', methods=['GET'])
+def get_bulk_ingest_status(job_id):
+    """대량 등록 상태/결과 조회"""
+    job = bulk_jobs.get(job_id)
+    if job is None or job.get("user_id") != get_current_user_id():
+        return jsonify({"completed": False, "error": "대량 등록 작업을 찾을 수 없습니다"}), 404
+    
+    response = {
+        "job_id": job_id,
+        "status": job["status"],
+        "completed": job["status"] in (DONE, FAILED),
+        "position": job.get("position"),
+        "result": job["result"]
+    }
+    if job["status"] == FAILED:
+        response["error"] = "대량 등록 실패: " + str(job["error"])
+    return jsonify(response), 200
+
 @clothes_bp.route('/fit', methods=['POST', 'OPTIONS'])
 def try_on_clothes():
     """입어보기 - 이미지를 받아서 main.py 실행 (백그라운드)"""
@@ -312,15 +480,12 @@ def try_on_clothes():
         input_dir = os.path.join(fit_dir, 'input')
         os.makedirs(input_dir, exist_ok=True)
         
-        # 타임스탬프를 포함한 파일명 생성
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        model_filename = f'model_{timestamp}.jpg'
-        model_path = os.path.join(input_dir, model_filename)
-        
-        with open(model_path, 'wb') as f:
-            f.write(image_bytes)
+        # 기록용 원본은 이미지 저장소에 (기존 model_<타임스탬프>.jpg 대신, 참조가 없으므로 GC 유예 시간 후 삭제)
+        model_hash = blob_store.put(image_bytes)
+        model_filename = model_hash + '.jpg'
+        model_path = blob_url(model_hash)
         
-        # model.jpg에도 복사 (main.py가 이 이름을 사용하므로)
+        # model.jpg로 저장 (main.py가 이 이름을 사용하므로)
         default_model_path = os.path.join(input_dir, 'model.jpg')
         with open(default_model_path, 'wb') as f:
             f.write(image_bytes)
@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, make_response, Response
+from datetime import datetime
 import sys
 import os
 import traceback
@@ -9,12 +10,32 @@ if back_dir not in sys.path:
 
 from db_files.clothes_db import (
     insert_clothing_for_current_user,
-    get_current_user_clothing,
-    delete_current_user_clothing
+    insert_clothing_batch_for_current_user,
+    get_current_user_clothing_page,
+    search_current_user_clothing,
+    WARDROBE_FIELDS,
+    delete_current_user_clothing,
+    get_similar_clothing_for_current_user
 )
+from db_files.wardrobe_version import wardrobe_versions
+from db_files.wardrobe_cache import get_wardrobe_cache
+from db_files.connection import pool_stats
+from db_files.clothing_search import FACET_COLUMNS
+from db_files.wardrobe_transfer import export_ndjson, import_ndjson
 
 clothing_bp = Blueprint('clothing', __name__, url_prefix='/api/clothing')
 
+# /save-batch 한 요청당 최대 옷 개수
+MAX_BATCH_SAVE_ITEMS = int(os.getenv("MAX_BATCH_SAVE_ITEMS", "100"))
+# /wardrobe 페이지 크기 (limit 생략 시 기본값 / 최댓값)
+WARDROBE_DEFAULT_PAGE_SIZE = int(os.getenv("WARDROBE_DEFAULT_PAGE_SIZE", "30"))
+WARDROBE_MAX_PAGE_SIZE = int(os.getenv("WARDROBE_MAX_PAGE_SIZE", "100"))
+# /search 결과 개수 (limit 생략 시 기본값 / 최댓값)
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", "50"))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "200"))
+# /cache-stats (캐시/DB 연결 풀 내부 상태) 공개 여부, 켜도 로그인한 사용자만
+CACHE_STATS_ENABLED = os.getenv("CACHE_STATS_ENABLED", "0") == "1"
+
 @clothing_bp.route('/save', methods=['POST'])
 def save_clothing():
     """모델 결과를 DB에 저장"""
@@ -38,7 +59,9 @@ def save_clothing():
             image_url=data['image_url'],
             main_category=data['main_category'],
             sub_category=data['sub_category'],
-            attributes_dict=data['attributes']
+            attributes_dict=data['attributes'],
+            embedding=data.get('embedding'),
+            allow_duplicate=bool(data.get('allow_duplicate', False))
         )
         
         # result는 jsonify 객체 또는 tuple (response, status_code)
@@ -53,9 +76,50 @@ def save_clothing():
         print(f"[clothing.py] 에러: {str(e)}\n")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@clothing_bp.route('/save-batch', methods=['POST'])
+def save_clothing_batch():
+    """
+    여러 옷을 한 번에 저장 (사진 한 장에서 나온 옷 전체)
+    body: {image_url(공통, 선택), items: [{image_url(선택), main_category, sub_category, attributes, embedding, allow_duplicate}], allow_duplicate}
+    """
+    try:
+        user = session.get("user")
+        if not user:
+            print("[clothing.py] 로그인이 필요합니다")
+            return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
+        
+        data = request.json or {}
+        items = data.get('items') or []
+        if not items:
+            return jsonify({'status': 'error', 'message': '저장할 옷이 없습니다'}), 400
+        if len(items) > MAX_BATCH_SAVE_ITEMS:
+            return jsonify({'status': 'error', 'message': f'한 번에 최대 {MAX_BATCH_SAVE_ITEMS}개까지 저장할 수 있습니다'}), 400
+        
+        print(f"\n[clothing.py] /save-batch 요청 (user: {user.get('id')}, 옷 {len(items)}개)")
+        
+        # 같은 사진의 옷들은 이미지를 한 번만 보내도 됨
+        shared_image_url = data.get('image_url')
+        for item in items:
+            item.setdefault('image_url', shared_image_url)
+            if not item.get('image_url') or not item.get('main_category'):
+                return jsonify({'status': 'error', 'message': 'image_url과 main_category가 필요합니다'}), 400
+            item.setdefault('sub_category', '기타')
+            item.setdefault('attributes', {})
+        
+        return insert_clothing_batch_for_current_user(items, allow_duplicate=bool(data.get('allow_duplicate', False)))
+        
+    except Exception as e:
+        print(f"[clothing.py] 일괄 저장 중 예외 발생: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @clothing_bp.route('/wardrobe', methods=['GET'])
 def get_wardrobe():
-    """사용자의 옷장 조회"""
+    """
+    사용자의 옷장 조회 (최신순, 페이지 단위)
+    - ?limit=페이지 크기 (최대 WARDROBE_MAX_PAGE_SIZE), ?cursor=이전 응답의 next_cursor
+    - ?fields=id,main_category,details (필요한 필드만, 생략하면 전체)
+    - 옷장 버전 기반 ETag: If-None-Match가 같으면 DB 조회 없이 304
+    """
     try:
         # 세션 확인
         user = session.get("user")
@@ -63,20 +127,131 @@ def get_wardrobe():
             print("[clothing.py] 로그인이 필요합니다")
             return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
         
-        print(f"\n[clothing.py] /wardrobe 요청 (user: {user.get('id')})")
+        limit = min(max(request.args.get('limit', default=WARDROBE_DEFAULT_PAGE_SIZE, type=int), 1), WARDROBE_MAX_PAGE_SIZE)
+        page_cursor = request.args.get('cursor') or None
+        fields = WARDROBE_FIELDS
+        if request.args.get('fields'):
+            requested = [field.strip() for field in request.args['fields'].split(',')]
+            unknown = [field for field in requested if field not in WARDROBE_FIELDS]
+            if unknown:
+                return jsonify({'status': 'error', 'message': f'알 수 없는 필드: {", ".join(unknown)}'}), 400
+            fields = tuple(field for field in WARDROBE_FIELDS if field in requested)
+        
+        # 로그인 시 세션에 저장된 User_id (이메일로 DB를 조회하지 않아도 됨)
+        user_id = user.get('useridseq')
+        etag = None
+        if user_id is not None:
+            etag = wardrobe_versions.etag(user_id, f"{limit}|{page_cursor}|{','.join(fields)}")
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+                response.headers['ETag'] = etag
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+        
+        print(f"\n[clothing.py] /wardrobe 요청 (user: {user.get('id')}, limit: {limit}, cursor: {page_cursor})")
         
         # 세션의 사용자 옷장 조회
-        result = get_current_user_clothing()
+        result = get_current_user_clothing_page(limit, page_cursor, fields)
         
         if isinstance(result, tuple):
             return result
         
+        if etag:
+            result.headers['ETag'] = etag
+            result.headers['Cache-Control'] = 'private, no-cache'
         return result
         
     except Exception as e:
         print(f"[clothing.py] 조회 실패: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     
+@clothing_bp.route('/search', methods=['GET'])
+def search_clothing_items():
+    """
+    옷장 패싯 검색 API
+    - 필터: ?color=블랙&color=화이트&fit=루즈 (같은 이름 여러 번 = OR, 다른 이름끼리 = AND)
+    - ?min_style_prob=60 : 1순위 스타일 확률(%) 하한
+    - ?q=블랙 : 카테고리/속성 값/스타일 이름 부분 일치 검색
+    - ?facets=color,fit,style : 값별 개수를 집계할 패싯 (생략 시 전체, 빈 값이면 집계 안 함)
+    - ?cursor=이전 응답의 next_cursor : 다음 페이지, ?details=1 : 옷마다 전체 속성(옷장 조회의 details) 포함
+    """
+    user = session.get("user")
+    if not user:
+        print("[clothing.py] 로그인이 필요합니다")
+        return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
+    
+    try:
+        filters = {facet: request.args.getlist(facet) for facet in FACET_COLUMNS if request.args.getlist(facet)}
+        facets = list(FACET_COLUMNS)
+        if request.args.get('facets') is not None:
+            facets = [facet.strip() for facet in request.args['facets'].split(',') if facet.strip()]
+            unknown = [facet for facet in facets if facet not in FACET_COLUMNS]
+            if unknown:
+                return jsonify({'status': 'error', 'message': f'알 수 없는 패싯: {", ".join(unknown)}'}), 400
+        min_style_prob = request.args.get('min_style_prob', type=float)
+        limit = min(max(request.args.get('limit', default=SEARCH_DEFAULT_LIMIT, type=int), 1), SEARCH_MAX_LIMIT)
+        text = (request.args.get('q') or '').strip() or None
+        page_cursor = request.args.get('cursor') or None
+        include_details = request.args.get('details') == '1'
+        
+        print(f"\n[clothing.py] /search 요청 (user: {user.get('id')}, 필터: {filters}, 검색어: {text}, 최소 스타일 확률: {min_style_prob})")
+        return search_current_user_clothing(filters, facets, min_style_prob, limit, text, page_cursor, include_details)
+        
+    except Exception as e:
+        print(f"[clothing.py] 검색 실패: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@clothing_bp.route('/export', methods=['GET'])
+def export_wardrobe():
+    """
+    현재 사용자 옷장 NDJSON 내보내기 (스트리밍, 비밀번호 제외)
+    - ?images=1 : 이미지 원본을 data URL로 포함 (파일이 커짐)
+    """
+    user = session.get("user")
+    if not user or user.get('useridseq') is None:
+        print("[clothing.py] 로그인이 필요합니다")
+        return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
+    
+    include_images = request.args.get('images') == '1'
+    print(f"\n[clothing.py] /export 요청 (user: {user.get('id')}, 이미지 포함: {include_images})")
+    
+    filename = f"wardrobe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+    return Response(
+        export_ndjson(user_id=user['useridseq'], include_images=include_images, include_passwords=False),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@clothing_bp.route('/import', methods=['POST'])
+def import_wardrobe():
+    """
+    NDJSON 옷장 가져오기 → 현재 사용자 옷장에 추가 (파일의 사용자 정보는 무시)
+    - 요청 본문(application/x-ndjson) 또는 'file' 업로드를 한 줄씩 읽어 임시 파일에 받고 끝(end 레코드)까지 검증
+      (업로드를 읽는 동안에는 DB 쓰기 트랜잭션 없음, 끊긴 업로드는 400이고 아무것도 저장하지 않음)
+    - 검증이 끝나면 짧은 트랜잭션 하나로 저장
+    - 이미지 저장소 경로(/api/images/<해시>)는 현재 사용자가 이미 가진 이미지만 연결 (다른 사용자 이미지 차단)
+    """
+    user = session.get("user")
+    if not user or user.get('useridseq') is None:
+        print("[clothing.py] 로그인이 필요합니다")
+        return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
+    
+    print(f"\n[clothing.py] /import 요청 (user: {user.get('id')})")
+    source = request.files['file'].stream if 'file' in request.files else request.stream
+    
+    try:
+        summary = import_ndjson(
+            source,
+            user_id=user['useridseq'],
+            progress=lambda done, total: print(f"[clothing.py] 가져오기 진행: {done}/{total if total else '?'}")
+        )
+        return jsonify({'status': 'success', **summary})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        print(f"[clothing.py] 가져오기 실패: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @clothing_bp.route('/<int:ci_id>', methods=['DELETE', 'OPTIONS'])
 def delete_clothing_item(ci_id):
     """의류 삭제 API"""
@@ -104,4 +279,31 @@ def delete_clothing_item(ci_id):
             
     except Exception as e:
         print(f"[clothing.py] 삭제 중 예외 발생: {str(e)}\n")
-        return jsonify({'status': 'error', 'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@clothing_bp.route('/<int:ci_id>/similar', methods=['GET'])
+def get_similar_clothing(ci_id):
+    """옷장에서 비슷한 옷 찾기 API (?k=개수)"""
+    user = session.get("user")
+    if not user:
+        print("[clothing.py] 로그인이 필요합니다")
+        return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
+    
+    k = min(max(request.args.get('k', default=5, type=int), 1), 50)
+    print(f"\n[clothing.py] GET /api/clothing/{ci_id}/similar 요청 (user: {user.get('id')}, k: {k})")
+    
+    try:
+        return get_similar_clothing_for_current_user(ci_id, k)
+    except Exception as e:
+        print(f"[clothing.py] 유사 아이템 조회 실패: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@clothing_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """옷장 캐시 적중률/크기, DB 연결 풀 상태 (CACHE_STATS_ENABLED=1일 때만, 로그인 필요)"""
+    if not CACHE_STATS_ENABLED:
+        return jsonify({'status': 'error', 'message': '찾을 수 없습니다'}), 404
+    if not session.get("user"):
+        print("[clothing.py] 로그인이 필요합니다")
+        return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
+    return jsonify(ok=True, wardrobe_cache=get_wardrobe_cache().stats(), db_pool=pool_stats())
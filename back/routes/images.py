@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify, send_file, session
+import sys
+import os
+
+back_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if back_dir not in sys.path:
+    sys.path.insert(0, back_dir)
+
+from db_files.blob_store import blob_store, is_blob_hash, guess_mimetype
+from db_files.clothes_db import user_owns_image
+
+images_bp = Blueprint('images', __name__, url_prefix='/api/images')
+
+# 이미지는 해시로 주소가 정해져 내용이 바뀌지 않으므로 1년간 캐시
+# 사용자 사진이므로 브라우저에만 (private, 공유 캐시/프록시에는 저장하지 않음)
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", str(365 * 24 * 3600)))
+
+def _image_response(path, mimetype, etag):
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=IMAGE_CACHE_MAX_AGE)
+    response.headers['Cache-Control'] = f'private, max-age={IMAGE_CACHE_MAX_AGE}, immutable'
+    return response
+
+@images_bp.route('/<image_hash>', methods=['GET'])
+def get_image(image_hash):
+    """
+    이미지 저장소의 원본/썸네일 제공 API
+    - ?size=256 : WebP 썸네일 (BLOB_THUMBNAIL_SIZES 중 하나, 없으면 생성)
+    - 로그인한 사용자의 옷이 참조하는 이미지만 (다른 사용자 이미지는 있어도 404)
+    """
+    user = session.get("user")
+    if not user or user.get('useridseq') is None:
+        return jsonify({'status': 'error', 'message': '로그인이 필요합니다', 'authenticated': False}), 401
+
+    if (not is_blob_hash(image_hash) or not user_owns_image(user['useridseq'], image_hash)
+            or not blob_store.exists(image_hash)):
+        return jsonify({'status': 'error', 'message': '이미지를 찾을 수 없습니다'}), 404
+
+    try:
+        size = request.args.get('size', type=int)
+        if size is not None:
+            if size not in blob_store.thumbnail_sizes:
+                sizes = ', '.join(str(s) for s in blob_store.thumbnail_sizes)
+                return jsonify({'status': 'error', 'message': f'지원하는 썸네일 크기: {sizes}'}), 400
+            path = blob_store.thumbnail_path(image_hash, size)
+            if path is not None:
+                return _image_response(path, 'image/webp', f'{image_hash}-{size}')
+            # 썸네일을 만들 수 없는 파일이면 원본으로
+
+        path = blob_store.path(image_hash)
+        with open(path, 'rb') as f:
+            mimetype = guess_mimetype(f.read(12))
+        return _image_response(path, mimetype, image_hash)
+
+    except Exception as e:
+        print(f"[images.py] 이미지 제공 실패: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
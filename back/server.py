@@ -5,8 +5,11 @@ from db_ import db, init_db
 from routes.users import users_bp
 #from routes.member_test import members_bp
 from routes.clothing import clothing_bp
+from routes.images import images_bp
 from chat.langspeech_openai_chroma import chat_bp
 from db_files.auth_db import auth_bp
+from db_files.connection import init_app as init_db_connections
+from db_files.migrate import migrate as migrate_smart_closet_db
 from routes.clothes import clothes_bp, initialize_models
 import os
 
@@ -27,6 +30,8 @@ os.environ['ORT_CUDA_UNAVAILABLE'] = '0'  # CUDA 사용 가능 표시
 def create_app():
     app = Flask(__name__, instance_relative_config=True)
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev_secret_key_123")
+    # 요청 본문 최대 크기 (넘으면 413, 옷장 가져오기처럼 이미지가 포함된 큰 파일 기준 / 대량 등록은 더 낮게 따로 제한)
+    app.config["MAX_CONTENT_LENGTH"] = int(float(os.getenv("MAX_UPLOAD_MB", "512")) * 1024 ** 2)
     
     # 308에러 발생 방지
     CORS(app,resources={r"/api/*": {"origins": ["https://localhost:3000", "https://127.0.0.1:3000"]}})
@@ -37,9 +42,14 @@ def create_app():
     app.register_blueprint(chat_bp)
     app.register_blueprint(clothes_bp)
     app.register_blueprint(clothing_bp)
+    app.register_blueprint(images_bp)
 
     app.register_blueprint(auth_bp)
     
+    # smart_closet.db 스키마 마이그레이션 + 연결 풀 (요청이 끝나면 연결 반납)
+    migrate_smart_closet_db()
+    init_db_connections(app)
+    
     app.config.from_object(Config)
     os.makedirs(app.instance_path, exist_ok=True)
     
@@ -0,0 +1,179 @@
+"""
+이미지 저장소 테스트 (db_files/blob_store.py)
+- 같은 내용은 한 번만 저장 (SHA-256 해시 경로)
+- WebP 썸네일이 크기별로 생성되는지 (같은 파일을 여러 스레드가 동시에 써도 실패하지 않는지)
+- 옷 저장 시 DB에는 해시만 남고 image_url은 /api/images/<해시>로 조회되는지
+- 참조 없는 이미지만 GC로 삭제되는지 (유예 시간 포함)
+
+실행 방법:
+python test_blob_store.py
+"""
+
+import io
+import os
+import base64
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from db_files import blob_store as blob_store_module
+from db_files import clothes_db
+from db_files.blob_store import BlobStore, blob_url, referenced_image_hashes, backfill_image_hashes
+from db_files.migrate import migrate
+
+
+def make_image(color, size=(800, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def to_data_url(data):
+    return 'data:image/jpeg;base64,' + base64.b64encode(data).decode('ascii')
+
+
+def test_put_and_thumbnails(store):
+    print("=" * 70)
+    print("1. 저장 / 중복 제거 / 썸네일")
+    print("=" * 70)
+
+    data = make_image('red')
+    image_hash = store.put(data)
+    assert store.put(data) == image_hash, "같은 내용인데 해시가 다름"
+    assert store.stats()['blobs'] == 1, "같은 내용이 두 번 저장됨"
+    with open(store.path(image_hash), 'rb') as f:
+        assert f.read() == data
+    print(f"  같은 사진 두 번 저장 → 파일 1개 ({image_hash[:12]}) ✅")
+
+    assert store.make_thumbnails(image_hash)
+    for size in store.thumbnail_sizes:
+        with Image.open(store.thumbnail_path(image_hash, size)) as thumbnail:
+            assert thumbnail.format == 'WEBP'
+            assert max(thumbnail.size) == size, (size, thumbnail.size)
+    print(f"  WebP 썸네일 {store.thumbnail_sizes} 생성 ✅")
+
+    # 같은 썸네일/원본을 여러 스레드가 동시에 쓰기 (백그라운드 썸네일 생성 + 요청 스레드 등)
+    for size in store.thumbnail_sizes:
+        os.remove(store.thumbnail_file(image_hash, size))
+    size = store.thumbnail_sizes[0]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(pool.map(lambda _: store.thumbnail_path(image_hash, size), range(16)))
+        list(pool.map(lambda _: store._write(store.path(image_hash), data), range(16)))
+    assert all(path is not None for path in paths), "동시 썸네일 생성 중 실패"
+    with open(store.path(image_hash), 'rb') as f:
+        assert f.read() == data, "동시 저장 후 원본이 깨짐"
+    leftovers = [name for name in os.listdir(os.path.dirname(store.path(image_hash))) if name.endswith('.tmp')]
+    assert not leftovers, leftovers
+    print("  동시 저장 16회 → 실패/임시 파일 없음 ✅")
+    return True
+
+
+def test_clothing_rows(tmp, store):
+    print("\n" + "=" * 70)
+    print("2. 옷 저장 시 해시만 DB에")
+    print("=" * 70)
+
+    db_path = os.path.join(tmp, 'blob.db')
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+        VALUES ('blob@example.com', 'x', 'blob', DATE('now'), DATE('now'), 'F')
+    ''')
+    user_id = cursor.lastrowid
+    clothes_db.invalidate_attribute_ids()
+
+    data_url = to_data_url(make_image('blue'))
+    items = [
+        {'image_url': data_url, 'main_category': '상의', 'sub_category': '티셔츠', 'attributes': {}},
+        {'image_url': data_url, 'main_category': '하의', 'sub_category': '청바지', 'attributes': {}},
+        {'image_url': 'http://example.com/shirt.jpg', 'main_category': '상의', 'sub_category': '셔츠', 'attributes': {}},
+    ]
+    clothes_db.insert_clothing_rows(cursor, user_id, items)
+    conn.commit()
+
+    stored = cursor.execute('SELECT CI_imageURL, CI_imageHash FROM clothing_information ORDER BY CI_id').fetchall()
+    image_hash = stored[0][1]
+    assert stored[:2] == [('', image_hash), ('', image_hash)], stored
+    assert stored[2] == ('http://example.com/shirt.jpg', None), stored[2]
+    assert store.exists(image_hash)
+    print(f"  data URL → CI_imageHash {image_hash[:12]}, CI_imageURL '' ✅")
+
+    urls = [item['image_url'] for item in clothes_db.fetch_wardrobe(cursor, user_id)]
+    assert sorted(urls) == sorted([blob_url(image_hash), blob_url(image_hash), 'http://example.com/shirt.jpg']), urls
+    print("  옷장 조회 image_url → /api/images/<해시> ✅")
+
+    # 이미지 제공 API 권한: 자기 옷이 참조하는 해시만
+    cursor.execute('''
+        INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+        VALUES ('other@example.com', 'x', 'other', DATE('now'), DATE('now'), 'F')
+    ''')
+    other_id = cursor.lastrowid
+    conn.commit()
+    original_db_path = clothes_db.DB_PATH
+    clothes_db.DB_PATH = db_path
+    try:
+        assert clothes_db.user_owns_image(user_id, image_hash)
+        assert not clothes_db.user_owns_image(other_id, image_hash), "다른 사용자 이미지 접근 허용"
+    finally:
+        clothes_db.DB_PATH = original_db_path
+    print("  이미지 권한: 소유자만 ✅")
+
+    # 기존 방식(data URL을 그대로 저장)한 옷 옮기기
+    old_url = to_data_url(make_image('green'))
+    cursor.execute('''
+        INSERT INTO clothing_information (User_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
+        VALUES (?, ?, '상의', '니트', DATE('now'), 1)
+    ''', (user_id, old_url))
+    conn.commit()
+    conn.close()
+    assert backfill_image_hashes(db_path) == 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM clothing_information WHERE CI_imageURL LIKE 'data:%'").fetchone()[0] == 0
+        referenced = referenced_image_hashes(conn.cursor())
+    finally:
+        conn.close()
+    assert len(referenced) == 2, referenced
+    print("  기존 data URL 옷 1개 저장소로 이동 ✅")
+    return referenced
+
+
+def test_garbage_collection(store, referenced):
+    print("\n" + "=" * 70)
+    print("3. 참조 없는 이미지 정리")
+    print("=" * 70)
+
+    orphan = store.put(make_image('yellow'))
+    store.make_thumbnails(orphan)
+    before = store.stats()['blobs']
+
+    result = store.collect_garbage(referenced, grace_seconds=3600)
+    assert store.exists(orphan), "유예 시간 안의 이미지가 삭제됨"
+    print(f"  유예 시간 안: {result['removed']}개 삭제 ✅")
+
+    old = os.path.getmtime(store.path(orphan)) - 7200
+    for image_hash, path, _, _ in store.iter_blobs():
+        os.utime(path, (old, old))
+    result = store.collect_garbage(referenced, grace_seconds=3600)
+    assert not store.exists(orphan), "참조 없는 이미지가 남아 있음"
+    assert not os.path.exists(store.thumbnail_file(orphan, store.thumbnail_sizes[0])), "썸네일이 남아 있음"
+    assert all(store.exists(image_hash) for image_hash in referenced), "참조 중인 이미지가 삭제됨"
+    assert result['removed'] == before - len(referenced), result
+    print(f"  유예 시간 지남: 참조 없는 {result['removed']}개 삭제, 참조 중인 {len(referenced)}개 유지 ✅")
+    return True
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        # 실제 uploads/blobs 대신 임시 폴더 사용 (썸네일은 테스트에서 직접 생성)
+        store = BlobStore(os.path.join(tmp, 'blobs'), eager_thumbnails=False)
+        blob_store_module.blob_store = store
+        results = [test_put_and_thumbnails(store)]
+        referenced = test_clothing_rows(tmp, store)
+        results.append(test_garbage_collection(store, referenced))
+    print("\n모든 테스트 통과!" if all(results) else "\n실패한 테스트가 있습니다.")
@@ -0,0 +1,195 @@
+"""
+옷 패싯 검색 테스트 (clothing_facet)
+- 0003 마이그레이션이 기존 clothing_attributes로 clothing_facet을 채우는지
+- insert_clothing_rows / delete_clothing이 clothing_facet을 같이 갱신하는지
+- search_clothing 결과와 패싯 개수가 clothing_attributes에서 직접 센 값과 같은지
+
+실행 방법:
+python test_clothing_search.py
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+
+from db_files import clothes_db
+from db_files.migrate import migrate, MIGRATIONS_DIR
+from db_files.clothing_search import parse_style_value, search_clothing
+
+ATTRIBUTES = ['색상', '핏', '소재', '추천 스타일 1순위', '추천 스타일 2순위']
+COLORS = ['블랙', '화이트', '네이비', '베이지']
+FITS = ['루즈', '노멀', '타이트']
+STYLES = ['모던', '캐주얼', '스트리트', '페미닌']
+
+
+def random_item(rng):
+    return {
+        'image_url': 'http://example.com/shirt.jpg',
+        'main_category': rng.choice(['상의', '하의']),
+        'sub_category': '티셔츠',
+        'attributes': {
+            '색상': rng.choice(COLORS),
+            '핏': rng.choice(FITS),
+            '소재': '면',
+            '추천 스타일 1순위': f"{rng.choice(STYLES)} (확률: {rng.uniform(30, 90):.2f}%)",
+            '추천 스타일 2순위': f"{rng.choice(STYLES)} (확률: {rng.uniform(5, 30):.2f}%)",
+        },
+    }
+
+
+def add_user(cursor, email):
+    cursor.execute('''
+        INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+        VALUES (?, 'x', ?, DATE('now'), DATE('now'), 'F')
+    ''', (email, email))
+    return cursor.lastrowid
+
+
+def expected_count(items, color=None, fit=None):
+    return sum(
+        1 for item in items
+        if (color is None or item['attributes']['색상'] in color)
+        and (fit is None or item['attributes']['핏'] in fit)
+    )
+
+
+def test_parse_style_value():
+    print("=" * 70)
+    print("1. 스타일 값 파싱")
+    print("=" * 70)
+
+    assert parse_style_value('모던 (확률: 70.17%)') == ('모던', 70.17)
+    assert parse_style_value('모던') == ('모던', None)
+    assert parse_style_value(None) == (None, None)
+    print("  '모던 (확률: 70.17%)' → ('모던', 70.17) ✅")
+    return True
+
+
+def test_backfill(tmp):
+    """0002까지 적용된 DB에 옷을 넣은 뒤 0003 적용 → clothing_facet이 채워짐"""
+    print("\n" + "=" * 70)
+    print("2. 기존 옷 채우기 (0003 마이그레이션)")
+    print("=" * 70)
+
+    old_dir = os.path.join(tmp, 'migrations_0002')
+    os.makedirs(old_dir)
+    for file_name in os.listdir(MIGRATIONS_DIR):
+        if file_name.startswith(('0001_', '0002_')):
+            shutil.copy(os.path.join(MIGRATIONS_DIR, file_name), old_dir)
+
+    db_path = os.path.join(tmp, 'backfill.db')
+    migrate(db_path, old_dir)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany('INSERT INTO attributes (A_name) VALUES (?)', [(name,) for name in ATTRIBUTES])
+    user_id = add_user(cursor, 'backfill@example.com')
+    clothes_db.invalidate_attribute_ids()
+    rng = random.Random(1)
+    items = [random_item(rng) for _ in range(50)]
+    # clothing_facet이 아직 없으므로 clothing_information / clothing_attributes만 직접 저장
+    attribute_ids = dict(cursor.execute('SELECT A_name, A_id FROM attributes').fetchall())
+    for item in items:
+        cursor.execute('''
+            INSERT INTO clothing_information
+            (User_id, CI_imageURL, CI_mainCategory, CI_subCategory, CI_createDate, CI_check)
+            VALUES (?, ?, ?, ?, DATE('now'), 1)
+        ''', (user_id, item['image_url'], item['main_category'], item['sub_category']))
+        ci_id = cursor.lastrowid
+        cursor.executemany('''
+            INSERT INTO clothing_attributes (CI_id, A_id, CA_value, CA_updateDate)
+            VALUES (?, ?, ?, DATE('now'))
+        ''', [(ci_id, attribute_ids[name], value) for name, value in item['attributes'].items()])
+    conn.commit()
+    conn.close()
+
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('SELECT CF_color, CF_style1, CF_style1Prob FROM clothing_facet ORDER BY CI_id').fetchall()
+        assert len(rows) == len(items), f"채워진 행 {len(rows)}개 (기대값 {len(items)})"
+        for item, (color, style, prob) in zip(items, rows):
+            assert color == item['attributes']['색상']
+            assert (style, prob) == parse_style_value(item['attributes']['추천 스타일 1순위']), (style, prob)
+        print(f"  옷 {len(rows)}개 채움, 색상/스타일/확률 일치 ✅")
+    finally:
+        conn.close()
+    return True
+
+
+def test_search_and_sync(tmp):
+    """저장/삭제 시 clothing_facet 동기화 + 검색 결과와 패싯 개수"""
+    print("\n" + "=" * 70)
+    print("3. 저장/삭제 동기화와 검색")
+    print("=" * 70)
+
+    db_path = os.path.join(tmp, 'search.db')
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany('INSERT INTO attributes (A_name) VALUES (?)', [(name,) for name in ATTRIBUTES])
+    user_id = add_user(cursor, 'search@example.com')
+    other_id = add_user(cursor, 'other@example.com')
+    clothes_db.invalidate_attribute_ids()
+
+    rng = random.Random(2)
+    items = [random_item(rng) for _ in range(200)]
+    ci_ids = clothes_db.insert_clothing_rows(cursor, user_id, items)
+    clothes_db.insert_clothing_rows(cursor, other_id, [random_item(rng) for _ in range(20)])
+    conn.commit()
+
+    filters = {'color': ['블랙', '화이트'], 'fit': ['루즈']}
+    result = search_clothing(cursor, user_id, filters, ['color', 'fit', 'style'])
+    assert result['total'] == expected_count(items, ['블랙', '화이트'], ['루즈'])
+    assert all(item['attributes']['color'] in filters['color'] for item in result['items'])
+    # 색상 개수는 색상 필터를 빼고 (핏만 적용), 핏 개수는 핏 필터를 빼고 (색상만 적용)
+    for color in COLORS:
+        assert result['facets']['color'].get(color, 0) == expected_count(items, [color], ['루즈']), color
+    for fit in FITS:
+        assert result['facets']['fit'].get(fit, 0) == expected_count(items, ['블랙', '화이트'], [fit]), fit
+    print(f"  검색 {result['total']}개, 색상/핏 패싯 개수 일치 ✅")
+
+    result = search_clothing(cursor, user_id, {}, [], min_style_prob=60)
+    expected = sum(1 for item in items if parse_style_value(item['attributes']['추천 스타일 1순위'])[1] >= 60)
+    assert result['total'] == expected
+    print(f"  1순위 스타일 확률 60% 이상 {expected}개 ✅")
+
+    # 옷장 화면: 카테고리 + 검색어, 페이지를 이어 붙이면 전체 개수와 같아야 함
+    matched = [item for item in items if item['main_category'] == '상의' and '네이비' in item['attributes'].values()]
+    seen, after = [], None
+    while True:
+        result = search_clothing(cursor, user_id, {'main_category': ['상의']}, [], limit=7, text='네이비',
+                                 after=after, include_details=True)
+        assert result['total'] == len(matched), (result['total'], len(matched))
+        seen.extend(result['items'])
+        after = result['next_after']
+        if after is None:
+            break
+    assert len(seen) == len(matched) and len({item['id'] for item in seen}) == len(seen)
+    assert all(item['details']['색상'] == '네이비' for item in seen)
+    print(f"  '상의' + 검색어 '네이비' {len(matched)}개, 7개씩 페이지 이어 붙이기 일치 (details 포함) ✅")
+
+    conn.close()
+    original_path = clothes_db.DB_PATH
+    clothes_db.DB_PATH = db_path
+    try:
+        for ci_id in ci_ids[:10]:
+            assert clothes_db.delete_clothing(ci_id)
+    finally:
+        clothes_db.DB_PATH = original_path
+
+    conn = sqlite3.connect(db_path)
+    try:
+        remaining = conn.execute('SELECT COUNT(*) FROM clothing_facet WHERE User_id = ?', (user_id,)).fetchone()[0]
+        assert remaining == len(items) - 10, remaining
+        print(f"  10개 삭제 후 clothing_facet {remaining}개 ✅")
+    finally:
+        conn.close()
+    return True
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [test_parse_style_value(), test_backfill(tmp), test_search_and_sync(tmp)]
+    print("\n모든 테스트 통과!" if all(results) else "\n실패한 테스트가 있습니다.")
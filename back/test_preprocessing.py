@@ -0,0 +1,95 @@
+"""
+배치 전처리 검증 테스트
+- BatchPreprocessor 결과가 HF AutoImageProcessor와 수치적으로 같은지 확인
+- 작은 배치에서의 전처리 시간 비교
+
+실행 방법:
+python test_preprocessing.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import torch
+from PIL import Image
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+clothes_dir = os.path.join(current_dir, 'clothes')
+if clothes_dir not in sys.path:
+    sys.path.insert(0, clothes_dir)
+
+from transformers import AutoImageProcessor
+from preprocessing import BatchPreprocessor
+
+BASE_TRANSFORMER = "google/vit-base-patch16-224-in21k"
+TOLERANCE = 1e-5
+
+
+def make_crops(count, seed=0):
+    """크기/종횡비가 다른 옷 조각 모양의 랜덤 이미지 (검은 배경 포함)"""
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(count):
+        h, w = rng.integers(60, 900, size=2)
+        array = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+        array[: h // 5] = 0  # 마스크 밖 영역
+        crops.append(Image.fromarray(array))
+    return crops
+
+
+def test_equivalence(processor, preprocess):
+    """HF 처리기와 결과 일치"""
+    print("=" * 70)
+    print("1. HF 처리기와 수치 일치 테스트")
+    print("=" * 70)
+
+    for count in (1, 3, 8):
+        crops = make_crops(count, seed=count)
+        expected = processor(images=crops, return_tensors="pt")['pixel_values']
+        actual = preprocess(crops)
+
+        assert actual.shape == expected.shape, f"shape 불일치: {actual.shape} vs {expected.shape}"
+        assert actual.dtype == expected.dtype, f"dtype 불일치: {actual.dtype} vs {expected.dtype}"
+        max_diff = (actual - expected).abs().max().item()
+        assert max_diff <= TOLERANCE, f"최대 오차 {max_diff} > {TOLERANCE}"
+        print(f"  배치 {count}: shape {tuple(actual.shape)}, 최대 오차 {max_diff:.2e} ✅")
+
+    # numpy 배열 입력도 같은 결과
+    crops = make_crops(2, seed=42)
+    arrays = [np.asarray(crop) for crop in crops]
+    assert torch.allclose(preprocess(arrays), preprocess(crops)), "배열 입력 결과 불일치"
+    print("  numpy 배열 입력 ✅")
+    return True
+
+
+def test_speed(processor, preprocess, repeat=20):
+    """작은 배치 전처리 시간 비교"""
+    print("\n" + "=" * 70)
+    print("2. 전처리 시간 비교")
+    print("=" * 70)
+    print(f"{'배치':>6}{'HF(ms)':>12}{'Batch(ms)':>12}{'속도 향상':>12}")
+
+    for count in (1, 2, 4, 8):
+        crops = make_crops(count, seed=count)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            processor(images=crops, return_tensors="pt")
+        hf_time = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            preprocess(crops)
+        batch_time = (time.perf_counter() - start) / repeat
+
+        print(f"{count:>6}{hf_time * 1000:>12.2f}{batch_time * 1000:>12.2f}{hf_time / batch_time:>11.2f}x")
+    return True
+
+
+if __name__ == '__main__':
+    processor = AutoImageProcessor.from_pretrained(BASE_TRANSFORMER)
+    preprocess = BatchPreprocessor(processor)
+
+    results = [test_equivalence(processor, preprocess), test_speed(processor, preprocess)]
+    print("\n모든 테스트 통과!" if all(results) else "\n실패한 테스트가 있습니다.")
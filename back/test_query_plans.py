@@ -0,0 +1,85 @@
+"""
+쿼리 실행 계획 테스트
+- 임시 DB에 마이그레이션을 적용한 뒤 EXPLAIN QUERY PLAN으로 자주 쓰는 쿼리가 인덱스를 타는지 확인
+- 옷장 조회(fetch_wardrobe), 옷 삭제 경로에서 테이블 전체 스캔(SCAN)이나 정렬용 임시 B-tree가 없어야 함
+
+실행 방법:
+python test_query_plans.py
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from db_files.migrate import migrate, status
+from db_files.clothes_db import WARDROBE_QUERY, build_wardrobe_query
+from db_files.clothing_search import build_search_query, build_count_query
+
+# (이름, 쿼리, 파라미터) - 옷장 조회, 패싯 검색, 삭제 경로
+# (패싯 개수 집계는 사용자 범위 GROUP BY라 임시 B-tree가 생길 수 있어 제외)
+CHECKED_QUERIES = [
+    ("옷장 조회 (fetch_wardrobe)", WARDROBE_QUERY, (1,)),
+    ("옷장 첫 페이지", build_wardrobe_query(limit=True), (1, 31)),
+    ("옷장 다음 페이지 (키셋)", build_wardrobe_query(after=True, limit=True), (1, '2024-01-01', 100, 31)),
+    ("옷장 페이지 (이미지/속성 제외)", build_wardrobe_query(('id', 'main_category'), after=True, limit=True),
+     (1, '2024-01-01', 100, 31)),
+    ("검색: 필터 없음", *build_search_query(1, {})),
+    ("검색: 카테고리 + 색상", *build_search_query(1, {'main_category': ['상의'], 'color': ['블랙', '화이트']})),
+    ("검색: 카테고리 + 검색어 다음 페이지", *build_search_query(
+        1, {'main_category': ['상의']}, text='블랙', after=('2024-01-01', 100), include_details=True)),
+    ("검색 개수: 검색어", *build_count_query(1, {}, text='블랙')),
+    ("검색 개수: 핏", *build_count_query(1, {'fit': ['루즈']})),
+    ("검색 개수: 스타일 + 확률", *build_count_query(1, {'style': ['모던']}, min_style_prob=60)),
+    ("삭제: 소유자 확인", 'SELECT User_id FROM clothing_information WHERE CI_id = ?', (1,)),
+    ("삭제: 속성", 'DELETE FROM clothing_attributes WHERE CI_id = ?', (1,)),
+    ("삭제: 옷 정보", 'DELETE FROM clothing_information WHERE CI_id = ?', (1,)),
+    ("삭제: 임베딩", 'DELETE FROM clothing_embedding WHERE CI_id = ?', (1,)),
+    ("삭제: 패싯", 'DELETE FROM clothing_facet WHERE CI_id = ?', (1,)),
+]
+
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+
+
+def test_migrations(db_path):
+    """새 DB에 모든 마이그레이션이 적용되고, 다시 실행해도 변화 없음"""
+    print("=" * 70)
+    print("1. 마이그레이션")
+    print("=" * 70)
+
+    version = migrate(db_path)
+    assert migrate(db_path) == version, "두 번째 실행에서 버전이 바뀜"
+    current, pending = status(db_path)
+    assert current == version and not pending, f"적용 안 된 마이그레이션: {pending}"
+    print(f"  스키마 버전 {version}, 재실행 시 변화 없음 ✅")
+    return True
+
+
+def test_query_plans(db_path):
+    """모든 검사 대상 쿼리가 인덱스(또는 PRIMARY KEY)만 사용"""
+    print("\n" + "=" * 70)
+    print("2. 쿼리 실행 계획")
+    print("=" * 70)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, sql, params in CHECKED_QUERIES:
+            plan = query_plan(conn, sql, params)
+            scans = [step for step in plan if step.startswith('SCAN ')]
+            temp_sorts = [step for step in plan if 'TEMP B-TREE' in step]
+            assert not scans, f"{name}: 전체 스캔 {scans}"
+            assert not temp_sorts, f"{name}: 임시 정렬 {temp_sorts}"
+            print(f"  {name} ✅")
+            for step in plan:
+                print(f"      {step}")
+    finally:
+        conn.close()
+    return True
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'query_plan.db')
+        results = [test_migrations(db_path), test_query_plans(db_path)]
+    print("\n모든 테스트 통과!" if all(results) else "\n실패한 테스트가 있습니다.")
@@ -0,0 +1,248 @@
+"""
+옷장 NDJSON 내보내기/가져오기 테스트 (db_files/wardrobe_transfer.py)
+- 내보낸 뒤 빈 DB로 가져오면 사용자/옷/속성/등록일/이미지가 그대로인지
+- 내보내기 메모리가 옷 개수와 상관없이 일정한지 (tracemalloc 최대 사용량 비교)
+- 특정 사용자 옷장으로 가져오기, 잘못된 파일/끊긴 파일 거부 (끊긴 파일은 아무것도 저장하지 않음)
+- 요청으로 가져온 파일의 이미지 저장소 경로는 받는 사용자가 가진 이미지만 연결
+- 업로드를 읽는 동안 쓰기 트랜잭션을 열지 않는지 (다른 연결의 쓰기가 막히지 않음)
+
+실행 방법:
+python test_wardrobe_transfer.py [옷 개수]
+"""
+
+import os
+import sys
+import time
+import base64
+import random
+import sqlite3
+import tempfile
+import tracemalloc
+
+from db_files import clothes_db
+from db_files.blob_store import blob_store
+from db_files.migrate import migrate
+from db_files.wardrobe_transfer import export_ndjson, import_ndjson
+
+ATTRIBUTES = ['색상', '핏', '소재', '추천 스타일 1순위']
+VALUES = ['블랙', '화이트', '루즈', '노멀', '면', '모던 (확률: 70.17%)']
+
+
+def populate(db_path, garments, seed=0):
+    """사용자 2명, 옷 garments개 (하나는 이미지 저장소 사진)"""
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany('INSERT INTO attributes (A_name) VALUES (?)', [(name,) for name in ATTRIBUTES])
+    user_ids = []
+    for name in ('alice', 'bob'):
+        cursor.execute('''
+            INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+            VALUES (?, 'pbkdf2:sha256$x', ?, '2024-01-01', '2024-02-01', 'F')
+        ''', (f"{name}@example.com", name))
+        user_ids.append(cursor.lastrowid)
+    clothes_db.invalidate_attribute_ids()
+
+    rng = random.Random(seed)
+    photo = 'data:image/png;base64,' + base64.b64encode(b'\x89PNG\r\n\x1a\n' + b'0' * 64).decode('ascii')
+    items = [{
+        'image_url': photo if i == 0 else f"http://example.com/{i}.jpg",
+        'main_category': rng.choice(['상의', '하의']),
+        'sub_category': '티셔츠',
+        'attributes': {name: rng.choice(VALUES) for name in ATTRIBUTES},
+        'created_at': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    } for i in range(garments)]
+    half = garments // 2
+    clothes_db.insert_clothing_rows(cursor, user_ids[0], items[:half])
+    clothes_db.insert_clothing_rows(cursor, user_ids[1], items[half:])
+    conn.commit()
+    conn.close()
+
+
+def snapshot(db_path):
+    """비교용 내용 (id 제외)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        users = conn.execute('''
+            SELECT User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender
+            FROM User ORDER BY User_email
+        ''').fetchall()
+        clothing = conn.execute('''
+            SELECT u.User_email, ci.CI_imageURL, ci.CI_imageHash, ci.CI_mainCategory, ci.CI_subCategory, ci.CI_createDate,
+                   (SELECT group_concat(a.A_name || '=' || ca.CA_value || '@' || ca.CA_updateDate, '|')
+                    FROM clothing_attributes ca JOIN attributes a ON a.A_id = ca.A_id WHERE ca.CI_id = ci.CI_id),
+                   (SELECT cf.CF_color || cf.CF_style1 || cf.CF_createDate FROM clothing_facet cf WHERE cf.CI_id = ci.CI_id)
+            FROM clothing_information ci JOIN User u ON u.User_id = ci.User_id
+            ORDER BY u.User_email, ci.CI_id
+        ''').fetchall()
+        return users, clothing
+    finally:
+        conn.close()
+
+
+def export_to_file(db_path, path, **options):
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in export_ndjson(db_path, **options):
+            f.write(line)
+
+
+def test_round_trip(tmp, garments):
+    print("=" * 70)
+    print(f"1. 내보내기 → 빈 DB로 가져오기 (옷 {garments}개)")
+    print("=" * 70)
+
+    source = os.path.join(tmp, 'source.db')
+    target = os.path.join(tmp, 'target.db')
+    dump = os.path.join(tmp, 'wardrobe.ndjson')
+    populate(source, garments)
+
+    start = time.perf_counter()
+    export_to_file(source, dump, include_images=True)
+    export_seconds = time.perf_counter() - start
+    print(f"  내보내기: {export_seconds:.2f}초 ({garments / export_seconds:,.0f}개/초, {os.path.getsize(dump) / 1024 ** 2:.1f} MB)")
+
+    migrate(target)
+    clothes_db.invalidate_attribute_ids()
+    with open(dump, 'r', encoding='utf-8') as f:
+        summary = import_ndjson(f, target, batch_size=1000)
+    print(f"  가져오기: {summary['seconds']}초 ({summary['clothing_per_sec']:,.0f}개/초, 배치 {summary['batches']}개)")
+
+    assert summary['clothing'] == garments and summary['users_created'] == 2, summary
+    assert snapshot(source) == snapshot(target), "가져온 내용이 원본과 다름"
+    print("  사용자/옷/속성/등록일/패싯/이미지 해시 일치 ✅")
+    return True
+
+
+def test_constant_memory(tmp):
+    print("\n" + "=" * 70)
+    print("2. 내보내기 메모리 (옷 개수와 무관)")
+    print("=" * 70)
+
+    peaks = {}
+    for garments in (1000, 10000):
+        db_path = os.path.join(tmp, f'memory_{garments}.db')
+        populate(db_path, garments, seed=garments)
+        tracemalloc.start()
+        lines = sum(1 for _ in export_ndjson(db_path))
+        peaks[garments] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert lines == garments + len(ATTRIBUTES) + 2 + 2, lines
+        print(f"  옷 {garments:>6}개: 최대 {peaks[garments] / 1024:.0f} KB")
+    assert peaks[10000] < peaks[1000] * 2, peaks
+    print("  옷 10배 → 메모리 2배 미만 ✅")
+    return True
+
+
+def test_import_into_user(tmp):
+    print("\n" + "=" * 70)
+    print("3. 특정 사용자 옷장으로 가져오기 / 잘못된 파일")
+    print("=" * 70)
+
+    source = os.path.join(tmp, 'user_source.db')
+    target = os.path.join(tmp, 'user_target.db')
+    populate(source, 40)
+    conn = sqlite3.connect(source)
+    alice = conn.execute("SELECT User_id FROM User WHERE User_email = 'alice@example.com'").fetchone()[0]
+    conn.close()
+
+    lines = list(export_ndjson(source, user_id=alice, include_passwords=False))
+    assert all('"password"' not in line for line in lines), "비밀번호 해시가 포함됨"
+
+    migrate(target)
+    conn = sqlite3.connect(target)
+    conn.execute('''
+        INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+        VALUES ('carol@example.com', 'x', 'carol', DATE('now'), DATE('now'), 'F')
+    ''')
+    carol = conn.execute("SELECT User_id FROM User WHERE User_email = 'carol@example.com'").fetchone()[0]
+    conn.commit()
+    conn.close()
+    clothes_db.invalidate_attribute_ids()
+
+    summary = import_ndjson(lines, target, user_id=carol, batch_size=7)
+    assert summary['clothing'] == 20 and summary['batches'] == 3, summary
+    conn = sqlite3.connect(target)
+    try:
+        owners = conn.execute('SELECT DISTINCT User_id FROM clothing_information').fetchall()
+        users = conn.execute('SELECT COUNT(*) FROM User').fetchone()[0]
+    finally:
+        conn.close()
+    assert owners == [(carol,)] and users == 1, (owners, users)
+    print("  alice 옷 20개 → carol 옷장 (비밀번호 제외, 사용자 추가 없음) ✅")
+
+    # 파일의 저장소 경로(/api/images/<해시>): 요청으로 가져오면 받는 사용자가 가진 이미지만 연결
+    photo_lines = [line for line in lines if '/api/images/' in line]
+    assert len(photo_lines) == 1, photo_lines
+    conn = sqlite3.connect(target)
+    linked = conn.execute('SELECT COUNT(*) FROM clothing_information WHERE CI_imageHash IS NOT NULL').fetchone()[0]
+    conn.close()
+    assert linked == 0, "다른 사용자(alice) 이미지가 carol 옷에 연결됨"
+    print("  다른 사용자 이미지 경로 → 연결하지 않음 ✅")
+
+    clothes_db.invalidate_attribute_ids()
+    summary = import_ndjson(lines, source, user_id=alice)
+    conn = sqlite3.connect(source)
+    linked = conn.execute('SELECT COUNT(*) FROM clothing_information WHERE User_id = ? AND CI_imageHash IS NOT NULL',
+                          (alice,)).fetchone()[0]
+    conn.close()
+    assert summary['clothing'] == 20 and linked == 2, (summary, linked)
+    print("  자기 옷장 파일 다시 가져오기 → 이미 가진 이미지는 연결 ✅")
+
+    clothes_db.invalidate_attribute_ids()
+    summary = import_ndjson(lines, target, user_id=carol, trust_blob_paths=True)
+    conn = sqlite3.connect(target)
+    linked = conn.execute('SELECT COUNT(*) FROM clothing_information WHERE CI_imageHash IS NOT NULL').fetchone()[0]
+    conn.close()
+    assert linked == 1, linked
+    print("  CLI(trust_blob_paths=True) → 저장소 경로 그대로 연결 ✅")
+
+    conn = sqlite3.connect(target)
+    before = conn.execute('SELECT COUNT(*) FROM clothing_information').fetchone()[0]
+    conn.close()
+    try:
+        import_ndjson(lines[:-3], target, user_id=carol, batch_size=7)
+        raise AssertionError("끊긴 파일(end 레코드 없음)을 받아들임")
+    except ValueError as e:
+        print(f"  끊긴 파일 거부: {e}")
+    conn = sqlite3.connect(target)
+    after = conn.execute('SELECT COUNT(*) FROM clothing_information').fetchone()[0]
+    conn.close()
+    assert after == before, f"끊긴 파일의 옷 {after - before}개가 저장됨"
+    print("  끊긴 파일 → 아무것도 저장하지 않음 ✅")
+
+    # 느린 업로드를 읽는 동안 다른 연결의 쓰기가 막히지 않는지 (업로드 중간에 짧은 timeout으로 저장)
+    def slow_upload():
+        for index, line in enumerate(lines):
+            if index == len(lines) // 2:
+                other = sqlite3.connect(target, timeout=0.1)
+                try:
+                    other.execute('''
+                        INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+                        VALUES ('dave@example.com', 'x', 'dave', DATE('now'), DATE('now'), 'M')
+                    ''')
+                    other.commit()
+                finally:
+                    other.close()
+            yield line
+
+    clothes_db.invalidate_attribute_ids()
+    summary = import_ndjson(slow_upload(), target, user_id=carol, batch_size=7)
+    assert summary['clothing'] == 20, summary
+    print("  업로드를 읽는 동안 다른 요청의 쓰기 가능 (database is locked 없음) ✅")
+
+    try:
+        import_ndjson(['{"type": "clothing"}\n'], target)
+        raise AssertionError("header 없는 파일을 받아들임")
+    except ValueError as e:
+        print(f"  header 없는 파일 거부: {e} ✅")
+    return True
+
+
+if __name__ == '__main__':
+    garments = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        # 실제 uploads/blobs 대신 임시 폴더 사용
+        blob_store.root = os.path.join(tmp, 'blobs')
+        blob_store.eager_thumbnails = False
+        results = [test_round_trip(tmp, garments), test_constant_memory(tmp), test_import_into_user(tmp)]
+    print("\n모든 테스트 통과!" if all(results) else "\n실패한 테스트가 있습니다.")
@@ -0,0 +1,123 @@
+"""
+DB 기반 옷장 버전 테스트 (db_files/wardrobe_version.py, migrations/0005_wardrobe_version.sql)
+- 다른 연결(= bulk_ingest.py, wardrobe_transfer import 같은 다른 프로세스)에서 저장/삭제해도 버전과 ETag가 바뀌는지
+- 바뀐 게 없으면 버전 테이블을 다시 읽지 않는지 (PRAGMA data_version만 확인)
+- 옷장 캐시(db_files/wardrobe_cache.py)도 다른 프로세스의 저장 후 다시 읽는지 (챗봇/옷장 화면이 오래된 옷장을 보지 않음)
+
+실행 방법:
+python test_wardrobe_version.py
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from db_files import clothes_db
+from db_files.migrate import migrate
+from db_files.wardrobe_cache import WardrobeCache
+from db_files.wardrobe_version import WardrobeVersions
+
+
+def create_user(db_path, email):
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute('''
+            INSERT INTO User (User_email, User_password, User_nickname, User_createDate, User_updateDate, User_gender)
+            VALUES (?, 'x', ?, DATE('now'), DATE('now'), 'F')
+        ''', (email, email.split('@')[0]))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def insert_from_other_connection(db_path, user_id, count):
+    """서버 밖에서 저장하는 경우 (wardrobe_changed를 부르지 않음)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        items = [{
+            'image_url': f"http://example.com/{i}.jpg", 'main_category': '상의', 'sub_category': '티셔츠', 'attributes': {},
+        } for i in range(count)]
+        ci_ids = clothes_db.insert_clothing_rows(conn.cursor(), user_id, items)
+        conn.commit()
+        return ci_ids
+    finally:
+        conn.close()
+
+
+def test_version_follows_db(tmp):
+    print("=" * 70)
+    print("1. 다른 연결의 저장/삭제 → 버전/ETag 변경")
+    print("=" * 70)
+
+    db_path = os.path.join(tmp, 'version.db')
+    migrate(db_path)
+    alice = create_user(db_path, 'alice@example.com')
+    bob = create_user(db_path, 'bob@example.com')
+    versions = WardrobeVersions(db_path)
+
+    assert versions.get(alice) == 0 and versions.get(bob) == 0
+    etag = versions.etag(alice, '30|None|all')
+    assert versions.etag(alice, '30|None|all') == etag, "바뀐 게 없는데 ETag가 다름"
+
+    ci_ids = insert_from_other_connection(db_path, alice, 3)
+    assert versions.get(alice) == 3 and versions.get(bob) == 0, (versions.get(alice), versions.get(bob))
+    assert versions.etag(alice, '30|None|all') != etag, "저장 후에도 ETag가 같음 (304로 오래된 옷장 응답)"
+    print(f"  다른 연결에서 옷 3개 저장 → alice 버전 {versions.get(alice)}, bob 버전 {versions.get(bob)} ✅")
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM clothing_information WHERE CI_id = ?', (ci_ids[0],))
+    conn.commit()
+    conn.close()
+    assert versions.get(alice) == 4
+    print("  다른 연결에서 삭제 → 버전 증가 ✅")
+
+    statements = []
+    versions._connection().set_trace_callback(statements.append)
+    for _ in range(5):
+        versions.get(alice)
+    assert all(statement.startswith('PRAGMA') for statement in statements), statements
+    print(f"  바뀐 게 없으면 PRAGMA data_version만 ({len(statements)}회) ✅")
+    versions.close()
+    return True
+
+
+def test_cache_follows_db(tmp):
+    print("\n" + "=" * 70)
+    print("2. 옷장 캐시 - 다른 연결의 저장 후 다시 읽기")
+    print("=" * 70)
+
+    db_path = os.path.join(tmp, 'cache.db')
+    migrate(db_path)
+    user_id = create_user(db_path, 'carol@example.com')
+    versions = WardrobeVersions(db_path)
+    cache = WardrobeCache(versions=versions)
+
+    loads = []
+
+    def loader():
+        loads.append(1)
+        conn = sqlite3.connect(db_path)
+        try:
+            return clothes_db.fetch_wardrobe(conn.cursor(), user_id)
+        finally:
+            conn.close()
+
+    insert_from_other_connection(db_path, user_id, 2)
+    assert len(cache.get_or_load(user_id, loader)) == 2
+    assert len(cache.get_or_load(user_id, loader)) == 2 and len(loads) == 1, "두 번째 조회가 캐시를 쓰지 않음"
+    assert cache.peek(user_id) is not None
+    print("  두 번째 조회는 캐시 ✅")
+
+    insert_from_other_connection(db_path, user_id, 3)
+    assert cache.peek(user_id) is None, "다른 연결에서 저장했는데 캐시가 최신으로 보임"
+    assert len(cache.get_or_load(user_id, loader)) == 5 and len(loads) == 2
+    print("  다른 연결에서 옷 3개 저장 → 캐시 무효, 다시 읽어서 5개 ✅")
+    versions.close()
+    return True
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [test_version_follows_db(tmp), test_cache_follows_db(tmp)]
+    print("\n모든 테스트 통과!" if all(results) else "\n실패한 테스트가 있습니다.")
@@ -9,7 +9,7 @@ function AnalysisLoading() {
     const [error, setError] = useState(null);
 
     useEffect(() => {
-        // ✅ 이미 분석된 결과를 받아옴 (다시 분석 안 함!)
+        // ✅ 업로드 응답(job_id)을 받아 분석 완료까지 상태 폴링
         const { image, filename, result } = location.state ?? {};
 
         console.log("[AnalysisLoading] 데이터 수신:", { image: !!image, filename, result });
@@ -20,36 +20,79 @@ function AnalysisLoading() {
             return;
         }
 
-        // ✅ 진행률 애니메이션
-        setProgress(30);
+        let cancelled = false;
+        let pollTimer = null;
+        let navigateTimer = null;
 
-        // ✅ 분석 결과 확인
-        if (!result.success || !result.detected?.length) {
-            console.error("[AnalysisLoading] 분석 실패:", result.error);
-            setError(result.error || "옷을 감지하지 못했습니다.");
-            setProgress(0);
-            return;
-        }
+        const handleCompleted = (status) => {
+            // ✅ 분석 결과 확인
+            if (!status.success || !status.detected?.length) {
+                console.error("[AnalysisLoading] 분석 실패:", status.error);
+                setError(status.error || "옷을 감지하지 못했습니다.");
+                setProgress(0);
+                return;
+            }
 
-        console.log("[AnalysisLoading] 분석 성공! 감지된 옷:", result.detected.length);
+            console.log("[AnalysisLoading] 분석 성공! 감지된 옷:", status.detected.length);
 
-        // ✅ 500ms 후 Result 페이지로 이동
-        const timer = setTimeout(() => {
+            // ✅ 500ms 후 Result 페이지로 이동
             setProgress(100);
-            console.log("[AnalysisLoading] Result 페이지로 이동");
-            
-            navigate('/result', {
-                state: {
-                    detected: result.detected,
-                    filename,
-                    image,
-                    analysis: result.analysis,
-                    backendPath: result.path
+            navigateTimer = setTimeout(() => {
+                console.log("[AnalysisLoading] Result 페이지로 이동");
+                
+                navigate('/result', {
+                    state: {
+                        detected: status.detected,
+                        filename,
+                        image,
+                        analysis: status.analysis,
+                        backendPath: status.path
+                    }
+                });
+            }, 500);
+        };
+
+        const poll = async () => {
+            try {
+                const res = await fetch(`/api/analysis-status/${result.job_id}`, { credentials: "include" });
+                const status = await res.json();
+                if (cancelled) return;
+
+                if (!res.ok) {
+                    setError(status.error || "분석 상태를 확인할 수 없습니다.");
+                    setProgress(0);
+                    return;
+                }
+
+                if (status.completed) {
+                    handleCompleted(status);
+                    return;
                 }
-            });
-        }, 500);
 
-        return () => clearTimeout(timer);
+                // ✅ 대기 중 30%, 분석 중 60%
+                setProgress(status.status === 'running' ? 60 : 30);
+                pollTimer = setTimeout(poll, 1000);
+            } catch (err) {
+                if (cancelled) return;
+                console.error("[AnalysisLoading] 상태 조회 실패:", err);
+                pollTimer = setTimeout(poll, 2000);
+            }
+        };
+
+        // ✅ 진행률 애니메이션
+        setProgress(10);
+
+        if (result.job_id) {
+            poll();
+        } else {
+            handleCompleted(result);
+        }
+
+        return () => {
+            cancelled = true;
+            clearTimeout(pollTimer);
+            clearTimeout(navigateTimer);
+        };
     }, [location, navigate]);
 
     if (error) {
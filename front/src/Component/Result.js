@@ -79,39 +79,58 @@ const convertToDbFormat = (clothingItem) => {
             let successCount = 0;
             let failedCount = 0;
 
-            for (let i = 0; i < detected.length; i++) {
-                const clothingItem = detected[i];
+            const items = detected.map((clothingItem, i) => {
                 const attributes = convertToDbFormat(clothingItem);
-                
                 console.log(`[프론트] ${i + 1}번 옷 속성:`, attributes);
+                return {
+                    main_category: clothingItem.main_category,
+                    sub_category: clothingItem.details.카테고리 || '기타',
+                    attributes: attributes,
+                    embedding: clothingItem.embedding
+                };
+            });
 
-                try {
-                    const res = await fetch('/api/clothing/save', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({
-                            user_id: 1,
-                            image_url: image,
-                            main_category: clothingItem.main_category,
-                            sub_category: clothingItem.details.카테고리 || '기타',  // ← 수정
-                            attributes: attributes
-                        }),
-                        credentials: "include"
-                    });
+            // 사진 한 장의 옷 전체를 요청 한 번으로 저장 (이미지는 공통으로 한 번만 전송)
+            const requestSaveBatch = async (batchItems) => {
+                const res = await fetch('/api/clothing/save-batch', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        image_url: image,
+                        items: batchItems
+                    }),
+                    credentials: "include"
+                });
+                const data = await res.json();
+                if (!res.ok) {
+                    throw new Error(data.message || '저장 실패');
+                }
+                return data;
+            };
 
-                    if (res.ok) {
-                        const result = await res.json();
-                        console.log(`[프론트] ${i + 1}번 옷 저장 성공:`, result);
-                        successCount++;
-                    } else {
-                        const errorData = await res.json();
-                        console.error(`[프론트] ${i + 1}번 옷 저장 실패:`, errorData);
-                        failedCount++;
-                    }
-                } catch (err) {
-                    console.error(`[프론트] ${i + 1}번 옷 저장 중 오류:`, err);
-                    failedCount++;
+            try {
+                const result = await requestSaveBatch(items);
+                console.log('[프론트] 일괄 저장 결과:', result);
+                successCount += result.saved.length;
+
+                // 옷장에 거의 같은 옷이 이미 있으면 사용자에게 확인 후 다시 저장
+                const confirmed = result.duplicates.filter((duplicate) => {
+                    const clothingItem = detected[duplicate.index];
+                    console.log(`[프론트] ${duplicate.index + 1}번 옷 중복 의심:`, duplicate);
+                    return window.confirm(
+                        `${duplicate.index + 1}번 옷(${clothingItem.main_category})과 비슷한 옷이 이미 옷장에 있습니다.\n\n` +
+                        `그래도 저장하시겠습니까?`
+                    );
+                });
+                if (confirmed.length > 0) {
+                    const retried = await requestSaveBatch(
+                        confirmed.map((duplicate) => ({ ...items[duplicate.index], allow_duplicate: true }))
+                    );
+                    successCount += retried.saved.length;
                 }
+            } catch (err) {
+                console.error('[프론트] 옷 저장 중 오류:', err);
+                failedCount = items.length - successCount;
             }
 
             if (failedCount === 0) {
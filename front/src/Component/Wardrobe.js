@@ -1,15 +1,33 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Container, Row, Col, Card, Button, Form, Spinner, Alert } from 'react-bootstrap';
 import './Wardrobe.css';
 
+// 옷장 한 번에 불러올 옷 개수
+const WARDROBE_PAGE_SIZE = 30;
+// 검색어 입력 후 서버 검색까지 기다리는 시간 (ms)
+const SEARCH_DEBOUNCE_MS = 300;
+const CATEGORIES = ['상의', '하의', '아우터', '원피스'];
+// 이미지 저장소(/api/images/<해시>)의 옷 사진은 WebP 썸네일로 표시
+const THUMBNAIL_SIZE = 512;
+const thumbnailUrl = (url) => (url && url.startsWith('/api/images/') ? `${url}?size=${THUMBNAIL_SIZE}` : url);
+
 function Wardrobe() {
     const navigate = useNavigate();
     const [clothes, setClothes] = useState([]);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState('전체');
     const [searchTerm, setSearchTerm] = useState('');
+    const [debouncedSearch, setDebouncedSearch] = useState('');
     const [deletingId, setDeletingId] = useState(null);
+    // 다음 페이지 커서 (null이면 마지막 페이지)
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    // 서버가 센 전체 개수 (불러온 페이지 수와 무관), 카테고리별 개수
+    const [total, setTotal] = useState(0);
+    const [categoryCounts, setCategoryCounts] = useState(null);
+    // 필터/검색어를 빨리 바꿀 때 늦게 도착한 이전 응답 무시
+    const requestIdRef = useRef(0);
     
     // 세션 확인 상태 추가
     const [isLoggedIn, setIsLoggedIn] = useState(false);
@@ -26,9 +44,8 @@ function Wardrobe() {
                 console.log('[프론트] 세션 확인:', data);
                 
                 if (data.authenticated) {
+                    // 세션 확인 후 옷 목록 조회 (아래 필터/검색어 useEffect에서)
                     setIsLoggedIn(true);
-                    // 세션 확인 후 옷 목록 조회
-                    await fetchClothes();
                 } else {
                     setIsLoggedIn(false);
                     setIsSessionChecked(true);
@@ -53,18 +70,68 @@ function Wardrobe() {
         checkSession();
     }, [navigate]);
 
-    // 세션의 사용자 옷만 조회
-    const fetchClothes = async () => {
+    // 검색어는 입력이 멈춘 뒤에 서버로
+    useEffect(() => {
+        const timer = setTimeout(() => setDebouncedSearch(searchTerm.trim()), SEARCH_DEBOUNCE_MS);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    // 로그인 확인 후, 필터/검색어가 바뀔 때마다 첫 페이지부터 다시 조회
+    useEffect(() => {
+        if (isLoggedIn) {
+            fetchClothes();
+        }
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [isLoggedIn, filter, debouncedSearch]);
+
+    const isFiltered = filter !== '전체' || debouncedSearch !== '';
+
+    // 필터/검색은 서버(/api/clothing/search)에서 → 불러온 페이지와 상관없이 옷장 전체에서 찾고 전체 개수를 받음
+    // 필터가 없으면 옷장 조회(/api/clothing/wardrobe, ETag)를 쓰고 개수만 검색 API로
+    const buildRequest = (cursor) => {
+        if (isFiltered) {
+            const params = new URLSearchParams({ limit: WARDROBE_PAGE_SIZE, details: '1', facets: '' });
+            if (filter !== '전체') params.set('main_category', filter);
+            if (debouncedSearch) params.set('q', debouncedSearch);
+            if (cursor) params.set('cursor', cursor);
+            return `/api/clothing/search?${params.toString()}`;
+        }
+        const params = new URLSearchParams({ limit: WARDROBE_PAGE_SIZE });
+        if (cursor) params.set('cursor', cursor);
+        // 옷장이 바뀌지 않았으면 서버가 304(ETag)로 응답 → 브라우저 캐시의 이전 응답을 그대로 사용
+        return `/api/clothing/wardrobe?${params.toString()}`;
+    };
+
+    // 전체 개수 + 카테고리별 개수 (옷은 1개만 받음)
+    const fetchCounts = async () => {
+        const params = new URLSearchParams({ limit: 1, facets: 'main_category' });
+        if (debouncedSearch) params.set('q', debouncedSearch);
+        const res = await fetch(`/api/clothing/search?${params.toString()}`, { credentials: 'include' });
+        if (!res.ok) return null;
+        return res.json();
+    };
+
+    // 세션의 사용자 옷만 조회 (페이지 단위, cursor가 있으면 다음 페이지를 이어 붙임)
+    const fetchClothes = async (cursor = null) => {
+        const requestId = ++requestIdRef.current;
         try {
-            setLoading(true);
+            if (cursor) {
+                setLoadingMore(true);
+            } else {
+                setLoading(true);
+            }
             
-            const res = await fetch('/api/clothing/wardrobe', {
-                method: 'GET',
-                credentials: 'include',
-                headers: {
-                    'Content-Type': 'application/json'
-                }
-            });
+            const [res, counts] = await Promise.all([
+                fetch(buildRequest(cursor), {
+                    method: 'GET',
+                    credentials: 'include',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    }
+                }),
+                cursor ? Promise.resolve(null) : fetchCounts()
+            ]);
+            if (requestId !== requestIdRef.current) return;
             
             console.log('[프론트] 응답 상태:', res.status);
             
@@ -78,29 +145,38 @@ function Wardrobe() {
             }
             
             const data = await res.json();
+            if (requestId !== requestIdRef.current) return;
             console.log('[프론트] 옷장 데이터:', data);
             
-            if (data.ok && data.clothing) {
-                console.log('[프론트] clothing 배열:', data.clothing);
-                setClothes(data.clothing);
-            } else if (Array.isArray(data)) {
-                console.log('[프론트] 배열 직접 반환');
-                setClothes(data);
-            } else if (data.clothes) {
-                console.log('[프론트] clothes 배열:', data.clothes);
-                setClothes(data.clothes);
+            if (counts && counts.ok) {
+                setCategoryCounts(counts.facets.main_category || {});
+                if (!isFiltered) setTotal(counts.total);
+            }
+            
+            // 검색 API는 items/total, 옷장 조회는 clothing
+            const page = data.items || data.clothing;
+            if (data.ok && page) {
+                console.log('[프론트] clothing 배열:', page);
+                setClothes(prev => cursor ? [...prev, ...page] : page);
+                setNextCursor(data.next_cursor || null);
+                if (isFiltered) setTotal(data.total);
             } else {
                 console.warn('[프론트] 예상치 못한 응답 형식:', data);
-                setClothes([]);
+                if (!cursor) setClothes([]);
+                setNextCursor(null);
             }
             
         } catch (e) {
+            if (requestId !== requestIdRef.current) return;
             console.error('[프론트] 에러:', e);
             alert('옷 목록을 불러올 수 없습니다: ' + e.message);
-            setClothes([]);
+            if (!cursor) setClothes([]);
         } finally {
-            setLoading(false);
-            setIsSessionChecked(true);
+            if (requestId === requestIdRef.current) {
+                setLoading(false);
+                setLoadingMore(false);
+                setIsSessionChecked(true);
+            }
         }
     };
 
@@ -114,16 +190,6 @@ function Wardrobe() {
         return icons[category] || '[옷]';
     };
 
-    // 필터링된 옷 목록
-    const filteredClothes = clothes.filter(item => {
-        const matchCategory = filter === '전체' || item.main_category === filter;
-        const matchSearch = item.main_category.includes(searchTerm) || 
-                          Object.values(item.details || {}).some(val => 
-                              String(val).includes(searchTerm)
-                          );
-        return matchCategory && matchSearch;
-    });
-
     const deleteClothing = async (id) => {
         if (!window.confirm('정말 삭제하시겠습니까?')) return;
         
@@ -143,8 +209,16 @@ function Wardrobe() {
                 throw new Error(errorData.message || '삭제 실패');
             }
             
-            // 목록에서 제거
+            // 목록에서 제거 (개수도 함께)
+            const removed = clothes.find(item => item.id === id);
             setClothes(clothes.filter(item => item.id !== id));
+            setTotal(prev => Math.max(prev - 1, 0));
+            if (removed && categoryCounts) {
+                setCategoryCounts(prev => ({
+                    ...prev,
+                    [removed.main_category]: Math.max((prev[removed.main_category] || 1) - 1, 0)
+                }));
+            }
             alert('삭제되었습니다');
         } catch (e) {
             console.error('삭제 실패:', e);
@@ -173,7 +247,8 @@ function Wardrobe() {
         return null;
     }
 
-    if (loading) {
+    // 첫 조회 중에만 전체 로딩 화면 (필터/검색어를 바꿀 때는 입력창을 유지)
+    if (loading && clothes.length === 0 && !isFiltered) {
         return (
             <Container style={{ paddingTop: '80px', minHeight: '100vh' }}>
                 <div className="text-center mt-5">
@@ -191,7 +266,10 @@ function Wardrobe() {
             {/* 헤더 */}
             <div className="wardrobe-header mb-4">
                 <h1>내 옷장</h1>
-                <p className="text-muted">총 {filteredClothes.length}개의 옷</p>
+                <p className="text-muted">
+                    {isFiltered ? `검색 결과 ${total}개의 옷` : `총 ${total}개의 옷`}
+                    {loading && <Spinner animation="border" size="sm" role="status" className="ms-2" />}
+                </p>
             </div>
 
             {/* 필터 및 검색 */}
@@ -203,11 +281,12 @@ function Wardrobe() {
                             value={filter} 
                             onChange={(e) => setFilter(e.target.value)}
                         >
-                            <option>전체</option>
-                            <option>상의</option>
-                            <option>하의</option>
-                            <option>아우터</option>
-                            <option>원피스</option>
+                            <option value="전체">전체</option>
+                            {CATEGORIES.map(category => (
+                                <option key={category} value={category}>
+                                    {category}{categoryCounts ? ` (${categoryCounts[category] || 0})` : ''}
+                                </option>
+                            ))}
                         </Form.Select>
                     </Form.Group>
                 </Col>
@@ -225,7 +304,11 @@ function Wardrobe() {
             </Row>
 
             {/* 옷 목록 */}
-            {filteredClothes.length === 0 ? (
+            {clothes.length === 0 && isFiltered && !loading ? (
+                <Alert variant="secondary" className="text-center mt-5">
+                    <h5>조건에 맞는 옷이 없습니다</h5>
+                </Alert>
+            ) : clothes.length === 0 && !loading ? (
                 <Alert variant="info" className="text-center mt-5">
                     <h5>옷이 없습니다</h5>
                     <p>옷 사진을 업로드해서 옷장을 채워보세요!</p>
@@ -238,13 +321,13 @@ function Wardrobe() {
                 </Alert>
             ) : (
                 <Row className="g-4 mb-5">
-                    {filteredClothes.map((item, index) => (
-                        <Col key={index} md={6} lg={4}>
+                    {clothes.map((item) => (
+                        <Col key={item.id} md={6} lg={4}>
                             <Card className="clothing-card h-100 shadow-sm">
                                 {/* 이미지 표시 */}
                                 <div className="image-container">
                                     <img 
-                                        src={item.image_url} 
+                                        src={thumbnailUrl(item.image_url)} 
                                         alt={item.main_category}
                                         className="clothing-image"
                                         onError={(e) => {
@@ -307,6 +390,24 @@ function Wardrobe() {
                 </Row>
             )}
 
+            {/* 다음 페이지 */}
+            {nextCursor && (
+                <div className="text-center">
+                    <Button
+                        variant="outline-primary"
+                        onClick={() => fetchClothes(nextCursor)}
+                        disabled={loadingMore}
+                    >
+                        {loadingMore ? (
+                            <>
+                                <Spinner animation="border" size="sm" role="status" className="me-2" />
+                                불러오는 중...
+                            </>
+                        ) : '더 보기'}
+                    </Button>
+                </div>
+            )}
+
             {/* 돌아가기 버튼 */}
             <div className="text-center mt-5">
                 <Button 
@@ -483,7 +483,7 @@ function Main() {
                 form.append("file", blob, filename);
 
                 console.log("[프론트] 서버 전송 시작...");
-                const res = await fetch("/api/clothes", { method: "POST", body: form });
+                const res = await fetch("/api/clothes", { method: "POST", body: form, credentials: "include" });
                 const json = await res.json();
                 console.log("[프론트] 서버 응답:", json);
 